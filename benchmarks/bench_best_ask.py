@@ -0,0 +1,80 @@
+"""
+"Best ask at time T" on the legacy JSON `quotes` table vs. the partitioned
+`quote_ticks` layout. Requires a scratch Postgres database:
+
+    DATABASE_URL=postgresql+asyncpg://localhost/arbytron_bench python -m benchmarks.bench_best_ask
+"""
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from db.models import Base, Quote, QuoteTick
+from db.partitions import ensure_partitions
+
+LEGACY_SQL = text(
+    """
+    SELECT (outcomes->'Yes'->>'ask')::double precision FROM quotes
+    WHERE platform = :platform AND market_id = :market_id AND timestamp <= :ts
+    ORDER BY timestamp DESC LIMIT 1
+    """
+)
+TICKS_SQL = text(
+    """
+    SELECT ask FROM quote_ticks
+    WHERE platform = :platform AND market_id = :market_id AND outcome = 'Yes' AND timestamp <= :ts
+    ORDER BY timestamp DESC LIMIT 1
+    """
+)
+
+
+async def main(markets: int = 1000, polls: int = 200, queries: int = 2000) -> None:
+    engine = create_async_engine(os.environ["DATABASE_URL"])
+    start = datetime(2025, 1, 1)
+    rng = random.Random(0)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all, tables=[Quote.__table__, QuoteTick.__table__])
+        await conn.run_sync(Base.metadata.create_all, tables=[Quote.__table__, QuoteTick.__table__])
+        await ensure_partitions(conn, start.date(), (polls // 1440) + 2)
+        raw = (await conn.get_raw_connection()).driver_connection
+        legacy, ticks = [], []
+        for p in range(polls):
+            ts = start + timedelta(minutes=p)
+            for m in range(markets):
+                ask = rng.uniform(0.05, 0.95)
+                outcomes = {"Yes": {"bid": ask - 0.01, "ask": ask}, "No": {"bid": 0.98 - ask, "ask": 0.99 - ask}}
+                legacy.append(("kalshi", f"e{m}", f"m{m}", json.dumps(outcomes), ts))
+                for name, pl in outcomes.items():
+                    ticks.append(("kalshi", f"m{m}", ts, name, f"e{m}", pl["bid"], pl["ask"]))
+        await raw.copy_records_to_table(
+            "quotes", records=legacy, columns=["platform", "event_id", "market_id", "outcomes", "timestamp"]
+        )
+        await raw.copy_records_to_table(
+            "quote_ticks",
+            records=ticks,
+            columns=["platform", "market_id", "timestamp", "outcome", "event_id", "bid", "ask"],
+        )
+        await conn.execute(text("ANALYZE quotes"))
+        await conn.execute(text("ANALYZE quote_ticks"))
+
+    probes = [
+        {"platform": "kalshi", "market_id": f"m{rng.randrange(markets)}", "ts": start + timedelta(minutes=rng.uniform(0, polls))}
+        for _ in range(queries)
+    ]
+    async with engine.connect() as conn:
+        for name, sql in (("quotes (JSON)", LEGACY_SQL), ("quote_ticks", TICKS_SQL)):
+            t0 = time.perf_counter()
+            for params in probes:
+                (await conn.execute(sql, params)).scalar()
+            elapsed = time.perf_counter() - t0
+            print(f"{name:15s} {elapsed / queries * 1e6:8.1f} us/query over {markets * polls} quotes")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,65 @@
+"""
+Memory per binary-market quote, MarketQuote vs. CompactQuote, measured with
+tracemalloc. Market ids, titles and timestamps are created up front so only
+the representation itself is counted.
+
+    python -m benchmarks.bench_compact_memory
+"""
+import gc
+import random
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from models import MarketQuote, PriceLevel
+from services.compact import CompactQuote
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return objects, after - before
+
+
+def main(markets: int = 100_000) -> None:
+    rng = random.Random(0)
+    start = datetime(2025, 4, 1, tzinfo=timezone.utc)
+    rows = []
+    for i in range(markets):
+        ask = rng.uniform(0.05, 0.95)
+        rows.append((
+            f"e{i}",
+            f"KX-{i}",
+            f"Will event {i} happen?",
+            start + timedelta(seconds=i),
+            ask - 0.01,
+            ask,
+        ))
+
+    def build_market_quotes():
+        return [
+            MarketQuote(
+                platform="kalshi",
+                event_id=event_id,
+                market_id=market_id,
+                outcomes={"Yes": PriceLevel(bid=bid, ask=ask), "No": PriceLevel(bid=0.99 - ask, ask=1.0 - bid)},
+                timestamp=ts,
+                title=title,
+            )
+            for event_id, market_id, title, ts, bid, ask in rows
+        ]
+
+    quotes, full = measure(build_market_quotes)
+    compact, small = measure(lambda: [CompactQuote.from_market_quote(q) for q in quotes])
+    assert len(compact) == markets
+    print(f"MarketQuote   {full / markets:8.0f} bytes/quote")
+    print(f"CompactQuote  {small / markets:8.0f} bytes/quote")
+    print(f"ratio         {full / small:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Quotes/sec parsed from a 10k-market payload: `response.json()` plus validated
+pydantic models vs. the fast-decode path (connectors.codec plus trusted
+construction).
+
+    python -m benchmarks.bench_decode
+"""
+import json
+import random
+import time
+
+from connectors.codec import HAS_ORJSON, loads
+from connectors.rest_client import KalshiRestClient, PolymarketRestClient
+
+
+def kalshi_payload(markets: int, rng: random.Random) -> dict:
+    rows = []
+    for i in range(markets):
+        ask = round(rng.uniform(0.05, 0.95), 2)
+        rows.append({
+            "event_id": f"e{i}",
+            "market_id": f"KX-{i}",
+            "title": f"Will event {i} happen?",
+            "category": "politics",
+            "outcomes": {"Yes": {"bid": ask - 0.01, "ask": ask}, "No": {"bid": 0.98 - ask, "ask": 0.99 - ask}},
+            "timestamp": "2025-04-01T12:00:00+00:00",
+            "close_time": "2025-11-05T00:00:00+00:00",
+        })
+    return {"markets": rows}
+
+
+def polymarket_payload(markets: int, rng: random.Random) -> dict:
+    rows = []
+    for i in range(markets):
+        ask = round(rng.uniform(0.05, 0.95), 3)
+        rows.append({
+            "event_id": f"e{i}",
+            "market_id": f"0x{i:040x}",
+            "question": f"Will event {i} happen?",
+            "outcomes": [
+                {"outcome": "Yes", "bid_price": ask - 0.01, "ask_price": ask},
+                {"outcome": "No", "bid_price": 0.98 - ask, "ask_price": 0.99 - ask},
+            ],
+            "updated_at": "2025-04-01T12:00:00+00:00",
+            "end_date": "2025-11-05T00:00:00+00:00",
+        })
+    return {"markets": rows}
+
+
+def main(markets: int = 10_000, repeat: int = 5) -> None:
+    rng = random.Random(0)
+    print(f"orjson available: {HAS_ORJSON}")
+    for venue, cls, payload in (
+        ("kalshi", KalshiRestClient, kalshi_payload(markets, rng)),
+        ("polymarket", PolymarketRestClient, polymarket_payload(markets, rng)),
+    ):
+        body = json.dumps(payload).encode()
+        for mode, fast in (("validated", False), ("fast_decode", True)):
+            client = cls(base_url="http://bench", fast_decode=fast)
+            best = float("inf")
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                # mirrors _get_json: response.json() is json.loads of the body
+                data = loads(body) if fast else json.loads(body)
+                quotes = client.normalize(data)
+                best = min(best, time.perf_counter() - t0)
+            assert len(quotes) == markets
+            print(f"{venue:10s} {mode:12s} {best * 1000:8.1f} ms  {markets / best:10.0f} quotes/s")
+
+
+if __name__ == "__main__":
+    main()
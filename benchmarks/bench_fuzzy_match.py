@@ -0,0 +1,66 @@
+"""
+Throughput of FuzzyMatcher as the market count grows. Time per market should
+stay roughly flat (sub-quadratic total) thanks to the inverted token index.
+
+    python -m benchmarks.bench_fuzzy_match
+"""
+import random
+import string
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from models import MarketQuote, PriceLevel
+from services.fuzzy_match import FuzzyMatcher
+
+TEMPLATES = [
+    "Will {a} {b} win the {c} {year}?",
+    "{a} {b} to announce {c} before {year}",
+    "Will {a} {b} {c} exceed {n} in {year}?",
+]
+
+
+def make_quotes(markets: int, seed: int = 0) -> List[MarketQuote]:
+    rng = random.Random(seed)
+    vocab = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9))) for _ in range(max(1000, markets))]
+    now = datetime.utcnow()
+    base = datetime(2025, 1, 1)
+    quotes: List[MarketQuote] = []
+    for i in range(markets // 2):
+        words = dict(a=rng.choice(vocab), b=rng.choice(vocab), c=rng.choice(vocab), year=rng.randint(2025, 2030), n=rng.randint(1, 999))
+        title = rng.choice(TEMPLATES).format(**words)
+        close = base + timedelta(days=rng.randint(0, 1500))
+        # counterpart on the other venue with light rewording
+        other = title.replace("Will ", "").rstrip("?")
+        for platform, t in (("kalshi", title), ("polymarket", other)):
+            quotes.append(
+                MarketQuote.construct(
+                    platform=platform,
+                    event_id=f"{platform}_{i}",
+                    market_id=f"{platform}_{i}",
+                    outcomes={"Yes": PriceLevel.construct(bid=0.4, ask=0.5)},
+                    timestamp=now,
+                    title=t,
+                    category=None,
+                    close_time=close,
+                )
+            )
+    return quotes
+
+
+def main() -> None:
+    for markets in (12_500, 25_000, 50_000, 100_000):
+        quotes = make_quotes(markets)
+        matcher = FuzzyMatcher()
+        t0 = time.perf_counter()
+        matcher.update(quotes)
+        elapsed = time.perf_counter() - t0
+        matched = sum(1 for e in matcher.entries.values() if e.matches) // 2
+        print(
+            f"{markets:7d} markets  {elapsed:7.2f} s  {elapsed / markets * 1e6:7.1f} us/market  "
+            f"{markets / elapsed:9.0f} markets/s  {matched} pairs"
+        )
+
+
+if __name__ == "__main__":
+    main()
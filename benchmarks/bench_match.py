@@ -0,0 +1,77 @@
+"""
+Compare match_quotes against MatchIndex at 50k markets x 3 venues.
+
+    python -m benchmarks.bench_match
+"""
+import random
+import time
+from datetime import datetime
+from typing import List
+
+from models import MarketQuote, PriceLevel
+from services.match import MatchIndex, match_quotes
+
+VENUES = ["kalshi", "polymarket", "predictit"]
+
+
+def make_quotes(markets: int, venues: List[str]) -> List[MarketQuote]:
+    now = datetime.utcnow()
+    quotes: List[MarketQuote] = []
+    for venue in venues:
+        for i in range(markets):
+            quotes.append(
+                MarketQuote.construct(
+                    platform=venue,
+                    event_id=f"e{i}",
+                    market_id=f"{venue}_{i}",
+                    outcomes={"Yes": PriceLevel.construct(bid=0.4, ask=0.5), "No": PriceLevel.construct(bid=0.4, ask=0.5)},
+                    timestamp=now,
+                )
+            )
+    return quotes
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - t0, result
+
+
+def main(markets: int = 50_000, changed_fraction: float = 0.01) -> None:
+    quotes = make_quotes(markets, VENUES)
+    print(f"{len(quotes)} quotes ({markets} markets x {len(VENUES)} venues)")
+
+    elapsed, candidates = timed(match_quotes, quotes)
+    print(f"match_quotes (full rebuild):     {elapsed * 1000:8.1f} ms  {len(candidates)} candidates")
+
+    index = MatchIndex()
+
+    def build():
+        for q in quotes:
+            index.upsert(q)
+        return index.drain()
+
+    elapsed, candidates = timed(build)
+    print(f"MatchIndex initial build+drain:  {elapsed * 1000:8.1f} ms  {len(candidates)} candidates")
+
+    rng = random.Random(0)
+    changed = rng.sample(quotes, int(len(quotes) * changed_fraction))
+    updates = [
+        q.copy(update={"outcomes": {"Yes": PriceLevel.construct(bid=0.41, ask=0.49), "No": q.outcomes["No"]}})
+        for q in changed
+    ]
+
+    def tick():
+        for q in updates:
+            index.upsert(q)
+        return index.drain()
+
+    elapsed, candidates = timed(tick)
+    print(f"MatchIndex tick ({len(updates)} updates):   {elapsed * 1000:8.1f} ms  {len(candidates)} candidates")
+
+    elapsed, _ = timed(match_quotes, quotes)
+    print(f"match_quotes per tick:           {elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Compare identify_opportunities against the vectorized score_opportunities.
+
+    python -m benchmarks.bench_opportunity
+"""
+import random
+import time
+from datetime import datetime
+from typing import List
+
+from models import ArbitrageCandidate, MarketQuote, PriceLevel, Settings
+from services.opportunity import identify_opportunities, score_opportunities
+
+VENUES = ["kalshi", "polymarket", "predictit"]
+
+
+def make_candidates(events: int, seed: int = 0) -> List[ArbitrageCandidate]:
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    candidates: List[ArbitrageCandidate] = []
+    for i in range(events):
+        quotes = []
+        for venue in VENUES:
+            outcomes = {}
+            for outcome in ("Yes", "No"):
+                ask = rng.uniform(0.45, 0.65)
+                outcomes[outcome] = PriceLevel.construct(bid=ask - rng.uniform(0.0, 0.05), ask=ask)
+            quotes.append(
+                MarketQuote.construct(platform=venue, event_id=f"e{i}", market_id=f"{venue}_{i}", outcomes=outcomes, timestamp=now)
+            )
+        candidates.append(ArbitrageCandidate.construct(event_key=f"e{i}", platform_quotes=quotes))
+    return candidates
+
+
+def main(events: int = 50_000) -> None:
+    candidates = make_candidates(events)
+    settings = Settings(kalshi_api_key="k", polymarket_rpc_url="url", min_spread=0.05)
+    for name, fn in (("identify_opportunities", identify_opportunities), ("score_opportunities", score_opportunities)):
+        t0 = time.perf_counter()
+        opps = fn(candidates, settings)
+        elapsed = time.perf_counter() - t0
+        print(f"{name:24s} {elapsed * 1000:8.1f} ms  {events / elapsed:10.0f} candidates/s  {len(opps)} opportunities")
+
+
+if __name__ == "__main__":
+    main()
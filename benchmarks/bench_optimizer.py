@@ -0,0 +1,55 @@
+"""
+SizeOptimizer over 10k candidates: a cold solve of every candidate, then a
+tick where 1% of the Kalshi books change and only those events re-solve.
+
+    python -m benchmarks.bench_optimizer
+"""
+import random
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.bench_opportunity import make_candidates
+from models import Settings
+from services.optimizer import SizeOptimizer
+from services.order_book import L2OrderBook
+
+
+def main(events: int = 10_000, levels: int = 5, dirty: float = 0.01) -> None:
+    rng = random.Random(1)
+    candidates = make_candidates(events)
+    close = datetime.utcnow() + timedelta(days=30)
+    books = {}
+    for c in candidates:
+        for mq in c.platform_quotes:
+            mq.close_time = close
+        kalshi = c.platform_quotes[0]
+        kalshi.platform = "kalshi"
+        book = books[("kalshi", kalshi.market_id)] = L2OrderBook(kalshi.market_id)
+        for side in ("yes", "no"):
+            top = rng.randint(30, 50)
+            for k in range(levels):
+                book.apply_level(side, top - k, rng.uniform(10, 200))
+    settings = Settings(kalshi_api_key="k", polymarket_rpc_url="url", min_spread=0.0, max_capital=500.0)
+    optimizer = SizeOptimizer(settings, books=books)
+
+    t0 = time.perf_counter()
+    opps = optimizer.optimize(candidates)
+    cold = time.perf_counter() - t0
+    print(f"cold solve    {cold * 1000:8.1f} ms  {events / cold:10.0f} candidates/s  {len(opps)} opportunities")
+
+    t0 = time.perf_counter()
+    optimizer.optimize(candidates)
+    clean = time.perf_counter() - t0
+    print(f"no change     {clean * 1000:8.1f} ms  {events / clean:10.0f} candidates/s")
+
+    for c in rng.sample(candidates, int(events * dirty)):
+        book = books[("kalshi", c.platform_quotes[0].market_id)]
+        book.apply_level("yes", rng.choice(list(book.bids["Yes"].levels)), rng.uniform(1, 20))
+    t0 = time.perf_counter()
+    opps = optimizer.optimize(candidates)
+    tick = time.perf_counter() - t0
+    print(f"{dirty:.0%} dirty     {tick * 1000:8.1f} ms  {events / tick:10.0f} candidates/s  {len(opps)} opportunities")
+
+
+if __name__ == "__main__":
+    main()
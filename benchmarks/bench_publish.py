@@ -0,0 +1,106 @@
+"""
+Publisher throughput, per-message `publish` vs. batched `publish_many`,
+against in-process stand-ins for Kafka and Redis that charge one simulated
+network round trip per request (or per batch/pipeline).
+
+    python -m benchmarks.bench_publish
+"""
+import asyncio
+import time
+from datetime import datetime, timezone
+
+from connectors import broker
+from connectors.broker import KAFKA_BATCHING, KafkaPublisher, RedisPublisher
+from models import MarketQuote, PriceLevel
+
+RTT = 0.0005
+
+
+class LocalKafka:
+    """Acknowledges a send_and_wait after one round trip; batches `send`s lingering `linger` seconds."""
+
+    def __init__(self, linger: float = 0.005):
+        self.linger = linger
+        self.batch = []
+
+    async def send_and_wait(self, topic, payload, key=None):
+        await asyncio.sleep(RTT)
+
+    async def send(self, topic, payload, key=None):
+        fut = asyncio.get_running_loop().create_future()
+        if not self.batch:
+            asyncio.get_running_loop().call_later(self.linger + RTT, self._flush)
+        self.batch.append(fut)
+        return fut
+
+    def _flush(self):
+        batch, self.batch = self.batch, []
+        for fut in batch:
+            fut.set_result(None)
+
+
+class LocalRedis:
+    class Pipeline:
+        def __init__(self):
+            self.commands = 0
+
+        def xadd(self, *args, **kwargs):
+            self.commands += 1
+
+        def publish(self, *args):
+            self.commands += 1
+
+        async def execute(self):
+            await asyncio.sleep(RTT)
+
+    async def publish(self, topic, payload):
+        await asyncio.sleep(RTT)
+
+    async def xadd(self, *args, **kwargs):
+        await asyncio.sleep(RTT)
+
+    def pipeline(self, transaction=True):
+        return self.Pipeline()
+
+
+def make_quotes(n: int):
+    now = datetime.now(timezone.utc)
+    return [
+        MarketQuote.construct(
+            platform="kalshi",
+            event_id=f"e{i % 500}",
+            market_id=f"KX-{i}",
+            outcomes={"Yes": PriceLevel.construct(bid=0.41, ask=0.43), "No": PriceLevel.construct(bid=0.56, ask=0.58)},
+            timestamp=now,
+        )
+        for i in range(n)
+    ]
+
+
+async def run(label: str, publish, quotes) -> None:
+    t0 = time.perf_counter()
+    await publish(quotes)
+    elapsed = time.perf_counter() - t0
+    print(f"{label:28s} {elapsed * 1000:8.1f} ms  {len(quotes) / elapsed:10.0f} msg/s")
+
+
+async def main(messages: int = 2_000) -> None:
+    quotes = make_quotes(messages)
+    # the stand-in takes the producer's place, batching options included
+    broker.aiokafka.AIOKafkaProducer = lambda bootstrap_servers, linger_ms=0, **options: LocalKafka(linger_ms / 1000)
+    kafka = KafkaPublisher("localhost:9092", **KAFKA_BATCHING)
+    redis = RedisPublisher("redis://localhost", streams=True)
+    redis.redis = LocalRedis()
+
+    async def one_by_one(publisher, batch):
+        for q in batch:
+            await publisher.publish("quotes", q)
+
+    await run("kafka publish", lambda q: one_by_one(kafka, q), quotes)
+    await run("kafka publish_many", lambda q: kafka.publish_many("quotes", q), quotes)
+    await run("redis xadd", lambda q: one_by_one(redis, q), quotes)
+    await run("redis publish_many", lambda q: redis.publish_many("quotes", q), quotes)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
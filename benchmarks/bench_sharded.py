@@ -0,0 +1,92 @@
+"""
+Scoring throughput and event-loop lag, in-loop (MatchIndex + score_opportunities
+on the event loop) vs. ShardedScorer with 1, 2 and 4 worker processes. Each
+round re-quotes every market with fresh prices; a ticker task measures how
+late the loop wakes up while scoring runs.
+
+    python -m benchmarks.bench_sharded
+"""
+import asyncio
+import os
+import random
+import time
+from array import array
+from typing import List
+
+from models import Settings
+from services.compact import CompactQuote, intern_names
+from services.match import MatchIndex
+from services.opportunity import score_opportunities
+from services.sharded import ShardedScorer
+
+VENUES = ["kalshi", "polymarket", "predictit"]
+
+
+def make_rounds(events: int, rounds: int, seed: int = 0) -> List[List[CompactQuote]]:
+    rng = random.Random(seed)
+    names = intern_names(("Yes", "No"))
+    out = []
+    for r in range(rounds):
+        batch = []
+        for i in range(events):
+            for venue in VENUES:
+                yes, no = rng.uniform(0.40, 0.60), rng.uniform(0.40, 0.60)
+                prices = array("d", (yes - 0.02, yes, no - 0.02, no))
+                batch.append(CompactQuote(venue, f"e{i}", f"{venue}_{i}", names, prices, float(r)))
+        out.append(batch)
+    return out
+
+
+async def loop_lag(stop: asyncio.Event, interval: float = 0.001) -> float:
+    worst = 0.0
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - t0 - interval)
+    return worst
+
+
+async def measure(label: str, score, rounds, quotes: int) -> None:
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(loop_lag(stop))
+    await asyncio.sleep(0.01)
+    t0 = time.perf_counter()
+    found = 0
+    for batch in rounds:
+        found += len(await score(batch))
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    lag = await ticker
+    print(f"{label:16s} {elapsed * 1000:8.1f} ms  {quotes / elapsed:10.0f} quotes/s  max loop lag {lag * 1000:7.1f} ms  {found} opportunities")
+
+
+async def main(events: int = 20_000, rounds: int = 3) -> None:
+    settings = Settings(kalshi_api_key="k", polymarket_rpc_url="url", min_spread=0.05)
+    data = make_rounds(events, rounds)
+    quotes = sum(len(batch) for batch in data)
+    print(f"{os.cpu_count()} CPUs, {events} events x {len(VENUES)} venues, {rounds} rounds")
+
+    index = MatchIndex(compact=True)
+
+    async def in_loop(batch):
+        for q in batch:
+            index.upsert(q)
+        return score_opportunities(index.drain(), settings)
+
+    await measure("in-loop", in_loop, data, quotes)
+    for shards in (1, 2, 4):
+        scorer = ShardedScorer(settings, shards=shards)
+        await scorer.start()
+        try:
+            # chunks let the loop interleave other work and pipeline the shards
+            async def sharded(batch, chunk=5_000):
+                chunks = [scorer.submit(batch[i : i + chunk]) for i in range(0, len(batch), chunk)]
+                return [opp for opps in await asyncio.gather(*chunks) for opp in opps]
+
+            await measure(f"{shards} process(es)", sharded, data, quotes)
+        finally:
+            scorer.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
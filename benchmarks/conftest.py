@@ -0,0 +1,144 @@
+"""
+A small pytest-benchmark style harness for the throughput suite:
+
+    python -m pytest benchmarks -q
+    python -m pytest benchmarks -q --bench-save baseline.json
+    python -m pytest benchmarks -q --bench-compare baseline.json --bench-tolerance 0.25
+
+`bench(fn, items)` runs `fn` for a few rounds and reports items/s from the
+median round, p50/p99 of the rounds and of any `bench.stage(...)` timings,
+the process's peak RSS so far, and how far this benchmark raised that peak
+(ru_maxrss only ever grows, so a later benchmark that fits under an earlier
+peak reports +0). With --bench-compare a benchmark fails when its
+throughput drops more than the tolerance below the saved baseline.
+"""
+import asyncio
+import inspect
+import json
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pytest
+
+RESULTS_KEY = pytest.StashKey[Dict[str, Dict[str, Any]]]()
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("bench")
+    group.addoption("--bench-save", default=None, help="write benchmark results to this JSON file")
+    group.addoption("--bench-compare", default=None, help="fail benchmarks slower than this saved JSON baseline")
+    group.addoption("--bench-tolerance", type=float, default=0.2, help="allowed throughput drop vs. the baseline")
+
+
+def pytest_configure(config):
+    config.stash[RESULTS_KEY] = {}
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    p50, p99 = np.percentile(samples, [50, 99])
+    return {"p50_ms": float(p50) * 1000, "p99_ms": float(p99) * 1000}
+
+
+class Bench:
+    def __init__(self, name: str, baseline: Optional[Dict[str, Any]], tolerance: float):
+        self.name = name
+        self.baseline = baseline
+        self.tolerance = tolerance
+        self.stages: Dict[str, List[float]] = {}
+        self.result: Optional[Dict[str, Any]] = None
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block as one sample of stage `name`."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.setdefault(name, []).append(time.perf_counter() - t0)
+
+    def __call__(
+        self, fn: Callable[[], Any], items: int, unit: str = "quotes", rounds: int = 5, warmup: int = 1
+    ) -> Dict[str, Any]:
+        """
+        Time `rounds` calls of `fn` (a function or coroutine function) that
+        each process `items` units. If `fn` returns an int it is reported as
+        opportunities produced per round.
+        """
+        call = (lambda: asyncio.run(fn())) if inspect.iscoroutinefunction(fn) else fn
+        rss_before = peak_rss_mb()
+        for _ in range(warmup):
+            call()
+        self.stages.clear()
+        times: List[float] = []
+        produced = 0
+        for _ in range(rounds):
+            t0 = time.perf_counter()
+            out = call()
+            times.append(time.perf_counter() - t0)
+            if isinstance(out, int):
+                produced = out
+        median = float(np.median(times))
+        self.result = {
+            "unit": unit,
+            "rate": items / median,
+            "opportunities_rate": produced / median if produced else None,
+            "rounds": _percentiles(times),
+            "stages": {name: _percentiles(samples) for name, samples in self.stages.items()},
+            "peak_rss_mb": peak_rss_mb(),
+            "peak_rss_growth_mb": peak_rss_mb() - rss_before,
+        }
+        if self.baseline is not None and self.name in self.baseline:
+            floor = self.baseline[self.name]["rate"] * (1 - self.tolerance)
+            if self.result["rate"] < floor:
+                pytest.fail(
+                    f"{self.name}: {self.result['rate']:.0f} {unit}/s is below the baseline "
+                    f"{self.baseline[self.name]['rate']:.0f} {unit}/s - {self.tolerance:.0%}"
+                )
+        return self.result
+
+
+@pytest.fixture
+def bench(request):
+    config = request.config
+    baseline = None
+    if config.getoption("--bench-compare"):
+        with open(config.getoption("--bench-compare")) as f:
+            baseline = json.load(f)
+    b = Bench(request.node.name, baseline, config.getoption("--bench-tolerance"))
+    yield b
+    if b.result is not None:
+        config.stash[RESULTS_KEY][b.name] = b.result
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    results = config.stash.get(RESULTS_KEY, {})
+    if not results:
+        return
+    terminalreporter.section("benchmarks")
+    for name, r in results.items():
+        line = f"{name:32s} {r['rate']:12.0f} {r['unit']}/s"
+        if r["opportunities_rate"]:
+            line += f"  {r['opportunities_rate']:10.0f} opportunities/s"
+        line += f"  round p50 {r['rounds']['p50_ms']:8.2f} ms  p99 {r['rounds']['p99_ms']:8.2f} ms"
+        line += f"  process peak RSS {r['peak_rss_mb']:7.1f} MB (+{r['peak_rss_growth_mb']:.1f} MB)"
+        terminalreporter.write_line(line)
+        for stage, p in r["stages"].items():
+            terminalreporter.write_line(f"    {stage:12s} p50 {p['p50_ms']:8.3f} ms  p99 {p['p99_ms']:8.3f} ms")
+
+
+def pytest_sessionfinish(session):
+    path = session.config.getoption("--bench-save")
+    results = session.config.stash.get(RESULTS_KEY, {})
+    if path and results:
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
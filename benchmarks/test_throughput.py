@@ -0,0 +1,144 @@
+"""
+Throughput suite for the hot paths of a poll: match_quotes,
+identify_opportunities, save_quotes, save_quotes_bulk (Core insert path),
+and a recorded venue session replayed at max speed through
+normalize -> MatchIndex -> score_opportunities.
+
+    python -m pytest benchmarks -q
+"""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from benchmarks.bench_match import VENUES, make_quotes
+from benchmarks.bench_opportunity import make_candidates
+from connectors.codec import dumps, loads
+from connectors.recording import Recorder, Replayer
+from connectors.rest_client import KalshiRestClient, PolymarketRestClient
+from models import Settings
+from services.match import MatchIndex, match_quotes
+from services.opportunity import identify_opportunities, score_opportunities
+from services.persistence import save_quotes, save_quotes_bulk
+
+SETTINGS = Settings(kalshi_api_key="k", polymarket_rpc_url="url", min_spread=0.05)
+
+
+class NullSession:
+    """Accepts rows without a database, so save_quotes is timed without I/O."""
+
+    def __init__(self):
+        self.rows = 0
+
+    def add(self, item):
+        self.rows += 1
+
+    async def commit(self):
+        pass
+
+
+class NullCoreSession(NullSession):
+    """
+    A non-asyncpg session, so save_quotes_bulk takes its Core executemany
+    insert path; rows are built and the statement compiled, but not sent.
+    """
+
+    class _Connection:
+        class dialect:
+            driver = "aiosqlite"
+
+    async def connection(self):
+        return self._Connection()
+
+    async def execute(self, stmt, rows):
+        stmt.compile()
+        self.rows += len(rows)
+
+
+def record_session(path: str, markets: int, page_size: int = 500, seed: int = 0) -> None:
+    """A synthetic recording: both venues quote the same `markets` binary events."""
+    rng = random.Random(seed)
+    recorder = Recorder(path)
+    now = datetime.utcnow()
+    stamp = now.isoformat() + "Z"
+    close = (now + timedelta(days=30)).isoformat() + "Z"
+    for start in range(0, markets, page_size):
+        kalshi, polymarket = [], []
+        for i in range(start, min(start + page_size, markets)):
+            yes, no = rng.uniform(0.40, 0.60), rng.uniform(0.40, 0.60)
+            kalshi.append({
+                "event_id": f"e{i}",
+                "market_id": f"k{i}",
+                "outcomes": {"Yes": {"bid": yes - 0.02, "ask": yes}, "No": {"bid": 0.97 - yes, "ask": 0.99 - yes}},
+                "timestamp": stamp,
+                "close_time": close,
+            })
+            polymarket.append({
+                "event_id": f"e{i}",
+                "market_id": f"p{i}",
+                "outcomes": [
+                    {"outcome": "Yes", "bid_price": 0.97 - no, "ask_price": 0.99 - no},
+                    {"outcome": "No", "bid_price": no - 0.02, "ask_price": no},
+                ],
+                "updated_at": stamp,
+                "end_date": close,
+            })
+        recorder.record("kalshi", "rest", dumps({"markets": kalshi}))
+        recorder.record("polymarket", "rest", dumps({"markets": polymarket}))
+    recorder.close()
+
+
+def test_match_quotes(bench):
+    quotes = make_quotes(20_000, VENUES)
+    bench(lambda: match_quotes(quotes), items=len(quotes))
+
+
+def test_identify_opportunities(bench):
+    candidates = make_candidates(10_000)
+    bench(lambda: len(identify_opportunities(candidates, SETTINGS)), items=len(candidates), unit="candidates")
+
+
+def test_save_quotes(bench):
+    quotes = make_quotes(10_000, ["kalshi"])
+
+    async def save():
+        await save_quotes(quotes, NullSession())
+
+    bench(save, items=len(quotes))
+
+
+def test_save_quotes_bulk(bench):
+    quotes = make_quotes(10_000, ["kalshi"])
+
+    async def save():
+        await save_quotes_bulk(quotes, NullCoreSession())
+
+    bench(save, items=len(quotes))
+
+
+@pytest.mark.parametrize("fast_decode", [False, True], ids=["validated", "fast_decode"])
+def test_replay_pipeline(bench, tmp_path, fast_decode):
+    markets = 5_000
+    path = str(tmp_path / "session.jsonl.gz")
+    record_session(path, markets)
+    connectors = {
+        "kalshi": KalshiRestClient(base_url="http://replay", fast_decode=fast_decode),
+        "polymarket": PolymarketRestClient(base_url="http://replay", fast_decode=fast_decode),
+    }
+
+    async def replay():
+        index = MatchIndex()
+        found = 0
+        async for record in Replayer(path, speed=None).records(kind="rest"):
+            with bench.stage("parse"):
+                quotes = connectors[record["source"]].normalize(loads(record["payload"]))
+            with bench.stage("match"):
+                for q in quotes:
+                    index.upsert(q)
+                candidates = index.drain()
+            with bench.stage("score"):
+                found += len(score_opportunities(candidates, SETTINGS))
+        return found
+
+    result = bench(replay, items=2 * markets)
+    assert result["opportunities_rate"]
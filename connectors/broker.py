@@ -1,8 +1,57 @@
+import asyncio
 import json
+import zlib
 from abc import ABC, abstractmethod
-from typing import Any
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 import aiokafka
 import aioredis
+from pydantic import BaseModel
+
+from connectors.codec import dumps
+from models import Settings
+
+# AIOKafkaProducer options for throughput: wait up to 5 ms to fill larger,
+# compressed batches. Pass as KafkaPublisher(servers, **KAFKA_BATCHING).
+KAFKA_BATCHING = {"linger_ms": 5, "max_batch_size": 256 * 1024, "compression_type": "gzip"}
+
+
+def encode(message: Any) -> bytes:
+    """Serialize a message straight to bytes (pydantic models via .dict(), no intermediate str)."""
+    if isinstance(message, BaseModel):
+        return dumps(message.dict())
+    if hasattr(message, "json"):
+        return message.json().encode("utf-8")
+    return dumps(message)
+
+
+def event_key(message: Any) -> Optional[bytes]:
+    """Partition key: the message's event_id (or event_key), so one event stays ordered."""
+    if isinstance(message, dict):
+        key = message.get("event_id") or message.get("event_key")
+    else:
+        key = getattr(message, "event_id", None) or getattr(message, "event_key", None)
+    return key.encode("utf-8") if key else None
+
+
+def shard_for(key: Optional[bytes], shards: int) -> int:
+    """Stable shard of a partition key (crc32, as a deterministic alternative to hash())."""
+    return zlib.crc32(key) % shards if key and shards > 1 else 0
+
+
+def shard_stream(topic: str, shard: int, shards: int) -> str:
+    """Redis Stream name holding one shard of `topic`."""
+    return topic if shards <= 1 else f"{topic}:{shard}"
+
+
+@dataclass
+class BrokerMessage:
+    topic: str
+    partition: int
+    # Kafka offset or Redis Stream entry id
+    offset: Any
+    key: Optional[bytes]
+    value: bytes
 
 
 class Publisher(ABC):
@@ -14,37 +63,421 @@ class Publisher(ABC):
     async def publish(self, topic: str, message: Any) -> None:
         pass
 
+    async def publish_many(self, topic: str, messages: Iterable[Any]) -> int:
+        """Publish several messages; returns the number published."""
+        count = 0
+        for message in messages:
+            await self.publish(topic, message)
+            count += 1
+        return count
+
     @abstractmethod
     async def stop(self) -> None:
         pass
 
 
 class KafkaPublisher(Publisher):
-    def __init__(self, bootstrap_servers: str):
-        self.producer = aiokafka.AIOKafkaProducer(bootstrap_servers=bootstrap_servers)
+    """
+    `publish` waits for the broker to acknowledge each message.
+    `publish_many` hands messages to the producer's batcher without waiting
+    (keyed by event_id), keeping at most `max_in_flight` unacknowledged, and
+    returns once all of them are acknowledged. Producer options such as
+    KAFKA_BATCHING are passed through to AIOKafkaProducer.
+    """
+
+    def __init__(self, bootstrap_servers: str, max_in_flight: int = 10_000, **producer_options: Any):
+        self.producer = aiokafka.AIOKafkaProducer(bootstrap_servers=bootstrap_servers, **producer_options)
+        self.max_in_flight = max_in_flight
+        self._window: Optional[asyncio.Semaphore] = None
 
     async def start(self) -> None:
         await self.producer.start()
 
     async def publish(self, topic: str, message: Any) -> None:
-        payload = message.json() if hasattr(message, "json") else json.dumps(message)
-        await self.producer.send_and_wait(topic, payload.encode("utf-8"))
+        await self.producer.send_and_wait(topic, encode(message), key=event_key(message))
+
+    async def publish_many(
+        self, topic: str, messages: Iterable[Any], key: Callable[[Any], Optional[bytes]] = event_key
+    ) -> int:
+        if self._window is None:
+            self._window = asyncio.Semaphore(self.max_in_flight)
+        window = self._window
+        acks: List[asyncio.Future] = []
+        try:
+            for message in messages:
+                await window.acquire()
+                try:
+                    ack = await self.producer.send(topic, encode(message), key=key(message))
+                except BaseException:
+                    window.release()
+                    raise
+                ack.add_done_callback(lambda _: window.release())
+                acks.append(ack)
+        finally:
+            # surface the first delivery error only after every ack has settled
+            results = await asyncio.gather(*acks, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return len(acks)
 
     async def stop(self) -> None:
         await self.producer.stop()
 
 
 class RedisPublisher(Publisher):
-    def __init__(self, address: str):
+    """
+    Pub/sub (fire-and-forget) by default. With `streams=True` messages are
+    appended to a Redis Stream per topic with XADD, trimmed to about
+    `maxlen` entries, so consumers can read durably and resume.
+    `publish_many` sends pipelines of `batch_size` commands, at most
+    `max_in_flight` pipelines at a time. With `shards` > 1 each stream is
+    split into `topic:<shard>` streams by the crc32 of the event_id.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        streams: bool = False,
+        maxlen: Optional[int] = 100_000,
+        batch_size: int = 500,
+        max_in_flight: int = 4,
+        shards: int = 1,
+    ):
         self.address = address
+        self.streams = streams
+        self.shards = shards
+        self.maxlen = maxlen
+        self.batch_size = batch_size
+        self.max_in_flight = max_in_flight
         self.redis = None
 
     async def start(self) -> None:
         self.redis = await aioredis.from_url(self.address)
 
+    def _stream(self, topic: str, message: Any) -> str:
+        return shard_stream(topic, shard_for(event_key(message), self.shards), self.shards)
+
     async def publish(self, topic: str, message: Any) -> None:
+        if self.streams:
+            stream = self._stream(topic, message)
+            await self.redis.xadd(stream, {"data": encode(message)}, maxlen=self.maxlen, approximate=True)
+            return
         payload = message.json() if hasattr(message, "json") else json.dumps(message)
         await self.redis.publish(topic, payload)
 
+    async def _send_batch(self, batch: List[Tuple[str, bytes]], window: asyncio.Semaphore) -> None:
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for name, payload in batch:
+                if self.streams:
+                    pipe.xadd(name, {"data": payload}, maxlen=self.maxlen, approximate=True)
+                else:
+                    pipe.publish(name, payload)
+            await pipe.execute()
+        finally:
+            window.release()
+
+    async def publish_many(self, topic: str, messages: Iterable[Any]) -> int:
+        window = asyncio.Semaphore(self.max_in_flight)
+        tasks: List[asyncio.Task] = []
+        batch: List[Tuple[str, bytes]] = []
+        count = 0
+        for message in messages:
+            batch.append((self._stream(topic, message) if self.streams else topic, encode(message)))
+            count += 1
+            if len(batch) >= self.batch_size:
+                await window.acquire()
+                tasks.append(asyncio.create_task(self._send_batch(batch, window)))
+                batch = []
+        if batch:
+            await window.acquire()
+            tasks.append(asyncio.create_task(self._send_batch(batch, window)))
+        await asyncio.gather(*tasks)
+        return count
+
+    async def stop(self) -> None:
+        await self.redis.close()
+
+
+class Consumer(ABC):
+    """
+    Reads a topic as part of a consumer group. Messages are acknowledged
+    explicitly with `commit` once processed, so a restarted consumer
+    resumes after the last committed message (at-least-once delivery).
+    """
+
+    @abstractmethod
+    async def start(self) -> None:
+        pass
+
+    @abstractmethod
+    async def poll(self, max_records: int = 500, timeout: float = 1.0) -> List[BrokerMessage]:
+        """Up to `max_records` messages, waiting at most `timeout` seconds for the first."""
+
+    @abstractmethod
+    async def commit(self, messages: List[BrokerMessage]) -> None:
+        pass
+
+    @abstractmethod
+    async def lag(self) -> Dict[int, int]:
+        """Messages not yet consumed, per partition (or stream shard) owned by this consumer."""
+
+    @abstractmethod
+    async def stop(self) -> None:
+        pass
+
+
+class KafkaConsumer(Consumer):
+    """Kafka consumer group member; partitions are assigned by the group coordinator."""
+
+    def __init__(self, bootstrap_servers: str, topic: str, group_id: str, **consumer_options: Any):
+        self.topic = topic
+        self.consumer = aiokafka.AIOKafkaConsumer(
+            topic,
+            bootstrap_servers=bootstrap_servers,
+            group_id=group_id,
+            enable_auto_commit=False,
+            auto_offset_reset="earliest",
+            **consumer_options,
+        )
+
+    async def start(self) -> None:
+        await self.consumer.start()
+
+    async def poll(self, max_records: int = 500, timeout: float = 1.0) -> List[BrokerMessage]:
+        batches = await self.consumer.getmany(timeout_ms=int(timeout * 1000), max_records=max_records)
+        return [
+            BrokerMessage(r.topic, r.partition, r.offset, r.key, r.value)
+            for records in batches.values()
+            for r in records
+        ]
+
+    async def commit(self, messages: List[BrokerMessage]) -> None:
+        offsets: Dict[aiokafka.TopicPartition, int] = {}
+        for m in messages:
+            tp = aiokafka.TopicPartition(m.topic, m.partition)
+            offsets[tp] = max(offsets.get(tp, 0), m.offset + 1)
+        if offsets:
+            await self.consumer.commit(offsets)
+
+    async def lag(self) -> Dict[int, int]:
+        lags: Dict[int, int] = {}
+        for tp in self.consumer.assignment():
+            high = self.consumer.highwater(tp)
+            if high is not None:
+                lags[tp.partition] = max(0, high - await self.consumer.position(tp))
+        return lags
+
+    async def stop(self) -> None:
+        await self.consumer.stop()
+
+
+class RedisStreamConsumer(Consumer):
+    """
+    Redis Streams consumer group member (XREADGROUP/XACK) reading the
+    `shards` it owns of a topic published with RedisPublisher(streams=True).
+    Giving each worker a disjoint set of shards keeps every event on one
+    worker.
+
+    After `start`, entries delivered to this consumer name but never
+    acknowledged (e.g. before a crash) are re-read from its pending list
+    before new entries, so a restarted worker with the same name redelivers
+    them.
+    """
+
+    def __init__(
+        self,
+        address: str,
+        topic: str,
+        group: str,
+        name: str,
+        shards: int = 1,
+        owned: Optional[Iterable[int]] = None,
+    ):
+        self.address = address
+        self.group = group
+        self.name = name
+        self.streams = {shard_stream(topic, s, shards): s for s in (owned if owned is not None else range(shards))}
+        self.redis = None
+        # stream -> last pending entry id re-read, while replaying the pending list
+        self._backlog: Dict[str, Any] = {}
+
+    async def start(self) -> None:
+        self.redis = await aioredis.from_url(self.address)
+        for stream in self.streams:
+            try:
+                await self.redis.xgroup_create(stream, self.group, id="0", mkstream=True)
+            except aioredis.exceptions.ResponseError as exc:
+                if "BUSYGROUP" not in str(exc):
+                    raise
+        self._backlog = {stream: "0" for stream in self.streams}
+
+    async def _read_pending(self, max_records: int) -> List[BrokerMessage]:
+        response = await self.redis.xreadgroup(self.group, self.name, dict(self._backlog), count=max_records)
+        messages: List[BrokerMessage] = []
+        replayed = set()
+        for stream, entries in response or []:
+            stream = stream.decode() if isinstance(stream, bytes) else stream
+            trimmed = []
+            for entry_id, fields in entries:
+                replayed.add(stream)
+                self._backlog[stream] = entry_id
+                if not fields:
+                    # trimmed from the stream while pending: nothing left to process
+                    trimmed.append(entry_id)
+                    continue
+                value = fields.get(b"data", fields.get("data"))
+                messages.append(BrokerMessage(stream, self.streams[stream], entry_id, None, value))
+            if trimmed:
+                await self.redis.xack(stream, self.group, *trimmed)
+        for stream in list(self._backlog):
+            if stream not in replayed:
+                del self._backlog[stream]
+        return messages
+
+    async def poll(self, max_records: int = 500, timeout: float = 1.0) -> List[BrokerMessage]:
+        while self._backlog:
+            messages = await self._read_pending(max_records)
+            if messages:
+                return messages
+        response = await self.redis.xreadgroup(
+            self.group, self.name, {s: ">" for s in self.streams}, count=max_records, block=int(timeout * 1000)
+        )
+        messages: List[BrokerMessage] = []
+        for stream, entries in response or []:
+            stream = stream.decode() if isinstance(stream, bytes) else stream
+            for entry_id, fields in entries:
+                value = fields.get(b"data", fields.get("data"))
+                messages.append(BrokerMessage(stream, self.streams[stream], entry_id, None, value))
+        return messages
+
+    async def commit(self, messages: List[BrokerMessage]) -> None:
+        ids: Dict[str, List[Any]] = {}
+        for m in messages:
+            ids.setdefault(m.topic, []).append(m.offset)
+        for stream, entry_ids in ids.items():
+            await self.redis.xack(stream, self.group, *entry_ids)
+
+    async def lag(self) -> Dict[int, int]:
+        lags: Dict[int, int] = {}
+        for stream, shard in self.streams.items():
+            for info in await self.redis.xinfo_groups(stream):
+                name = info.get("name")
+                if (name.decode() if isinstance(name, bytes) else name) == self.group:
+                    # undelivered entries (Redis >= 7) plus delivered but unacknowledged ones
+                    lags[shard] = (info.get("lag") or 0) + info.get("pending", 0)
+        return lags
+
     async def stop(self) -> None:
         await self.redis.close()
+
+
+class MemoryBroker:
+    """
+    In-process stand-in for a partitioned log broker, for tests and
+    benchmarks: keyed messages are appended to `partitions` per-topic logs
+    and consumer groups keep committed offsets, like Kafka.
+    """
+
+    def __init__(self, partitions: int = 4):
+        self.partitions = partitions
+        self.logs: Dict[Tuple[str, int], List[Tuple[Optional[bytes], bytes]]] = {}
+        self.committed: Dict[Tuple[str, str, int], int] = {}
+        self._appended = asyncio.Event()
+
+    def append(self, topic: str, key: Optional[bytes], value: bytes) -> None:
+        self.logs.setdefault((topic, shard_for(key, self.partitions)), []).append((key, value))
+        self._appended.set()
+
+    async def wait(self, timeout: float) -> None:
+        self._appended.clear()
+        try:
+            async with asyncio.timeout(timeout):
+                await self._appended.wait()
+        except TimeoutError:
+            pass
+
+
+class MemoryPublisher(Publisher):
+    def __init__(self, broker: MemoryBroker):
+        self.broker = broker
+
+    async def start(self) -> None:
+        pass
+
+    async def publish(self, topic: str, message: Any) -> None:
+        self.broker.append(topic, event_key(message), encode(message))
+
+    async def stop(self) -> None:
+        pass
+
+
+class MemoryConsumer(Consumer):
+    """Consumer of a MemoryBroker topic owning `partitions` (all by default)."""
+
+    def __init__(self, broker: MemoryBroker, topic: str, group: str, partitions: Optional[Iterable[int]] = None):
+        self.broker = broker
+        self.topic = topic
+        self.group = group
+        self.partitions = list(partitions if partitions is not None else range(broker.partitions))
+        self.positions: Dict[int, int] = {}
+
+    async def start(self) -> None:
+        # resume after the group's last commit
+        self.positions = {p: self.broker.committed.get((self.group, self.topic, p), 0) for p in self.partitions}
+
+    def _take(self, max_records: int) -> List[BrokerMessage]:
+        messages: List[BrokerMessage] = []
+        for p in self.partitions:
+            log = self.broker.logs.get((self.topic, p), [])
+            start = self.positions[p]
+            for offset in range(start, min(len(log), start + max_records - len(messages))):
+                key, value = log[offset]
+                messages.append(BrokerMessage(self.topic, p, offset, key, value))
+            self.positions[p] = start + sum(1 for m in messages if m.partition == p)
+        return messages
+
+    async def poll(self, max_records: int = 500, timeout: float = 1.0) -> List[BrokerMessage]:
+        messages = self._take(max_records)
+        if not messages and timeout > 0:
+            await self.broker.wait(timeout)
+            messages = self._take(max_records)
+        return messages
+
+    async def commit(self, messages: List[BrokerMessage]) -> None:
+        for m in messages:
+            key = (self.group, m.topic, m.partition)
+            self.broker.committed[key] = max(self.broker.committed.get(key, 0), m.offset + 1)
+
+    async def lag(self) -> Dict[int, int]:
+        return {p: len(self.broker.logs.get((self.topic, p), [])) - self.positions[p] for p in self.partitions}
+
+    async def stop(self) -> None:
+        pass
+
+
+def build_publisher(settings: Settings) -> Publisher:
+    """Publisher for `settings.broker`: batched Kafka, or sharded Redis Streams."""
+    if settings.broker == "kafka":
+        return KafkaPublisher(settings.broker_url, **KAFKA_BATCHING)
+    if settings.broker == "redis":
+        return RedisPublisher(settings.broker_url, streams=True, shards=settings.broker_shards)
+    raise ValueError(f"Unknown broker {settings.broker!r}")
+
+
+def build_consumer(settings: Settings) -> Consumer:
+    """Quotes consumer for worker `worker_index` of `worker_count`."""
+    if settings.broker == "kafka":
+        return KafkaConsumer(settings.broker_url, settings.quotes_topic, settings.worker_group)
+    if settings.broker == "redis":
+        owned = [s for s in range(settings.broker_shards) if s % settings.worker_count == settings.worker_index]
+        return RedisStreamConsumer(
+            settings.broker_url,
+            settings.quotes_topic,
+            settings.worker_group,
+            f"worker-{settings.worker_index}",
+            shards=settings.broker_shards,
+            owned=owned,
+        )
+    raise ValueError(f"Unknown broker {settings.broker!r}")
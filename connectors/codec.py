@@ -0,0 +1,35 @@
+"""
+JSON encoding and decoding for venue payloads and broker messages. Uses
+orjson when it is installed (`pip install arbytron[fast]`) and falls back
+to the standard library. Both raise a ValueError subclass on malformed
+input.
+"""
+import json
+from datetime import date, datetime
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+HAS_ORJSON = orjson is not None
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize to UTF-8 JSON bytes; datetimes become ISO 8601 strings."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, default=_default, separators=(",", ":")).encode("utf-8")
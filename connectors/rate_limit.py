@@ -0,0 +1,116 @@
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from metrics import rest_throttle_wait
+
+READ = "read"
+ORDER = "order"
+
+
+class TokenBucket:
+    """
+    Allows `rate` requests per second with bursts up to `capacity`. Waiters
+    are served in FIFO order; `pause` holds all of them back, e.g. for the
+    Retry-After of a 429.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> float:
+        """Take one token, sleeping until one is available; return seconds waited."""
+        started = time.monotonic()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    break
+                else:
+                    await asyncio.sleep((1 - self.tokens) / self.rate)
+        return time.monotonic() - started
+
+    def pause(self, seconds: float) -> None:
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class RetryBudget:
+    """
+    Caps retries at `ratio` of first attempts (plus a reserve of
+    `min_retries`), so a failing venue sees at most ~(1 + ratio)x load
+    instead of max_retries-x.
+    """
+
+    def __init__(self, ratio: float = 0.1, min_retries: int = 10):
+        self.ratio = ratio
+        self.capacity = float(min_retries)
+        self.tokens = float(min_retries)
+
+    def deposit(self) -> None:
+        self.tokens = min(self.capacity, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class VenueLimiter:
+    """Read and order token buckets plus a retry budget, shared by every client of one venue."""
+
+    def __init__(
+        self,
+        venue: str,
+        read_rate: float,
+        order_rate: float,
+        read_burst: Optional[float] = None,
+        order_burst: Optional[float] = None,
+        retry_ratio: float = 0.1,
+        min_retries: int = 10,
+    ):
+        self.venue = venue
+        self.buckets: Dict[str, TokenBucket] = {
+            READ: TokenBucket(read_rate, read_burst),
+            ORDER: TokenBucket(order_rate, order_burst),
+        }
+        self.budget = RetryBudget(retry_ratio, min_retries)
+
+    async def acquire(self, kind: str) -> None:
+        waited = await self.buckets[kind].acquire()
+        rest_throttle_wait.labels(self.venue, kind).observe(waited)
+
+    def pause(self, kind: str, seconds: float) -> None:
+        self.buckets[kind].pause(seconds)
+
+
+def retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
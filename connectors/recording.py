@@ -0,0 +1,118 @@
+"""
+Record raw venue traffic (REST response bodies and WS frames) to
+gzip-compressed, append-only JSON-lines files, and replay it into the
+ingestion and streaming pipelines at recorded speed, N times faster, or as
+fast as possible.
+
+Each flush appends a complete gzip member, so a file stays readable up to
+the last flush even if the recording process dies.
+"""
+import asyncio
+import gzip
+import json
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from connectors.codec import loads
+
+
+class Recorder:
+    """Appends {"t", "source", "kind", "path", "payload"} records to `path`."""
+
+    def __init__(self, path: str, flush_every: int = 100):
+        self.path = path
+        self.flush_every = flush_every
+        self._pending: List[bytes] = []
+
+    def record(self, source: str, kind: str, payload: Any, path: Optional[str] = None) -> None:
+        """Record one raw payload; `kind` is "rest" or "ws"."""
+        if isinstance(payload, (bytes, bytearray)):
+            payload = payload.decode("utf-8")
+        line = json.dumps({"t": time.time(), "source": source, "kind": kind, "path": path, "payload": payload})
+        self._pending.append(line.encode("utf-8") + b"\n")
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        with open(self.path, "ab") as f:
+            f.write(gzip.compress(b"".join(self._pending)))
+        self._pending = []
+
+    def close(self) -> None:
+        self.flush()
+
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+class Replayer:
+    """
+    Replays a recording on one shared timeline: record i is released
+    (t_i - t_0) / speed seconds after the first `records` call. With
+    `speed=None` records are released as fast as they can be consumed.
+    """
+
+    def __init__(self, path: str, speed: Optional[float] = 1.0):
+        self.path = path
+        self.speed = speed
+        first = next(read_records(path), None)
+        self._t0 = first["t"] if first is not None else 0.0
+        self._start: Optional[float] = None
+
+    async def records(self, source: Optional[str] = None, kind: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        if self._start is None:
+            self._start = loop.time()
+        for record in read_records(self.path):
+            if (source is not None and record["source"] != source) or (kind is not None and record["kind"] != kind):
+                continue
+            if self.speed:
+                delay = self._start + (record["t"] - self._t0) / self.speed - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            else:
+                # stay cooperative at max speed
+                await asyncio.sleep(0)
+            yield record
+
+
+class ReplayConnector:
+    """
+    Stands in for a REST connector in IngestionScheduler: the recorded
+    pages of `connector.platform` are yielded on their timeline (all within
+    the first poll) and normalized by the real connector.
+    """
+
+    def __init__(self, connector: Any, replayer: Replayer):
+        self.connector = connector
+        self.platform = connector.platform
+        self._records = replayer.records(self.platform, "rest")
+
+    async def fetch_pages(self, updated_since: Any = None) -> AsyncIterator[Any]:
+        async for record in self._records:
+            yield loads(record["payload"])
+
+    def normalize(self, data: Any) -> list:
+        return self.connector.normalize(data)
+
+
+class ReplayWSClient:
+    """Stands in for a WS client: `listen` yields the recorded frames of `source`."""
+
+    def __init__(self, replayer: Replayer, source: str, decode: bool = False):
+        self.replayer = replayer
+        self.source = source
+        # KalshiWSClient yields decoded messages, PolymarketWSClient raw text
+        self.decode = decode
+
+    async def listen(self) -> AsyncIterator[Any]:
+        async for record in self.replayer.records(self.source, "ws"):
+            yield loads(record["payload"]) if self.decode else record["payload"]
+
+    async def close(self) -> None:
+        pass
@@ -1,58 +1,281 @@
+import asyncio
+import random
 import httpx
-from tenacity import retry, stop_after_attempt, wait_exponential
+import structlog
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 
+from connectors.codec import loads
+from connectors.recording import Recorder
+from connectors.rate_limit import ORDER, READ, VenueLimiter, retry_after
+from connectors.transport import ORDER_TRANSPORT, RequestTimer, TransportConfig, build_client
+from metrics import rest_retries, rest_retry_budget_exhausted
 from models import MarketQuote, PriceLevel
 
+logger = structlog.get_logger(__name__)
+
+# transient statuses worth retrying; only 429 guarantees a request was not acted on
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def _is_price(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _trusted(fields: Dict[str, Any], outcomes: Dict[str, Dict[str, Any]]) -> bool:
+    """Cheap schema check that makes skipping pydantic validation safe."""
+    return (
+        isinstance(fields["event_id"], str)
+        and isinstance(fields["market_id"], str)
+        and all(_is_price(level.get("bid")) and _is_price(level.get("ask")) for level in outcomes.values())
+    )
+
 
 class RestConnectorBase:
+    platform: str = ""
+    markets_path: str = ""
+    # query parameter used to restrict a markets request to specific market ids
+    market_ids_param: str = "market_ids"
+    # default requests per second when no shared VenueLimiter is passed in
+    read_rate: float = 10.0
+    order_rate: float = 5.0
+    # query parameters that change every incremental poll; left out of ETag cache keys
+    volatile_params: Tuple[str, ...] = ("min_updated_ts", "updated_since")
+    # most (path, params) entries whose ETag/Last-Modified are kept, least recently used evicted
+    max_validators: int = 1024
+
     def __init__(
         self,
         base_url: str,
         api_key: str = None,
         timeout: float = 10.0,
         max_retries: int = 3,
+        fast_decode: bool = False,
+        page_size: int = 500,
+        page_concurrency: int = 4,
+        limiter: Optional[VenueLimiter] = None,
+        retry_base_delay: float = 0.5,
+        retry_max_delay: float = 5.0,
+        transport: Optional[TransportConfig] = None,
+        order_transport: Optional[TransportConfig] = None,
+        recorder: Optional[Recorder] = None,
     ):
         headers: Dict[str, str] = {}
         if api_key:
             headers["Authorization"] = f"Bearer {api_key}"
-        self.client = httpx.AsyncClient(
-            base_url=base_url,
-            headers=headers,
-            timeout=httpx.Timeout(timeout),
-        )
+        self.client = build_client(base_url, headers, transport or TransportConfig(timeout=timeout))
+        # orders get their own pool so they never queue behind market-data polls
+        self.order_client = build_client(base_url, headers, order_transport or ORDER_TRANSPORT)
         self._max_retries = max_retries
+        # share one limiter between all clients of a venue
+        self.limiter = limiter if limiter is not None else VenueLimiter(self.platform, self.read_rate, self.order_rate)
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        # decode with connectors.codec and build models without validation
+        self.fast_decode = fast_decode
+        self.page_size = page_size
+        self.page_concurrency = page_concurrency
+        # captures raw response bodies for connectors.recording.Replayer
+        self.recorder = recorder
+        # (path, params) -> (ETag, Last-Modified, continuation) of the last 200 response
+        self._validators: "OrderedDict[Tuple[str, Tuple], Tuple[Optional[str], Optional[str], Any]]" = OrderedDict()
+
+    def _backoff(self, attempt: int) -> float:
+        return min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+    def _may_retry(self, attempt: int, reason: str) -> bool:
+        if attempt >= self._max_retries:
+            return False
+        if not self.limiter.budget.withdraw():
+            rest_retry_budget_exhausted.labels(self.platform).inc()
+            return False
+        rest_retries.labels(self.platform, reason).inc()
+        return True
+
+    async def _request(self, method: str, path: str, kind: str = READ, idempotent: bool = True, **kwargs) -> httpx.Response:
+        """
+        Send a request through the venue's rate limiter, retrying transient
+        failures up to `max_retries` times within the retry budget. A 429's
+        Retry-After pauses the whole bucket. Non-idempotent requests (order
+        placement) are only retried when the venue cannot have acted on
+        them: a 429 or a failure to connect.
+        """
+        self.limiter.budget.deposit()
+        client, pool = (self.order_client, "order") if kind == ORDER else (self.client, "read")
+        attempt = 0
+        while True:
+            await self.limiter.acquire(kind)
+            try:
+                response = await client.request(
+                    method, path, extensions={"trace": RequestTimer(self.platform, pool)}, **kwargs
+                )
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                if not self._may_retry(attempt, "connect"):
+                    raise
+                delay = self._backoff(attempt)
+            except httpx.TransportError:
+                if not idempotent or not self._may_retry(attempt, "transport"):
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                status = response.status_code
+                if status not in RETRY_STATUSES or (not idempotent and status != 429):
+                    return response
+                wait = retry_after(response.headers.get("Retry-After"))
+                if status == 429 and wait is not None:
+                    self.limiter.pause(kind, wait)
+                if not self._may_retry(attempt, str(status)):
+                    return response
+                delay = wait if wait is not None else self._backoff(attempt)
+            logger.warning("rest_retry", venue=self.platform, path=path, attempt=attempt + 1, delay=delay)
+            attempt += 1
+            await asyncio.sleep(delay)
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(min=1, max=5))
     async def _get_json(self, path: str, params: Dict[str, Any] = None) -> Any:
-        response = await self.client.get(path, params=params)
+        response = await self._request("GET", path, params=params)
         response.raise_for_status()
+        return self._decode(response)
+
+    def _decode(self, response: httpx.Response) -> Any:
+        if self.recorder is not None:
+            self.recorder.record(self.platform, "rest", response.content, response.url.path)
+        if self.fast_decode:
+            return loads(response.content)
         return response.json()
 
+    async def _get_page(
+        self, path: str, params: Dict[str, Any], continuation: Callable[[Any], Any]
+    ) -> Tuple[Optional[Any], Any]:
+        """
+        Conditional GET of one page. Returns (page, continuation), where page
+        is None if the server answered 304 Not Modified; the continuation
+        (next cursor, has-more flag) is remembered so a 304 can still advance.
+        """
+        key = (path, tuple(sorted((k, v) for k, v in params.items() if k not in self.volatile_params)))
+        headers: Dict[str, str] = {}
+        cached = self._validators.get(key)
+        if cached is not None:
+            self._validators.move_to_end(key)
+            etag, modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if modified:
+                headers["If-Modified-Since"] = modified
+        response = await self._request("GET", path, params=params, headers=headers)
+        if response.status_code == 304 and cached is not None:
+            return None, cached[2]
+        response.raise_for_status()
+        page = self._decode(response)
+        after = continuation(page)
+        etag, modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        if etag or modified:
+            self._validators[key] = (etag, modified, after)
+            self._validators.move_to_end(key)
+            if len(self._validators) > self.max_validators:
+                self._validators.popitem(last=False)
+        return page, after
+
+    def fetch_pages(self, updated_since: Optional[datetime] = None) -> AsyncIterator[Any]:
+        """
+        Yield raw markets pages as they arrive, skipping pages the server
+        reports unchanged. With `updated_since` only markets updated after
+        that time are requested.
+        """
+        raise NotImplementedError
+
+    def normalize(self, data: Any) -> List[MarketQuote]:
+        """Convert a raw markets payload into MarketQuote objects."""
+        raise NotImplementedError
+
+    def _build_quote(self, fields: Dict[str, Any], outcomes: Dict[str, Dict[str, Any]]) -> MarketQuote:
+        """
+        Build a MarketQuote from parsed market fields and {outcome: {bid, ask}}.
+        On the fast-decode path, payloads passing `_trusted` skip validation.
+        """
+        if self.fast_decode and _trusted(fields, outcomes):
+            levels = {
+                name: PriceLevel.construct(bid=float(level["bid"]), ask=float(level["ask"]))
+                for name, level in outcomes.items()
+            }
+            return MarketQuote.construct(outcomes=levels, **fields)
+        return MarketQuote(outcomes={name: PriceLevel(**level) for name, level in outcomes.items()}, **fields)
+
+    async def fetch_quotes(self, updated_since: Optional[datetime] = None) -> List[MarketQuote]:
+        quotes: List[MarketQuote] = []
+        async for page in self.fetch_pages(updated_since):
+            quotes.extend(self.normalize(page))
+        return quotes
+
+    async def fetch_markets(self, market_ids: List[str]) -> List[MarketQuote]:
+        """Fetch a snapshot of only the given markets, e.g. to resync after a WS gap."""
+        data = await self._get_json(self.markets_path, params={self.market_ids_param: ",".join(market_ids)})
+        return self.normalize(data)
+
+    async def warm_up(self, order_connections: int = 1) -> None:
+        """
+        Open connections ahead of time (TCP + TLS, HTTP/2 negotiation) so the
+        first poll and the first order skip the handshake. Any HTTP response
+        counts as warm; failures are logged, not raised.
+        """
+        async def touch(client: httpx.AsyncClient, kind: str, pool: str) -> None:
+            await self.limiter.acquire(kind)
+            try:
+                await client.request("HEAD", self.markets_path, extensions={"trace": RequestTimer(self.platform, pool)})
+            except httpx.HTTPError:
+                logger.warning("rest_warm_up_failed", venue=self.platform, pool=pool, exc_info=True)
+
+        await asyncio.gather(
+            touch(self.client, READ, "read"),
+            *(touch(self.order_client, ORDER, "order") for _ in range(order_connections)),
+        )
+
     async def close(self) -> None:
         await self.client.aclose()
+        await self.order_client.aclose()
 
 
 class KalshiRestClient(RestConnectorBase):
     """REST client for Kalshi order-book markets."""
 
-    async def fetch_quotes(self) -> List[MarketQuote]:
-        data = await self._get_json("/v1/markets")
+    platform = "kalshi"
+    markets_path = "/v1/markets"
+    market_ids_param = "tickers"
+    read_rate = 20.0
+    order_rate = 10.0
+
+    async def fetch_pages(self, updated_since: Optional[datetime] = None) -> AsyncIterator[Any]:
+        # cursor pagination is inherently sequential
+        cursor = None
+        while True:
+            params: Dict[str, Any] = {"limit": self.page_size}
+            if cursor:
+                params["cursor"] = cursor
+            if updated_since is not None:
+                params["min_updated_ts"] = int(updated_since.timestamp())
+            page, cursor = await self._get_page(self.markets_path, params, lambda p: p.get("cursor"))
+            if page is not None:
+                yield page
+            if not cursor:
+                return
+
+    def normalize(self, data: Any) -> List[MarketQuote]:
         quotes: List[MarketQuote] = []
         for m in data.get("markets", []):
             outcomes_data = m.get("outcomes", {})  # expects {'Yes': {'bid': x, 'ask': y}, ...}
-            outcomes = {k: PriceLevel(**v) for k, v in outcomes_data.items()}
             ts = m.get("timestamp") or m.get("updated_at")
             timestamp = datetime.fromisoformat(ts)
-            quote = MarketQuote(
+            close_time = m.get("close_time")
+            fields = dict(
                 platform="kalshi",
                 event_id=m.get("event_id", ""),
                 market_id=m.get("market_id", ""),
-                outcomes=outcomes,
                 timestamp=timestamp,
+                title=m.get("title"),
+                category=m.get("category"),
+                close_time=datetime.fromisoformat(close_time) if close_time else None,
             )
-            quotes.append(quote)
+            quotes.append(self._build_quote(fields, outcomes_data))
         return quotes
 
     async def place_order(self, market_id: str, outcome: str, side: str, price: float, size: float) -> Dict[str, Any]:
@@ -64,13 +287,13 @@ class KalshiRestClient(RestConnectorBase):
             "price": price,
             "size": size,
         }
-        response = await self.client.post("/v1/orders", json=payload)
+        response = await self._request("POST", "/v1/orders", kind=ORDER, idempotent=False, json=payload)
         response.raise_for_status()
         return response.json()
 
     async def cancel_order(self, order_id: str) -> Dict[str, Any]:
         """Cancel an existing order by ID."""
-        response = await self.client.delete(f"/v1/orders/{order_id}")
+        response = await self._request("DELETE", f"/v1/orders/{order_id}", kind=ORDER)
         response.raise_for_status()
         return response.json()
 
@@ -78,8 +301,41 @@ class KalshiRestClient(RestConnectorBase):
 class PolymarketRestClient(RestConnectorBase):
     """REST client for Polymarket AMM markets."""
 
-    async def fetch_quotes(self) -> List[MarketQuote]:
-        data = await self._get_json("/api/v2/markets")
+    platform = "polymarket"
+    markets_path = "/api/v2/markets"
+    read_rate = 50.0
+
+    def _offset_page(self, offset: int, updated_since: Optional[datetime]):
+        params: Dict[str, Any] = {"limit": self.page_size, "offset": offset}
+        if updated_since is not None:
+            params["updated_since"] = updated_since.isoformat()
+        return self._get_page(self.markets_path, params, lambda p: len(p.get("markets", [])) >= self.page_size)
+
+    async def fetch_pages(self, updated_since: Optional[datetime] = None) -> AsyncIterator[Any]:
+        # the first page alone tells whether more pages exist; after that,
+        # offset pages are fetched `page_concurrency` at a time
+        page, more = await self._offset_page(0, updated_since)
+        if page is not None:
+            yield page
+        offset = self.page_size
+        while more:
+            tasks = [
+                asyncio.ensure_future(self._offset_page(offset + i * self.page_size, updated_since))
+                for i in range(self.page_concurrency)
+            ]
+            offset += self.page_concurrency * self.page_size
+            try:
+                for next_page in asyncio.as_completed(tasks):
+                    page, _ = await next_page
+                    if page is not None:
+                        yield page
+            finally:
+                for task in tasks:
+                    task.cancel()
+            # the window's last page decides whether the listing continues
+            more = tasks[-1].result()[1]
+
+    def normalize(self, data: Any) -> List[MarketQuote]:
         quotes: List[MarketQuote] = []
         for m in data.get("markets", []):
             # map outcome list to {'OutcomeName': {'bid': x, 'ask': y}}
@@ -87,15 +343,36 @@ class PolymarketRestClient(RestConnectorBase):
             outcomes_dict: Dict[str, Dict[str, float]] = {
                 o.get("outcome"): {"bid": o.get("bid_price"), "ask": o.get("ask_price")} for o in raw_outcomes
             }
-            outcomes = {k: PriceLevel(**v) for k, v in outcomes_dict.items()}
             ts = m.get("updated_at") or m.get("timestamp")
             timestamp = datetime.fromisoformat(ts)
-            quote = MarketQuote(
+            end_date = m.get("end_date") or m.get("close_time")
+            fields = dict(
                 platform="polymarket",
                 event_id=m.get("event_id", ""),
                 market_id=m.get("market_id", ""),
-                outcomes=outcomes,
                 timestamp=timestamp,
+                title=m.get("question") or m.get("title"),
+                category=m.get("category"),
+                close_time=datetime.fromisoformat(end_date) if end_date else None,
             )
-            quotes.append(quote)
+            quotes.append(self._build_quote(fields, outcomes_dict))
         return quotes
+
+    async def place_order(self, market_id: str, outcome: str, side: str, price: float, size: float) -> Dict[str, Any]:
+        """Place an AMM swap; `price` bounds the average price per share."""
+        payload = {
+            "market_id": market_id,
+            "outcome": outcome,
+            "side": side,
+            "price": price,
+            "size": size,
+        }
+        response = await self._request("POST", "/api/v2/orders", kind=ORDER, idempotent=False, json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    async def cancel_order(self, order_id: str) -> Dict[str, Any]:
+        """Cancel an order by ID; the response reports what was filled."""
+        response = await self._request("DELETE", f"/api/v2/orders/{order_id}", kind=ORDER)
+        response.raise_for_status()
+        return response.json()
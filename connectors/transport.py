@@ -0,0 +1,88 @@
+"""
+HTTP transport settings for the REST connectors: HTTP/2 (optional `h2`
+package, `pip install arbytron[http2]`), keep-alive pool limits, and
+connect/TLS/first-byte timings via httpx's `trace` request extension.
+"""
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import httpx
+import structlog
+
+from metrics import rest_connect_seconds, rest_tls_seconds, rest_ttfb_seconds
+
+try:
+    import h2  # noqa: F401
+except ImportError:  # pragma: no cover - depends on the environment
+    HAS_HTTP2 = False
+else:
+    HAS_HTTP2 = True
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass
+class TransportConfig:
+    http2: bool = False
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 5.0
+    timeout: float = 10.0
+
+
+# order calls are few and latency-critical: a small pool kept alive longer
+ORDER_TRANSPORT = TransportConfig(max_connections=4, max_keepalive_connections=4, keepalive_expiry=120.0)
+
+
+def build_client(base_url: str, headers: Dict[str, str], config: TransportConfig) -> httpx.AsyncClient:
+    http2 = config.http2
+    if http2 and not HAS_HTTP2:
+        logger.warning("http2_unavailable", base_url=base_url)
+        http2 = False
+    return httpx.AsyncClient(
+        base_url=base_url,
+        headers=headers,
+        http2=http2,
+        timeout=httpx.Timeout(config.timeout, connect=config.connect_timeout),
+        limits=httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry,
+        ),
+    )
+
+
+class RequestTimer:
+    """
+    httpx `trace` callback for one request. Observes TCP connect and TLS
+    handshake time (only when a new connection is opened) and time to the
+    response headers, per venue and pool.
+    """
+
+    def __init__(self, venue: str, pool: str):
+        self.venue = venue
+        self.pool = pool
+        self._started: Dict[str, float] = {}
+
+    async def __call__(self, event_name: str, info: Dict[str, Any]) -> None:
+        now = time.perf_counter()
+        # e.g. "connection.start_tls.complete", "http2.receive_response_headers.complete"
+        step, _, phase = event_name.rpartition(".")
+        step = step.rpartition(".")[2]
+        if phase == "started":
+            self._started[step] = now
+            return
+        if phase != "complete":
+            return
+        if step == "connect_tcp":
+            self._observe(rest_connect_seconds, self._started.get(step), now)
+        elif step == "start_tls":
+            self._observe(rest_tls_seconds, self._started.get(step), now)
+        elif step == "receive_response_headers":
+            self._observe(rest_ttfb_seconds, self._started.get("send_request_headers"), now)
+
+    def _observe(self, histogram, started: Optional[float], now: float) -> None:
+        if started is not None:
+            histogram.labels(self.venue, self.pool).observe(now - started)
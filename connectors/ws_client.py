@@ -1,16 +1,29 @@
+import asyncio
 import json
-from typing import AsyncIterator, Dict, Any
+import random
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+import structlog
 import websockets
 
+from connectors.codec import loads
+from connectors.recording import Recorder
+from metrics import ws_parse_errors, ws_reconnect_seconds, ws_reconnects, ws_sequence_gaps, ws_stale_markets
+
+logger = structlog.get_logger(__name__)
+
 
 class KalshiWSClient:
     """WebSocket client for Kalshi Market Data Feed."""
 
-    def __init__(self, api_key: str, url: str = "wss://api.elections.kalshi.com/trade-api/ws/v2"):
+    def __init__(self, api_key: str, url: str = "wss://api.elections.kalshi.com/trade-api/ws/v2", recorder: Optional[Recorder] = None):
         self.url = url
         self.api_key = api_key
+        self.recorder = recorder
         self.conn = None
         self._cmd_id = 0
+        # active subscriptions, replayed after a reconnect
+        self.subscriptions: Dict[Tuple[str, Optional[str]], None] = {}
 
     async def connect(self) -> None:
         headers = {"Authorization": f"Bearer {self.api_key}"}
@@ -23,6 +36,7 @@ class KalshiWSClient:
             params["market_id"] = market_id
         cmd = {"id": self._cmd_id, "cmd": "subscribe", "params": params}
         await self.conn.send(json.dumps(cmd))
+        self.subscriptions[(channel, market_id)] = None
 
     async def unsubscribe(self, channel: str, market_id: str = None) -> None:
         self._cmd_id += 1
@@ -31,10 +45,25 @@ class KalshiWSClient:
             params["market_id"] = market_id
         cmd = {"id": self._cmd_id, "cmd": "unsubscribe", "params": params}
         await self.conn.send(json.dumps(cmd))
+        self.subscriptions.pop((channel, market_id), None)
+
+    async def resubscribe(self) -> None:
+        """Replay every active subscription on a fresh connection."""
+        for channel, market_id in list(self.subscriptions):
+            await self.subscribe(channel, market_id)
 
     async def listen(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield decoded frames; a frame that is not valid JSON is counted and skipped."""
         async for message in self.conn:
-            yield json.loads(message)
+            if self.recorder is not None:
+                self.recorder.record("kalshi", "ws", message)
+            try:
+                decoded = loads(message)
+            except ValueError:
+                ws_parse_errors.labels("kalshi").inc()
+                logger.warning("ws_frame_undecodable", venue="kalshi", size=len(message))
+                continue
+            yield decoded
 
     async def close(self) -> None:
         if self.conn:
@@ -44,10 +73,13 @@ class KalshiWSClient:
 class PolymarketWSClient:
     """WebSocket client for Polymarket CLOB API."""
 
-    def __init__(self, api_key: str, url: str = "wss://ws-subscriptions-clob.polymarket.com/ws/"):
+    def __init__(self, api_key: str, url: str = "wss://ws-subscriptions-clob.polymarket.com/ws/", recorder: Optional[Recorder] = None):
         self.url = url
         self.api_key = api_key
+        self.recorder = recorder
         self.conn = None
+        # active subscriptions, replayed after a reconnect
+        self.subscriptions: Dict[str, None] = {}
 
     async def connect(self) -> None:
         headers = {"Authorization": f"Bearer {self.api_key}"}
@@ -55,14 +87,172 @@ class PolymarketWSClient:
 
     async def subscribe(self, channel: str) -> None:
         await self.conn.send(f"SUBSCRIBE {channel}")
+        self.subscriptions[channel] = None
 
     async def unsubscribe(self, channel: str) -> None:
         await self.conn.send(f"UNSUBSCRIBE {channel}")
+        self.subscriptions.pop(channel, None)
+
+    async def resubscribe(self) -> None:
+        """Replay every active subscription on a fresh connection."""
+        for channel in list(self.subscriptions):
+            await self.subscribe(channel)
 
     async def listen(self) -> AsyncIterator[str]:
         async for message in self.conn:
+            if self.recorder is not None:
+                self.recorder.record("polymarket", "ws", message)
             yield message
 
     async def close(self) -> None:
         if self.conn:
             await self.conn.close()
+
+
+class KalshiSequenceTracker:
+    """
+    Tracks Kalshi per-subscription (`sid`) sequence numbers and the markets
+    seen on each subscription, to tell which markets a gap affects.
+    """
+
+    def __init__(self):
+        self.last_seq: Dict[int, int] = {}
+        self.markets: Dict[int, Set[str]] = {}
+
+    def observe(self, message: Dict[str, Any]) -> Set[str]:
+        """Return the markets to resync if `message` reveals a gap."""
+        sid, seq = message.get("sid"), message.get("seq")
+        if sid is None:
+            return set()
+        markets = self.markets.setdefault(sid, set())
+        ticker = (message.get("msg") or {}).get("market_ticker")
+        if ticker:
+            markets.add(ticker)
+        if seq is None:
+            return set()
+        last = self.last_seq.get(sid)
+        self.last_seq[sid] = seq
+        if last is not None and seq != last + 1:
+            return set(markets)
+        return set()
+
+    def reset(self) -> Set[str]:
+        """Forget sequence state after a reconnect; every known market is now stale."""
+        stale = {m for markets in self.markets.values() for m in markets}
+        self.last_seq.clear()
+        self.markets.clear()
+        return stale
+
+
+class PolymarketResyncTracker:
+    """Polymarket frames carry no sequence numbers, so only reconnects trigger a resync."""
+
+    def __init__(self, markets: Iterable[str]):
+        self.known = set(markets)
+
+    def observe(self, message: Any) -> Set[str]:
+        return set()
+
+    def reset(self) -> Set[str]:
+        return set(self.known)
+
+
+class SupervisedConnection:
+    """
+    Keeps a WS client connected. A connection that ends, errors, or stays
+    silent for `heartbeat_timeout` seconds is re-established with jittered
+    exponential backoff and its subscriptions are replayed. Markets affected
+    by a sequence gap or a reconnect are handed to `recover` (e.g. a targeted
+    REST snapshot, or a KalshiBookRecovery that also re-requests the L2
+    snapshots). Exposes `listen()` so it can stand in for the client.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        venue: str,
+        tracker: Any = None,
+        recover: Optional[Callable[[Set[str]], Awaitable[None]]] = None,
+        heartbeat_timeout: float = 30.0,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        max_attempts: Optional[int] = None,
+    ):
+        self.client = client
+        self.venue = venue
+        self.tracker = tracker
+        self.recover = recover
+        self.heartbeat_timeout = heartbeat_timeout
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        self._closed = False
+        self._recoveries: Set[asyncio.Task] = set()
+
+    def _backoff(self, attempt: int) -> float:
+        return min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+    async def _reconnect(self) -> None:
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                await self.client.close()
+            except Exception:
+                pass
+            try:
+                await self.client.connect()
+                await self.client.resubscribe()
+                break
+            except Exception:
+                attempt += 1
+                if self.max_attempts is not None and attempt >= self.max_attempts:
+                    raise
+                logger.warning("ws_reconnect_failed", venue=self.venue, attempt=attempt)
+                await asyncio.sleep(self._backoff(attempt))
+        ws_reconnects.labels(self.venue).inc()
+        ws_reconnect_seconds.labels(self.venue).observe(time.monotonic() - started)
+        if self.tracker is not None:
+            self._resync(self.tracker.reset())
+
+    def _resync(self, markets: Set[str]) -> None:
+        if not markets or self.recover is None:
+            return
+        ws_stale_markets.labels(self.venue).inc(len(markets))
+        task = asyncio.create_task(self._run_recovery(markets))
+        self._recoveries.add(task)
+        task.add_done_callback(self._recoveries.discard)
+
+    async def _run_recovery(self, markets: Set[str]) -> None:
+        try:
+            await self.recover(markets)
+        except Exception:
+            logger.exception("ws_resync_failed", venue=self.venue, markets=len(markets))
+        finally:
+            ws_stale_markets.labels(self.venue).dec(len(markets))
+
+    async def listen(self) -> AsyncIterator[Any]:
+        while not self._closed:
+            try:
+                messages = self.client.listen().__aiter__()
+                while True:
+                    async with asyncio.timeout(self.heartbeat_timeout):
+                        message = await messages.__anext__()
+                    if self.tracker is not None:
+                        gap = self.tracker.observe(message)
+                        if gap:
+                            ws_sequence_gaps.labels(self.venue).inc()
+                            self._resync(gap)
+                    yield message
+            except StopAsyncIteration:
+                logger.warning("ws_connection_closed", venue=self.venue)
+            except (TimeoutError, OSError, websockets.exceptions.WebSocketException):
+                logger.warning("ws_connection_lost", venue=self.venue, exc_info=True)
+            if not self._closed:
+                await self._reconnect()
+
+    async def close(self) -> None:
+        self._closed = True
+        for task in list(self._recoveries):
+            task.cancel()
+        await self.client.close()
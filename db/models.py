@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, JSON, DateTime
+from sqlalchemy import Column, Integer, String, JSON, DateTime, Float, PrimaryKeyConstraint
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -11,3 +11,19 @@ class Quote(Base):
     market_id = Column(String, index=True)
     outcomes = Column(JSON)
     timestamp = Column(DateTime)
+
+class QuoteTick(Base):
+    """One row per (market, outcome, timestamp), range-partitioned by day on timestamp."""
+    __tablename__ = "quote_ticks"
+    # the primary key doubles as the (platform, market_id, timestamp) range-scan index
+    __table_args__ = (
+        PrimaryKeyConstraint("platform", "market_id", "timestamp", "outcome"),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
+    platform = Column(String, nullable=False)
+    market_id = Column(String, nullable=False)
+    timestamp = Column(DateTime, nullable=False)
+    outcome = Column(String, nullable=False)
+    event_id = Column(String, nullable=False)
+    bid = Column(Float)
+    ask = Column(Float)
@@ -0,0 +1,183 @@
+import asyncio
+import sys
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Set
+
+import structlog
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from db.models import QuoteTick
+
+logger = structlog.get_logger(__name__)
+
+PARENT = QuoteTick.__tablename__
+# catches rows for days without a partition, so inserts never fail
+DEFAULT_PARTITION = f"{PARENT}_default"
+
+LIST_PARTITIONS_SQL = text(
+    """
+    SELECT c.relname
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    JOIN pg_class p ON p.oid = i.inhparent
+    WHERE p.relname = :parent
+    """
+)
+
+# Explode the JSON outcomes of the legacy quotes table into one tick row per outcome.
+MIGRATE_SQL = text(
+    f"""
+    INSERT INTO {PARENT} (platform, market_id, timestamp, outcome, event_id, bid, ask)
+    SELECT q.platform, q.market_id, q.timestamp, o.key, q.event_id,
+           (o.value->>'bid')::double precision, (o.value->>'ask')::double precision
+    FROM quotes q CROSS JOIN LATERAL json_each(q.outcomes) AS o
+    WHERE q.id > :after AND q.id <= :upto AND q.timestamp IS NOT NULL
+    ON CONFLICT DO NOTHING
+    """
+)
+
+
+def partition_name(day: date) -> str:
+    return f"{PARENT}_{day:%Y%m%d}"
+
+
+def partition_day(name: str) -> Optional[date]:
+    """Parse the day back out of a partition name, or None if it isn't one of ours."""
+    prefix = f"{PARENT}_"
+    if not name.startswith(prefix):
+        return None
+    try:
+        return datetime.strptime(name[len(prefix):], "%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+def create_partition_sql(day: date) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(day)} PARTITION OF {PARENT} "
+        f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+    )
+
+
+def create_default_partition_sql() -> str:
+    return f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT} DEFAULT"
+
+
+async def list_partitions(conn: AsyncConnection) -> List[str]:
+    result = await conn.execute(LIST_PARTITIONS_SQL, {"parent": PARENT})
+    return [name for (name,) in result.fetchall()]
+
+
+async def adopt_default_rows(conn: AsyncConnection, day: date) -> int:
+    """
+    Create the partition for `day` from the rows the default partition
+    caught for it. Postgres refuses to create a partition whose range has
+    rows in the default partition, so the rows are moved into a standalone
+    table, which is then attached.
+    """
+    name = partition_name(day)
+    bounds = {"lo": day, "hi": day + timedelta(days=1)}
+    await conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    moved = await conn.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE timestamp >= :lo AND timestamp < :hi RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ),
+        bounds,
+    )
+    await conn.execute(
+        text(
+            f"ALTER TABLE {PARENT} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{day.isoformat()}') TO ('{(day + timedelta(days=1)).isoformat()}')"
+        )
+    )
+    return moved.rowcount
+
+
+async def ensure_partitions(conn: AsyncConnection, start: date, days: int) -> List[str]:
+    """Create daily partitions for [start, start + days)."""
+    created: List[str] = []
+    for i in range(days):
+        day = start + timedelta(days=i)
+        await conn.execute(text(create_partition_sql(day)))
+        created.append(partition_name(day))
+    return created
+
+
+async def drop_partitions_before(conn: AsyncConnection, cutoff: date) -> List[str]:
+    """Retention: drop every daily partition whose whole day is before `cutoff`."""
+    dropped: List[str] = []
+    for name in await list_partitions(conn):
+        day = partition_day(name)
+        if day is not None and day < cutoff:
+            await conn.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            dropped.append(name)
+    return sorted(dropped)
+
+
+async def migrate_quotes(conn: AsyncConnection, batch_size: int = 50000) -> int:
+    """
+    Copy the legacy `quotes` table into `quote_ticks` in id-ordered batches.
+    Safe to re-run: rows already present are skipped.
+    """
+    bounds = (
+        await conn.execute(text("SELECT min(id), max(id), min(timestamp), max(timestamp) FROM quotes"))
+    ).one()
+    min_id, max_id, min_ts, max_ts = bounds
+    if min_id is None:
+        return 0
+    await ensure_partitions(conn, min_ts.date(), (max_ts.date() - min_ts.date()).days + 1)
+    inserted = 0
+    after = min_id - 1
+    while after < max_id:
+        upto = after + batch_size
+        result = await conn.execute(MIGRATE_SQL, {"after": after, "upto": upto})
+        inserted += result.rowcount
+        after = upto
+    return inserted
+
+
+async def maintain(conn: AsyncConnection, retention_days: int, days_ahead: int = 2) -> None:
+    """
+    Ensure the default partition exists, move any rows it caught into their
+    day partitions, create upcoming partitions and drop those older than
+    the retention window.
+    """
+    today = datetime.utcnow().date()
+    await conn.execute(text(create_default_partition_sql()))
+    existing: Set[Optional[date]] = {partition_day(name) for name in await list_partitions(conn)}
+    caught = await conn.execute(text(f"SELECT DISTINCT CAST(timestamp AS date) FROM {DEFAULT_PARTITION}"))
+    for (day,) in caught.fetchall():
+        if day not in existing:
+            logger.warning("partition_adopted", day=day.isoformat(), rows=await adopt_default_rows(conn, day))
+    await ensure_partitions(conn, today, days_ahead + 1)
+    await drop_partitions_before(conn, today - timedelta(days=retention_days))
+
+
+async def maintain_forever(engine, retention_days: int, interval: float = 3600.0, days_ahead: int = 2) -> None:
+    """Run `maintain` every `interval` seconds, each time in its own transaction."""
+    while True:
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(QuoteTick.__table__.create, checkfirst=True)
+                await maintain(conn, retention_days, days_ahead)
+        except Exception:
+            logger.exception("partition_maintenance_failed")
+        await asyncio.sleep(interval)
+
+
+async def _main(migrate: bool) -> None:
+    from db.session import engine, settings
+
+    async with engine.begin() as conn:
+        await conn.run_sync(QuoteTick.__table__.create, checkfirst=True)
+        # migrate first, so retention drops the old partitions migration creates
+        if migrate:
+            print(f"Migrated {await migrate_quotes(conn)} quote ticks")
+        await maintain(conn, settings.quote_tick_retention_days)
+
+
+if __name__ == "__main__":
+    # python -m db.partitions [migrate]
+    asyncio.run(_main("migrate" in sys.argv[1:]))
@@ -1,30 +1,112 @@
 import asyncio
+from prometheus_client import start_http_server
 from models import Settings
 from logging_config import configure_logging
-from db.session import AsyncSessionLocal
+from db.partitions import maintain_forever
+from db.session import AsyncSessionLocal, engine
+from connectors.broker import build_publisher
+from connectors.rate_limit import VenueLimiter
+from connectors.recording import Recorder
 from connectors.rest_client import KalshiRestClient, PolymarketRestClient
-from services.persistence import save_quotes
+from connectors.transport import TransportConfig
+from services.ingestion import IngestionScheduler
+from services.persistence import QuoteDeduplicator, QuoteWriter, save_quote_ticks
+from tracing import LoopMonitor, Tracer
 
 async def main():
     # Configure logging and load settings
     configure_logging()
     settings = Settings()
+    # Serve Prometheus metrics when a port is configured
+    if settings.metrics_port:
+        start_http_server(settings.metrics_port)
+
+    # Capture raw venue responses for replay when a recording path is set
+    recorder = Recorder(settings.record_path) if settings.record_path else None
 
     # Initialize REST connectors
-    kalshi_client = KalshiRestClient(base_url="https://api.kalshi.com", api_key=settings.kalshi_api_key)
-    polymarket_client = PolymarketRestClient(base_url="https://api.polymarket.com", api_key=None)
-
-    # Fetch and persist quotes
-    async with AsyncSessionLocal() as session:
-        quotes1 = await kalshi_client.fetch_quotes()
-        quotes2 = await polymarket_client.fetch_quotes()
-        all_quotes = quotes1 + quotes2
-        await save_quotes(all_quotes, session)
-        print(f"Persisted {len(all_quotes)} quotes")
-
-    # Clean up clients
-    await kalshi_client.close()
-    await polymarket_client.close()
+    options = dict(
+        recorder=recorder,
+        page_size=settings.rest_page_size,
+        page_concurrency=settings.rest_page_concurrency,
+        max_retries=settings.rest_max_retries,
+        fast_decode=settings.fast_decode,
+        transport=TransportConfig(
+            http2=settings.rest_http2,
+            max_connections=settings.rest_max_connections,
+            max_keepalive_connections=settings.rest_max_keepalive_connections,
+        ),
+        order_transport=TransportConfig(
+            http2=settings.rest_http2,
+            max_connections=settings.rest_order_connections,
+            max_keepalive_connections=settings.rest_order_connections,
+            keepalive_expiry=120.0,
+        ),
+    )
+    kalshi_limiter = VenueLimiter(
+        "kalshi", settings.kalshi_read_rate, settings.kalshi_order_rate, retry_ratio=settings.rest_retry_budget
+    )
+    polymarket_limiter = VenueLimiter(
+        "polymarket", settings.polymarket_read_rate, settings.polymarket_order_rate, retry_ratio=settings.rest_retry_budget
+    )
+    kalshi_client = KalshiRestClient(
+        base_url="https://api.kalshi.com", api_key=settings.kalshi_api_key, limiter=kalshi_limiter, **options
+    )
+    polymarket_client = PolymarketRestClient(
+        base_url="https://api.polymarket.com", api_key=None, limiter=polymarket_limiter, **options
+    )
+
+    # Open connections before the first poll/order pays the handshake
+    await asyncio.gather(kalshi_client.warm_up(), polymarket_client.warm_up())
+
+    # Publish quotes for the scoring workers when a broker is configured
+    publisher = build_publisher(settings) if settings.broker else None
+    if publisher is not None:
+        await publisher.start()
+
+    # Stream quotes into bulk inserts into the partitioned quote_ticks table, flushed by size or interval
+    writer = QuoteWriter(
+        AsyncSessionLocal,
+        flush_size=settings.persist_flush_size,
+        flush_interval=settings.persist_flush_interval,
+        queue_size=settings.persist_queue_size,
+        deduplicator=QuoteDeduplicator(settings.persist_heartbeat_interval) if settings.persist_dedup else None,
+        save=save_quote_ticks,
+    )
+
+    # Poll all venues concurrently and persist continuously
+    scheduler = IngestionScheduler(
+        connectors=[
+            (kalshi_client, settings.kalshi_poll_interval),
+            (polymarket_client, settings.polymarket_poll_interval),
+        ],
+        session_factory=AsyncSessionLocal,
+        queue_size=settings.ingestion_queue_size,
+        writer=writer,
+        incremental=settings.ingestion_incremental,
+        publisher=publisher,
+        topic=settings.quotes_topic,
+        tracer=Tracer(settings.trace_sample_rate),
+    )
+    monitor = LoopMonitor(queues={"raw": scheduler.raw_queue, "quotes": scheduler.quote_queue})
+    monitor.start()
+    # keep quote_ticks partitions ahead of the clock and apply retention
+    maintenance = asyncio.create_task(
+        maintain_forever(engine, settings.quote_tick_retention_days, settings.quote_tick_maintenance_interval)
+    )
+    try:
+        await scheduler.run()
+    finally:
+        maintenance.cancel()
+        await asyncio.gather(maintenance, return_exceptions=True)
+        await monitor.stop()
+        # Clean up clients
+        await kalshi_client.close()
+        await polymarket_client.close()
+        if publisher is not None:
+            await publisher.stop()
+        if recorder is not None:
+            recorder.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -1,4 +1,89 @@
-from prometheus_client import Counter
+from prometheus_client import Counter, Gauge, Histogram
 
 # Number of quotes ingested
 quotes_ingested = Counter("quotes_ingested", "Total number of market quotes ingested into the database")
+
+# Latency of each ingestion stage (fetch, normalize, persist, tick_to_persist) per venue
+ingestion_stage_latency = Histogram(
+    "ingestion_stage_latency_seconds",
+    "Latency of each ingestion pipeline stage",
+    ["venue", "stage"],
+)
+
+# Failed polls per venue
+ingestion_poll_errors = Counter("ingestion_poll_errors", "Total number of failed venue polls", ["venue"])
+
+# Change-only persistence: rows written vs. rows skipped because outcomes were unchanged
+quote_rows_written = Counter("quote_rows_written", "Quote rows passed through deduplication to the database")
+quote_rows_skipped = Counter("quote_rows_skipped", "Quote rows skipped because outcomes were unchanged")
+
+# WebSocket streaming: per-venue message rate, feed lag and back-pressure drops
+ws_messages = Counter("ws_messages", "WebSocket messages received", ["venue"])
+ws_parse_errors = Counter("ws_parse_errors", "WebSocket messages that failed to normalize", ["venue"])
+ws_message_lag = Histogram(
+    "ws_message_lag_seconds",
+    "Delay between the venue timestamp of an update and its receipt",
+    ["venue"],
+)
+ws_updates_dropped = Counter("ws_updates_dropped", "Pending updates dropped by the stream queue on overflow", ["venue"])
+ws_updates_coalesced = Counter("ws_updates_coalesced", "Updates merged into an already pending update", ["venue"])
+
+# WebSocket supervision: reconnects, sequence gaps and markets awaiting a REST resync
+ws_reconnects = Counter("ws_reconnects", "WebSocket reconnections", ["venue"])
+ws_reconnect_seconds = Histogram(
+    "ws_reconnect_seconds",
+    "Time from detecting a dropped connection to being resubscribed",
+    ["venue"],
+)
+ws_sequence_gaps = Counter("ws_sequence_gaps", "Sequence gaps detected on WebSocket feeds", ["venue"])
+ws_stale_markets = Gauge("ws_stale_markets", "Markets awaiting a REST snapshot after a gap or reconnect", ["venue"])
+
+# REST rate limiting: time spent waiting for a token, retries by reason, retries refused by the budget
+rest_throttle_wait = Histogram(
+    "rest_throttle_wait_seconds",
+    "Time a REST request waited on the venue's token bucket",
+    ["venue", "bucket"],
+)
+rest_retries = Counter("rest_retries", "REST requests retried", ["venue", "reason"])
+rest_retry_budget_exhausted = Counter(
+    "rest_retry_budget_exhausted", "REST retries refused because the retry budget was spent", ["venue"]
+)
+
+# REST transport: new-connection TCP connect and TLS handshake, and time to response headers, per pool
+rest_connect_seconds = Histogram("rest_connect_seconds", "TCP connect time of new REST connections", ["venue", "pool"])
+rest_tls_seconds = Histogram("rest_tls_seconds", "TLS handshake time of new REST connections", ["venue", "pool"])
+rest_ttfb_seconds = Histogram(
+    "rest_ttfb_seconds", "Time from sending REST request headers to receiving response headers", ["venue", "pool"]
+)
+
+# Multi-leg execution: per-leg ack latency, spread between first and last leg ack, outcomes and unwind orders
+execution_leg_latency = Histogram("execution_leg_latency_seconds", "Time from dispatch to order ack per leg", ["venue"])
+execution_leg_skew = Histogram("execution_leg_skew_seconds", "Time between the first and last leg ack of an opportunity")
+execution_results = Counter("execution_results", "Executed opportunities by outcome", ["status"])
+execution_unwinds = Counter("execution_unwinds", "Offsetting orders sent to unwind unhedged fills", ["venue"])
+
+# Scoring workers: quotes consumed, per-batch processing time and consumer lag per partition/shard
+worker_messages_consumed = Counter("worker_messages_consumed", "Broker messages consumed by scoring workers", ["topic"])
+worker_batch_seconds = Histogram("worker_batch_seconds", "Time to match, score and commit one consumed batch")
+worker_consumer_lag = Gauge("worker_consumer_lag", "Messages not yet consumed", ["topic", "partition"])
+
+# Tick-to-trade tracing (sampled): per-stage time, venue update to order ack, loop lag, queue depths, quote age
+TICK_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# quotes of quiet markets can be minutes old, so staleness needs a longer range than stage timings
+STALENESS_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+tick_stage_seconds = Histogram(
+    "tick_stage_seconds",
+    "Time spent in each stage between a venue update and the order ack (parse, match, score, decision, order_ack)",
+    ["stage"],
+    buckets=TICK_BUCKETS,
+)
+tick_to_trade_seconds = Histogram(
+    "tick_to_trade_seconds", "Time from receiving a venue update to the ack of the order it triggered", buckets=TICK_BUCKETS
+)
+event_loop_lag_seconds = Histogram(
+    "event_loop_lag_seconds", "How late the event loop runs a timer callback", buckets=TICK_BUCKETS
+)
+queue_depth = Gauge("queue_depth", "Items waiting in an internal queue", ["queue"])
+quote_staleness_seconds = Histogram(
+    "quote_staleness_seconds", "Age of a quote (now - MarketQuote.timestamp) when received", ["venue"], buckets=STALENESS_BUCKETS
+)
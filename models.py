@@ -1,6 +1,6 @@
 from pydantic import BaseModel, BaseSettings
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 
 class PriceLevel(BaseModel):
@@ -14,6 +14,21 @@ class MarketQuote(BaseModel):
     market_id: str
     outcomes: Dict[str, PriceLevel]
     timestamp: datetime
+    title: Optional[str] = None
+    category: Optional[str] = None
+    close_time: Optional[datetime] = None
+    # set on sampled batches only, see tracing.py
+    received_at: Optional[datetime] = None
+
+
+class QuoteDelta(BaseModel):
+    """Partial update of a market's outcomes, e.g. from a WebSocket feed."""
+    platform: str
+    market_id: str
+    outcomes: Dict[str, PriceLevel]
+    timestamp: datetime
+    # set on sampled messages only, carried onto the MarketQuote it updates
+    received_at: Optional[datetime] = None
 
 
 class ArbitrageCandidate(BaseModel):
@@ -28,6 +43,50 @@ class Settings(BaseSettings):
     min_spread: float = 0.001
     min_apy: float = 0.0
     max_slippage: float = 0.005
+    execution_deadline: float = 2.0
+    max_capital: float = 1000.0
+    max_bundle_size: Optional[float] = None
+    assumed_depth: float = 100.0
+    kalshi_poll_interval: float = 1.0
+    polymarket_poll_interval: float = 1.0
+    ingestion_queue_size: int = 100
+    ingestion_incremental: bool = False
+    rest_page_size: int = 500
+    rest_page_concurrency: int = 4
+    rest_max_retries: int = 3
+    rest_http2: bool = False
+    rest_max_connections: int = 20
+    rest_max_keepalive_connections: int = 10
+    rest_order_connections: int = 4
+    rest_retry_budget: float = 0.1
+    kalshi_read_rate: float = 20.0
+    kalshi_order_rate: float = 10.0
+    polymarket_read_rate: float = 50.0
+    polymarket_order_rate: float = 5.0
+    persist_flush_size: int = 1000
+    persist_flush_interval: float = 1.0
+    persist_queue_size: int = 10000
+    persist_dedup: bool = True
+    persist_heartbeat_interval: Optional[float] = 60.0
+    quote_tick_retention_days: int = 30
+    quote_tick_maintenance_interval: float = 3600.0
+    fast_decode: bool = False
+    # "kafka" or "redis"; quotes are only published to a broker when set
+    broker: Optional[str] = None
+    broker_url: str = "localhost:9092"
+    broker_shards: int = 1
+    quotes_topic: str = "quotes"
+    opportunities_topic: str = "opportunities"
+    worker_group: str = "scoring"
+    worker_index: int = 0
+    worker_count: int = 1
+    # score in this many processes instead of on the worker's event loop
+    scoring_processes: int = 0
+    # fraction of ingested batches traced tick-to-trade; METRICS_PORT serves Prometheus metrics
+    trace_sample_rate: float = 0.01
+    metrics_port: Optional[int] = None
+    # gzip JSON-lines file that raw REST responses are appended to (connectors.recording)
+    record_path: Optional[str] = None
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,136 @@
+"""
+Compact in-memory quote representation for the core pipeline (matching,
+scoring, portfolio marks). MarketQuote stays the type at API edges; convert
+with CompactQuote.from_market_quote / to_market_quote there.
+"""
+import sys
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from models import ArbitrageCandidate, MarketQuote, PriceLevel
+
+_NAMES: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+def intern_names(names: Iterable[str]) -> Tuple[str, ...]:
+    """Return the shared tuple of interned outcome names, e.g. ("Yes", "No")."""
+    key = tuple(names)
+    shared = _NAMES.get(key)
+    if shared is None:
+        shared = _NAMES[key] = tuple(sys.intern(n) for n in key)
+    return shared
+
+
+def _epoch(dt: Optional[datetime]) -> Optional[float]:
+    if dt is None:
+        return None
+    # naive timestamps are UTC throughout the codebase
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _datetime(ts: Optional[float]) -> Optional[datetime]:
+    return None if ts is None else datetime.fromtimestamp(ts, tz=timezone.utc)
+
+
+class CompactQuote:
+    """
+    A MarketQuote in a few slots: outcome names are a shared interned tuple,
+    prices a single float64 array laid out [bid0, ask0, bid1, ask1, ...] and
+    times epoch seconds (UTC).
+    """
+
+    __slots__ = ("platform", "event_id", "market_id", "names", "prices", "timestamp", "title", "category", "close_time")
+
+    def __init__(
+        self,
+        platform: str,
+        event_id: str,
+        market_id: str,
+        names: Tuple[str, ...],
+        prices: array,
+        timestamp: float,
+        title: Optional[str] = None,
+        category: Optional[str] = None,
+        close_time: Optional[float] = None,
+    ):
+        self.platform = platform
+        self.event_id = event_id
+        self.market_id = market_id
+        self.names = names
+        self.prices = prices
+        self.timestamp = timestamp
+        self.title = title
+        self.category = category
+        self.close_time = close_time
+
+    @classmethod
+    def from_market_quote(cls, quote: MarketQuote) -> "CompactQuote":
+        prices = array("d")
+        for level in quote.outcomes.values():
+            prices.append(level.bid)
+            prices.append(level.ask)
+        return cls(
+            sys.intern(quote.platform),
+            quote.event_id,
+            quote.market_id,
+            intern_names(quote.outcomes),
+            prices,
+            _epoch(quote.timestamp),
+            quote.title,
+            quote.category,
+            _epoch(quote.close_time),
+        )
+
+    def to_market_quote(self) -> MarketQuote:
+        # prices were validated when the MarketQuote was first built
+        return MarketQuote.construct(
+            platform=self.platform,
+            event_id=self.event_id,
+            market_id=self.market_id,
+            outcomes={name: PriceLevel.construct(bid=bid, ask=ask) for name, bid, ask in self.levels()},
+            timestamp=_datetime(self.timestamp),
+            title=self.title,
+            category=self.category,
+            close_time=_datetime(self.close_time),
+        )
+
+    def levels(self) -> Iterator[Tuple[str, float, float]]:
+        """Yield (outcome, bid, ask) in outcome order."""
+        prices = self.prices
+        for i, name in enumerate(self.names):
+            yield name, prices[2 * i], prices[2 * i + 1]
+
+    def same_prices(self, other: "CompactQuote") -> bool:
+        return self.names == other.names and self.prices == other.prices
+
+    def __repr__(self) -> str:
+        return f"CompactQuote({self.platform!r}, {self.event_id!r}, {self.market_id!r}, {list(self.levels())!r})"
+
+
+class CompactCandidate:
+    """ArbitrageCandidate counterpart holding CompactQuotes."""
+
+    __slots__ = ("event_key", "platform_quotes")
+
+    def __init__(self, event_key: str, platform_quotes: List[CompactQuote]):
+        self.event_key = event_key
+        self.platform_quotes = platform_quotes
+
+    def to_candidate(self) -> ArbitrageCandidate:
+        return ArbitrageCandidate.construct(
+            event_key=self.event_key, platform_quotes=[q.to_market_quote() for q in self.platform_quotes]
+        )
+
+
+def best_bids(quotes: Iterable[CompactQuote]) -> Dict[Tuple[str, str], float]:
+    """Best bid across venues per (event_id, outcome), i.e. the exit price of a position."""
+    marks: Dict[Tuple[str, str], float] = {}
+    for q in quotes:
+        for name, bid, _ in q.levels():
+            key = (q.event_id, name)
+            if bid > marks.get(key, float("-inf")):
+                marks[key] = bid
+    return marks
@@ -0,0 +1,214 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+import structlog
+from pydantic import BaseModel
+
+from metrics import execution_leg_latency, execution_leg_skew, execution_results, execution_unwinds
+from models import MarketQuote
+from services.opportunity import Opportunity
+from services.position import PortfolioManager
+from tracing import Tracer
+
+logger = structlog.get_logger(__name__)
+
+
+class Leg(BaseModel):
+    platform: str
+    market_id: str
+    outcome: str
+    side: str
+    price: float
+    size: float
+
+
+class LegFill(BaseModel):
+    leg: Leg
+    order_id: Optional[str] = None
+    filled: float = 0.0
+    price: float = 0.0
+    latency: Optional[float] = None
+    error: Optional[str] = None
+
+
+class ExecutionResult(BaseModel):
+    event_key: str
+    # "filled", "partial" (hedged part kept, excess unwound), "unwound" or "failed"
+    status: str
+    fills: List[LegFill]
+    unwinds: List[LegFill]
+    skew: float
+
+
+def plan_legs(opp: Opportunity, size: float, max_slippage: float = 0.0) -> List[Leg]:
+    """One BUY leg per outcome at the venue with the lowest ask (earliest quote on ties)."""
+    best: Dict[str, MarketQuote] = {}
+    for mq in opp.candidate.platform_quotes:
+        for outcome, pl in mq.outcomes.items():
+            if outcome not in best or pl.ask < best[outcome].outcomes[outcome].ask:
+                best[outcome] = mq
+    return [
+        Leg(
+            platform=mq.platform,
+            market_id=mq.market_id,
+            outcome=outcome,
+            side="BUY",
+            price=mq.outcomes[outcome].ask * (1 + max_slippage),
+            size=size,
+        )
+        for outcome, mq in best.items()
+    ]
+
+
+class ExecutionCoordinator:
+    """
+    Executes every leg of an Opportunity concurrently under a deadline.
+
+    `venues` maps a platform to an executor with `place_order(market_id,
+    outcome, side, price, size)` and `cancel_order(order_id)`; order
+    responses carry `order_id` and optionally `filled_size`/`avg_price`.
+    A response without `filled_size` counts as unfilled until the cancel of
+    its remainder reports the venue's fills; a fill is never assumed.
+
+    Legs not acked by the deadline get `ack_timeout` more seconds (default:
+    the deadline) for their ack, so the order can be cancelled at the venue
+    and its fills reconciled before the hedged size is computed.
+
+    When the legs fill unevenly, resting remainders are cancelled and
+    whatever exceeds the smallest filled leg (the hedged size) is sold back
+    at the bid, so no naked exposure is left. All fills, including unwinds,
+    are recorded in the PortfolioManager.
+
+    When the quote whose update triggered the opportunity (`trigger`) carries
+    a sampled receive stamp, the time to the last leg ack and the full
+    tick-to-trade time are observed. Stamps on the other legs may be from
+    long-past ticks and are ignored.
+    """
+
+    def __init__(
+        self,
+        venues: Dict[str, Any],
+        portfolio: PortfolioManager,
+        deadline: float = 2.0,
+        max_slippage: float = 0.0,
+        ack_timeout: Optional[float] = None,
+    ):
+        self.venues = venues
+        self.portfolio = portfolio
+        self.deadline = deadline
+        self.max_slippage = max_slippage
+        self.ack_timeout = deadline if ack_timeout is None else ack_timeout
+
+    async def _place(self, leg: Leg, started: float) -> LegFill:
+        resp = await self.venues[leg.platform].place_order(leg.market_id, leg.outcome, leg.side, leg.price, leg.size)
+        latency = time.perf_counter() - started
+        execution_leg_latency.labels(leg.platform).observe(latency)
+        filled = resp.get("filled_size")
+        return LegFill(
+            leg=leg,
+            order_id=resp.get("order_id"),
+            filled=float(filled) if filled is not None else 0.0,
+            price=float(resp.get("avg_price", leg.price)),
+            latency=latency,
+        )
+
+    async def _cancel_remainder(self, fill: LegFill) -> None:
+        try:
+            resp = await self.venues[fill.leg.platform].cancel_order(fill.order_id)
+        except Exception:
+            logger.exception("cancel_failed", platform=fill.leg.platform, order_id=fill.order_id)
+            return
+        # fills racing the cancel are reported back by the venue
+        if isinstance(resp, dict) and "filled_size" in resp:
+            fill.filled = float(resp["filled_size"])
+        else:
+            logger.warning("fill_unreconciled", platform=fill.leg.platform, order_id=fill.order_id)
+
+    async def _unwind(self, fill: LegFill, excess: float, bid: float) -> Optional[LegFill]:
+        leg = Leg(
+            platform=fill.leg.platform,
+            market_id=fill.leg.market_id,
+            outcome=fill.leg.outcome,
+            side="SELL",
+            price=bid * (1 - self.max_slippage),
+            size=excess,
+        )
+        execution_unwinds.labels(leg.platform).inc()
+        try:
+            return await self._place(leg, time.perf_counter())
+        except Exception as exc:
+            logger.exception("unwind_failed", platform=leg.platform, market_id=leg.market_id)
+            return LegFill(leg=leg, error=repr(exc))
+
+    async def execute(
+        self, opp: Opportunity, size: float, trigger: Optional[MarketQuote] = None
+    ) -> ExecutionResult:
+        legs = plan_legs(opp, size, self.max_slippage)
+        started = time.perf_counter()
+        trace = Tracer.resume([trigger], started=started) if trigger is not None else None
+        tasks = [asyncio.create_task(self._place(leg, started)) for leg in legs]
+        done, pending = await asyncio.wait(tasks, timeout=self.deadline)
+        late, lost = set(), set()
+        if pending:
+            logger.warning("leg_deadline_exceeded", event_key=opp.event_key, legs=len(pending))
+            # the orders may still rest at the venue: wait for their acks so they can be cancelled
+            late, lost = await asyncio.wait(pending, timeout=self.ack_timeout)
+        for task in lost:
+            task.cancel()
+            logger.error("leg_ack_lost", event_key=opp.event_key)
+        await asyncio.gather(*lost, return_exceptions=True)
+        if trace is not None:
+            trace.mark("order_ack")
+            trace.finish()
+
+        fills: List[LegFill] = []
+        for leg, task in zip(legs, tasks):
+            if task in lost:
+                fills.append(LegFill(leg=leg, error="deadline exceeded"))
+            elif task.exception() is not None:
+                fills.append(LegFill(leg=leg, error=repr(task.exception())))
+            else:
+                fill = task.result()
+                if task in late:
+                    fill.error = "deadline exceeded"
+                fills.append(fill)
+        latencies = [f.latency for f in fills if f.latency is not None]
+        skew = max(latencies) - min(latencies) if latencies else 0.0
+        if len(latencies) > 1:
+            execution_leg_skew.observe(skew)
+
+        await asyncio.gather(
+            *(self._cancel_remainder(f) for f in fills if f.order_id and f.filled < f.leg.size)
+        )
+        hedged = min(f.filled for f in fills) if fills else 0.0
+        for f in fills:
+            if f.filled > 0:
+                self.portfolio.record_fill(opp.event_key, f.leg.outcome, size=f.filled, price=f.price, side="BUY")
+
+        bids = {
+            (mq.platform, mq.market_id, outcome): pl.bid
+            for mq in opp.candidate.platform_quotes
+            for outcome, pl in mq.outcomes.items()
+        }
+        unwinds: List[LegFill] = []
+        excess = [(f, f.filled - hedged) for f in fills if f.filled - hedged > 0]
+        if excess:
+            results = await asyncio.gather(
+                *(self._unwind(f, qty, bids[(f.leg.platform, f.leg.market_id, f.leg.outcome)]) for f, qty in excess)
+            )
+            for u in results:
+                unwinds.append(u)
+                if u.filled > 0:
+                    self.portfolio.record_fill(opp.event_key, u.leg.outcome, size=u.filled, price=u.price, side="SELL")
+
+        if hedged >= size:
+            status = "filled"
+        elif hedged > 0:
+            status = "partial"
+        elif any(f.filled > 0 for f in fills):
+            status = "unwound"
+        else:
+            status = "failed"
+        execution_results.labels(status).inc()
+        return ExecutionResult(event_key=opp.event_key, status=status, fills=fills, unwinds=unwinds, skew=skew)
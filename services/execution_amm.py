@@ -1,29 +1,204 @@
-from typing import Dict
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
 from models import MarketQuote
+from services.execution import plan_legs
+from services.opportunity import Opportunity
+
+ArrayLike = Union[float, np.ndarray]
+
+
+def buy_cost(r_in: float, r_out: float, shares: ArrayLike, fee: float = 0.0) -> ArrayLike:
+    """
+    Collateral needed to buy `shares` of an outcome from a binary
+    constant-product pool, where `r_in` is that outcome's reserve and `r_out`
+    the other one. The invested amount a' (after fee) joins both reserves
+    and the shares leave the bought side, keeping the product fixed:
+
+        (r_in + a' - n)(r_out + a') = r_in r_out
+        a' = [-(r_in + r_out - n) + sqrt((r_in + r_out - n)^2 + 4 n r_out)] / 2
+
+    and the trader pays a = a' / (1 - fee). Vectorized over `shares`.
+    """
+    n = np.asarray(shares, dtype=np.float64)
+    s = r_in + r_out - n
+    invested = (-s + np.sqrt(s * s + 4.0 * n * r_out)) / 2.0
+    cost = invested / (1.0 - fee)
+    return cost if cost.ndim else float(cost)
+
+
+def shares_for(r_in: float, r_out: float, invested: ArrayLike) -> ArrayLike:
+    """Shares received for an after-fee investment a' (inverse of buy_cost)."""
+    a = np.asarray(invested, dtype=np.float64)
+    n = r_in + a - r_in * r_out / (r_out + a)
+    return n if n.ndim else float(n)
+
+
+@dataclass
+class PoolState:
+    reserves: Dict[str, float]
+    fee: float
+    updated: float
+
+
+class PoolCache:
+    """
+    Latest reserves of binary AMM pools by market_id. Entries are kept
+    current incrementally via `apply_trade` (e.g. from observed swaps) and
+    only those older than `max_age` seconds need a full `update`.
+    """
+
+    def __init__(self, max_age: float = 30.0):
+        self.max_age = max_age
+        self.pools: Dict[str, PoolState] = {}
+
+    def get(self, market_id: str) -> Optional[PoolState]:
+        return self.pools.get(market_id)
+
+    def update(self, market_id: str, reserves: Dict[str, float], fee: float, now: float = None) -> None:
+        if len(reserves) != 2:
+            raise ValueError("Only binary pools are supported")
+        self.pools[market_id] = PoolState(dict(reserves), fee, time.monotonic() if now is None else now)
+
+    def apply_trade(self, market_id: str, outcome: str, shares: float, invested: float) -> None:
+        """Apply a buy of `shares` for after-fee `invested` collateral (negative shares for a sell)."""
+        pool = self.pools[market_id]
+        for name in pool.reserves:
+            pool.reserves[name] += invested
+        pool.reserves[outcome] -= shares
+
+    def stale(self, now: float = None) -> List[str]:
+        now = time.monotonic() if now is None else now
+        return [m for m, p in self.pools.items() if now - p.updated > self.max_age]
 
 
 class PolymarketAmmExecutor:
-    """Executor for Polymarket AMM leg with simulation."""
+    """
+    Executor for Polymarket AMM legs with simulation. Orders go through
+    `client` (a PolymarketRestClient), so it can serve as the "polymarket"
+    venue of an ExecutionCoordinator; fills are applied to the pool cache.
+    """
 
-    def __init__(self, rpc_url: str, max_slippage: float):
+    def __init__(
+        self,
+        rpc_url: str,
+        max_slippage: float,
+        pools: PoolCache = None,
+        gas_cost: float = 0.0,
+        client: Any = None,
+    ):
         self.rpc_url = rpc_url
         self.max_slippage = max_slippage
+        self.pools = pools if pools is not None else PoolCache()
+        self.gas_cost = gas_cost
+        self.client = client
+
+    async def place_order(self, market_id: str, outcome: str, side: str, price: float, size: float) -> Dict[str, Any]:
+        """
+        Swap `size` shares of `outcome`. A buy whose average cost on the
+        cached pool already exceeds `price` is rejected without being sent.
+        """
+        if self.client is None:
+            raise RuntimeError("PolymarketAmmExecutor has no order client")
+        pool = self.pools.get(market_id)
+        if pool is not None and side.upper() == "BUY" and size > 0:
+            average = self.cost_ladder(market_id, outcome, size) / size
+            if average > price:
+                raise ValueError(f"Average price {average:.4f} exceeds limit {price:.4f}")
+        resp = await self.client.place_order(market_id, outcome, side, price, size)
+        filled = resp.get("filled_size")
+        if pool is not None and filled:
+            sign = 1.0 if side.upper() == "BUY" else -1.0
+            invested = float(filled) * float(resp.get("avg_price", price)) * (1.0 - pool.fee)
+            self.pools.apply_trade(market_id, outcome, sign * float(filled), sign * invested)
+        return resp
+
+    async def cancel_order(self, order_id: str) -> Dict[str, Any]:
+        if self.client is None:
+            raise RuntimeError("PolymarketAmmExecutor has no order client")
+        return await self.client.cancel_order(order_id)
+
+    def _reserves(self, market_id: str, outcome: str) -> Tuple[float, float, float]:
+        pool = self.pools.get(market_id)
+        if pool is None:
+            raise KeyError(f"No pool cached for {market_id}")
+        if outcome not in pool.reserves:
+            raise ValueError(f"Outcome {outcome} not in pool")
+        r_out = next(r for name, r in pool.reserves.items() if name != outcome)
+        return pool.reserves[outcome], r_out, pool.fee
+
+    def cost_ladder(self, market_id: str, outcome: str, sizes: np.ndarray) -> np.ndarray:
+        """Collateral cost (fee included) for each trade size in `sizes` at once."""
+        r_in, r_out, fee = self._reserves(market_id, outcome)
+        return buy_cost(r_in, r_out, np.asarray(sizes, dtype=np.float64), fee)
+
+    def optimal_size(
+        self, market_id: str, outcome: str, hedge_price: float, max_size: float = None
+    ) -> Tuple[float, float]:
+        """
+        Size maximizing n * (1 - hedge_price) - cost(n) - gas, where
+        `hedge_price` is the per-share cost of completing the set elsewhere.
+        Marginal cost equals 1 - hedge_price at
+
+            (r_out + a')^2 = r_in r_out / (1 / ((1 - fee)(1 - hedge_price)) - 1)
+
+        Returns (shares, expected profit); (0, 0) when no size is profitable.
+        """
+        r_in, r_out, fee = self._reserves(market_id, outcome)
+        target = (1.0 - fee) * (1.0 - hedge_price)
+        if target <= 0:
+            return 0.0, 0.0
+        invested = math.sqrt(r_in * r_out / (1.0 / target - 1.0)) - r_out if target < 1 else math.inf
+        if invested <= 0:
+            return 0.0, 0.0
+        size = shares_for(r_in, r_out, invested) if math.isfinite(invested) else math.inf
+        if max_size is not None:
+            size = min(size, max_size)
+        if not math.isfinite(size):
+            raise ValueError("Unbounded size; pass max_size")
+        profit = size * (1.0 - hedge_price) - buy_cost(r_in, r_out, size, fee) - self.gas_cost
+        if profit <= 0:
+            return 0.0, 0.0
+        return size, profit
+
+    def size_opportunity(self, opp: Opportunity, max_size: float = None) -> Tuple[float, float]:
+        """
+        Optimal size for an opportunity with a leg on a cached pool: the other
+        legs complete the set at their quoted asks. Returns (shares, profit).
+        """
+        legs = plan_legs(opp, size=0.0)
+        for leg in legs:
+            if self.pools.get(leg.market_id) is not None:
+                hedge = sum(other.price for other in legs if other is not leg)
+                return self.optimal_size(leg.market_id, leg.outcome, hedge, max_size)
+        return 0.0, 0.0
 
     def simulate_swap(
         self, quote: MarketQuote, outcome: str, amount: float
     ) -> Dict[str, float]:
         """
-        Simulate cost to buy `amount` of `outcome` at ask price,
-        applying max_slippage tolerance.
+        Simulate cost to buy `amount` of `outcome`. With the market's pool
+        cached the cost follows the constant-product curve and slippage is
+        the average price over the quoted ask; otherwise the ask price is
+        used with the flat max_slippage tolerance.
         Returns cost, max_cost, slippage, gas_cost, and total_cost.
         """
         if outcome not in quote.outcomes:
             raise ValueError(f"Outcome {outcome} not in quote")
         ask_price = quote.outcomes[outcome].ask
-        cost = ask_price * amount
-        max_cost = cost * (1 + self.max_slippage)
-        slippage = self.max_slippage
-        gas_cost = 0.0
+        if self.pools.get(quote.market_id) is not None:
+            cost = self.cost_ladder(quote.market_id, outcome, amount)
+            slippage = cost / (ask_price * amount) - 1.0 if amount > 0 and ask_price > 0 else 0.0
+            max_cost = cost * (1 + self.max_slippage)
+        else:
+            cost = ask_price * amount
+            max_cost = cost * (1 + self.max_slippage)
+            slippage = self.max_slippage
+        gas_cost = self.gas_cost
         total_cost = max_cost + gas_cost
         return {
             "cost": cost,
@@ -1,5 +1,6 @@
 from typing import Any, Dict
 from connectors.rest_client import KalshiRestClient
+from services.order_book import L2OrderBook
 
 
 class KalshiOrderBookExecutor:
@@ -21,3 +22,20 @@ class KalshiOrderBookExecutor:
     async def cancel_order(self, order_id: str) -> Dict[str, Any]:
         """Cancel order."""
         return await self.client.cancel_order(order_id)
+
+    def price_order(self, book: L2OrderBook, outcome: str, size: float) -> Dict[str, float]:
+        """
+        Cost of buying `size` contracts against the current depth: VWAP, the
+        worst level touched (use it as the limit price) and the Kalshi fee.
+        Raises ValueError if the book is too thin.
+        """
+        cost = book.buy_cost(outcome, size)
+        if cost is None:
+            raise ValueError(f"Insufficient depth for {size} {outcome} on {book.market_id}")
+        notional, fee, worst = cost
+        return {
+            "vwap": notional / size,
+            "limit_price": worst,
+            "fee": fee,
+            "total_cost": notional + fee,
+        }
@@ -0,0 +1,216 @@
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from models import ArbitrageCandidate, MarketQuote
+
+MarketKey = Tuple[str, str]
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    {"a", "an", "and", "at", "be", "by", "for", "in", "is", "of", "on", "or", "the", "to", "will", "with"}
+)
+
+
+def tokenize(title: str) -> FrozenSet[str]:
+    """Lower-case alphanumeric tokens of a market title, minus stopwords."""
+    return frozenset(t for t in _TOKEN_RE.findall(title.lower()) if t not in _STOPWORDS)
+
+
+def levenshtein_ratio(a: str, b: str) -> float:
+    """1 - edit_distance / max_len, so identical strings score 1.0."""
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return 1.0 - previous[-1] / len(a)
+
+
+@dataclass
+class _Entry:
+    fingerprint: str
+    event_id: str
+    title: str
+    tokens: FrozenSet[str]
+    category: Optional[str]
+    close_time: Optional[datetime]
+    matches: Set[MarketKey] = field(default_factory=set)
+
+
+def _fingerprint(quote: MarketQuote) -> str:
+    raw = f"{quote.title}|{quote.category}|{quote.close_time.isoformat() if quote.close_time else ''}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class FuzzyMatcher:
+    """
+    Cross-venue market matcher on title similarity (token overlap + Levenshtein)
+    with category and close-time filters.
+
+    Candidate pairs come from an inverted token index; tokens whose posting
+    list exceeds `max_postings` are too common to discriminate and are not
+    used for blocking, which keeps the number of comparisons sub-quadratic.
+    Accepted matches are cached on disk keyed by a title fingerprint, so only
+    new or changed markets are re-scored.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        time_window: timedelta = timedelta(days=2),
+        max_postings: int = 500,
+        cache_path: Optional[str] = None,
+    ):
+        self.threshold = threshold
+        self.time_window = time_window
+        self.max_postings = max_postings
+        self.cache_path = cache_path
+        self.entries: Dict[MarketKey, _Entry] = {}
+        self.index: Dict[str, Set[MarketKey]] = {}
+        self._cached: Dict[MarketKey, Tuple[str, Set[MarketKey]]] = {}
+        if cache_path and os.path.exists(cache_path):
+            self.load()
+
+    def update(self, quotes: List[MarketQuote]) -> int:
+        """Index new or changed markets; return how many had to be scored."""
+        pending: List[Tuple[MarketKey, _Entry]] = []
+        restored: List[Tuple[MarketKey, _Entry, Set[MarketKey]]] = []
+        for q in quotes:
+            if not q.title:
+                continue
+            key = (q.platform, q.market_id)
+            fp = _fingerprint(q)
+            entry = self.entries.get(key)
+            if entry is not None and entry.fingerprint == fp:
+                entry.event_id = q.event_id
+                continue
+            if entry is not None:
+                self._drop(key)
+            entry = _Entry(fp, q.event_id, q.title.lower(), tokenize(q.title), q.category, q.close_time)
+            cached = self._cached.pop(key, None)
+            if cached is not None and cached[0] == fp:
+                restored.append((key, entry, cached[1]))
+            else:
+                pending.append((key, entry))
+        # restore unchanged markets first so new ones are scored against them
+        for key, entry, _ in restored:
+            self._add(key, entry)
+        for key, entry, matches in restored:
+            for other in matches:
+                if other in self.entries:
+                    entry.matches.add(other)
+                    self.entries[other].matches.add(key)
+        for key, entry in pending:
+            self._score(key, entry)
+            self._add(key, entry)
+        return len(pending)
+
+    def _add(self, key: MarketKey, entry: _Entry) -> None:
+        self.entries[key] = entry
+        for token in entry.tokens:
+            self.index.setdefault(token, set()).add(key)
+
+    def match(self, quotes: List[MarketQuote]) -> List[ArbitrageCandidate]:
+        """Group quotes by exact event_id or accepted fuzzy match into candidates."""
+        self.update(quotes)
+        parent: Dict[MarketKey, MarketKey] = {}
+
+        def find(k: MarketKey) -> MarketKey:
+            root = parent.setdefault(k, k)
+            while root != parent[root]:
+                root = parent[root]
+            while parent[k] != root:
+                parent[k], k = root, parent[k]
+            return root
+
+        by_event: Dict[str, MarketKey] = {}
+        for q in quotes:
+            key = (q.platform, q.market_id)
+            first = by_event.setdefault(q.event_id, key)
+            parent[find(key)] = find(first)
+            entry = self.entries.get(key)
+            if entry is not None:
+                for other in entry.matches:
+                    parent[find(other)] = find(key)
+
+        groups: Dict[MarketKey, List[MarketQuote]] = {}
+        for q in quotes:
+            groups.setdefault(find((q.platform, q.market_id)), []).append(q)
+        candidates: List[ArbitrageCandidate] = []
+        for qs in groups.values():
+            if len(qs) > 1:
+                event_key = min(q.event_id for q in qs)
+                candidates.append(ArbitrageCandidate(event_key=event_key, platform_quotes=qs))
+        return candidates
+
+    def _score(self, key: MarketKey, entry: _Entry) -> None:
+        shared: Set[MarketKey] = set()
+        for token in entry.tokens:
+            postings = self.index.get(token)
+            if postings is None or len(postings) > self.max_postings:
+                continue
+            shared.update(other for other in postings if other[0] != key[0])
+        best: Dict[str, Tuple[float, MarketKey]] = {}
+        for other in shared:
+            cand = self.entries[other]
+            n = len(entry.tokens & cand.tokens)
+            jaccard = n / (len(entry.tokens) + len(cand.tokens) - n)
+            # the blended score cannot reach the threshold if overlap is this low
+            if 0.5 * jaccard + 0.5 < self.threshold:
+                continue
+            if entry.category and cand.category and entry.category != cand.category:
+                continue
+            if entry.close_time and cand.close_time and abs(entry.close_time - cand.close_time) > self.time_window:
+                continue
+            score = 0.5 * jaccard + 0.5 * levenshtein_ratio(entry.title, cand.title)
+            if score >= self.threshold and score > best.get(other[0], (0.0, other))[0]:
+                best[other[0]] = (score, other)
+        for _, other in best.values():
+            entry.matches.add(other)
+            self.entries[other].matches.add(key)
+
+    def _drop(self, key: MarketKey) -> None:
+        entry = self.entries.pop(key)
+        for token in entry.tokens:
+            postings = self.index.get(token)
+            if postings is not None:
+                postings.discard(key)
+        for other in entry.matches:
+            if other in self.entries:
+                self.entries[other].matches.discard(key)
+
+    def save(self) -> None:
+        """Write fingerprints and accepted matches to `cache_path`."""
+        markets = {
+            f"{k[0]}:{k[1]}": {"fp": e.fingerprint, "matches": sorted(f"{m[0]}:{m[1]}" for m in e.matches)}
+            for k, e in self.entries.items()
+        }
+        tmp = f"{self.cache_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "markets": markets}, f)
+        os.replace(tmp, self.cache_path)
+
+    def load(self) -> None:
+        """Load cached matches; they are reused for markets whose fingerprint is unchanged."""
+        with open(self.cache_path, encoding="utf-8") as f:
+            data = json.load(f)
+
+        def parse(s: str) -> MarketKey:
+            platform, market_id = s.split(":", 1)
+            return platform, market_id
+
+        self._cached = {
+            parse(k): (v["fp"], {parse(m) for m in v["matches"]}) for k, v in data.get("markets", {}).items()
+        }
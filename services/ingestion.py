@@ -0,0 +1,176 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from connectors.rest_client import RestConnectorBase
+from metrics import ingestion_poll_errors, ingestion_stage_latency
+from models import MarketQuote
+from services.persistence import QuoteDeduplicator, QuoteWriter, save_quotes
+from tracing import Tracer
+
+if TYPE_CHECKING:
+    # kept out of the import path so ingestion does not require the broker clients
+    from connectors.broker import Publisher
+
+logger = structlog.get_logger(__name__)
+
+
+class IngestionScheduler:
+    """
+    Polls REST connectors concurrently on per-venue intervals and pipelines
+    fetch -> normalize -> persist through bounded queues. Pages are queued as
+    they arrive, so normalization starts before a venue's last page lands.
+    With `incremental` each poll after the first asks only for markets
+    updated since the previous successful poll. With a `publisher`, the
+    quotes being persisted are also published to `topic` for the scoring
+    workers. With a `tracer`, sampled batches are stamped with their
+    receive time and their parse time and quote staleness are observed.
+    With a `writer`, quotes are handed to its bounded queue and written in
+    size/interval batches instead of one commit per persist cycle; a full
+    queue back-pressures the pipeline.
+    """
+
+    def __init__(
+        self,
+        connectors: List[Tuple[RestConnectorBase, float]],
+        session_factory: Callable[[], AsyncSession],
+        queue_size: int = 100,
+        persist: Callable[[List[MarketQuote], AsyncSession], Awaitable[None]] = save_quotes,
+        deduplicator: Optional[QuoteDeduplicator] = None,
+        incremental: bool = False,
+        publisher: Optional["Publisher"] = None,
+        topic: str = "quotes",
+        tracer: Optional[Tracer] = None,
+        writer: Optional[QuoteWriter] = None,
+    ):
+        self.connectors = connectors
+        self.session_factory = session_factory
+        self.persist = persist
+        self.deduplicator = deduplicator
+        self.incremental = incremental
+        self.publisher = publisher
+        self.topic = topic
+        self.tracer = tracer
+        self.writer = writer
+        # (connector, raw page, tick start, wall-clock receive time)
+        self.raw_queue: "asyncio.Queue[Tuple[RestConnectorBase, Any, float, float]]" = asyncio.Queue(maxsize=queue_size)
+        # (venue, quotes, tick start)
+        self.quote_queue: "asyncio.Queue[Tuple[str, List[MarketQuote], float]]" = asyncio.Queue(maxsize=queue_size)
+        self._tasks: List[asyncio.Task] = []
+
+    async def _poll(self, connector: RestConnectorBase, interval: float) -> None:
+        """Fetch raw pages from one venue every `interval` seconds."""
+        venue = connector.platform
+        since: Optional[datetime] = None
+        while True:
+            started = time.monotonic()
+            polled_at = datetime.now(timezone.utc)
+            try:
+                async for page in connector.fetch_pages(since):
+                    await self.raw_queue.put((connector, page, started, time.time()))
+            except Exception:
+                ingestion_poll_errors.labels(venue).inc()
+                logger.exception("poll_failed", venue=venue)
+            else:
+                ingestion_stage_latency.labels(venue, "fetch").observe(time.monotonic() - started)
+                if self.incremental:
+                    since = polled_at
+            elapsed = time.monotonic() - started
+            await asyncio.sleep(max(0.0, interval - elapsed))
+
+    async def _normalize(self) -> None:
+        """Turn raw payloads into MarketQuote batches."""
+        while True:
+            connector, raw, started, received = await self.raw_queue.get()
+            venue = connector.platform
+            trace = self.tracer.start(received) if self.tracer is not None else None
+            t0 = time.monotonic()
+            try:
+                quotes = connector.normalize(raw)
+            except Exception:
+                logger.exception("normalize_failed", venue=venue)
+            else:
+                ingestion_stage_latency.labels(venue, "normalize").observe(time.monotonic() - t0)
+                if trace is not None:
+                    trace.mark("parse")
+                    self.tracer.stamp(trace, quotes)
+                await self.quote_queue.put((venue, quotes, started))
+            finally:
+                self.raw_queue.task_done()
+
+    async def _persist(self) -> None:
+        """Persist every batch queued so far in a single commit."""
+        while True:
+            batches = [await self.quote_queue.get()]
+            while not self.quote_queue.empty():
+                batches.append(self.quote_queue.get_nowait())
+            quotes = [q for _, qs, _ in batches for q in qs]
+            if self.deduplicator is not None:
+                quotes = self.deduplicator.filter(quotes)
+            if self.publisher is not None and quotes:
+                await self._publish(quotes)
+            t0 = time.monotonic()
+            try:
+                if self.writer is not None:
+                    await self.writer.put(quotes)
+                elif quotes:
+                    async with self.session_factory() as session:
+                        await self.persist(quotes, session)
+            except Exception:
+                logger.exception("persist_failed", quotes=len(quotes))
+            else:
+                if self.deduplicator is not None:
+                    self.deduplicator.commit(quotes)
+                done = time.monotonic()
+                starts: Dict[str, float] = {}
+                for venue, _, started in batches:
+                    starts[venue] = min(started, starts.get(venue, started))
+                for venue, started in starts.items():
+                    ingestion_stage_latency.labels(venue, "persist").observe(done - t0)
+                    ingestion_stage_latency.labels(venue, "tick_to_persist").observe(done - started)
+            finally:
+                for _ in batches:
+                    self.quote_queue.task_done()
+
+    async def _publish(self, quotes: List[MarketQuote]) -> None:
+        t0 = time.monotonic()
+        try:
+            await self.publisher.publish_many(self.topic, quotes)
+        except Exception:
+            logger.exception("publish_failed", quotes=len(quotes))
+        else:
+            for venue in {q.platform for q in quotes}:
+                ingestion_stage_latency.labels(venue, "publish").observe(time.monotonic() - t0)
+
+    def start(self) -> None:
+        """Spawn the poller, normalizer and persister tasks."""
+        if self.writer is not None:
+            self.writer.start()
+        for connector, interval in self.connectors:
+            self._tasks.append(asyncio.create_task(self._poll(connector, interval)))
+        self._tasks.append(asyncio.create_task(self._normalize()))
+        self._tasks.append(asyncio.create_task(self._persist()))
+
+    async def run(self, duration: Optional[float] = None) -> None:
+        """Run until cancelled, or for `duration` seconds if given."""
+        self.start()
+        try:
+            if duration is None:
+                await asyncio.gather(*self._tasks)
+            else:
+                await asyncio.sleep(duration)
+        finally:
+            await self.stop()
+
+    async def stop(self) -> None:
+        """Cancel all pipeline tasks, then flush the writer."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.writer is not None:
+            await self.writer.stop()
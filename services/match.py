@@ -1,5 +1,6 @@
-from typing import List, Dict
+from typing import List, Dict, Set, Tuple, Union
 from models import MarketQuote, ArbitrageCandidate
+from services.compact import CompactCandidate, CompactQuote
 
 
 def match_quotes(quotes: List[MarketQuote]) -> List[ArbitrageCandidate]:
@@ -16,3 +17,87 @@ def match_quotes(quotes: List[MarketQuote]) -> List[ArbitrageCandidate]:
         if len(qs) > 1:
             candidates.append(ArbitrageCandidate(event_key=key, platform_quotes=qs))
     return candidates
+
+
+class MatchIndex:
+    """
+    Persistent event_id -> quotes index. Quotes are upserted/removed one at a
+    time and `drain` returns only the candidates whose membership or prices
+    changed since the previous drain, reusing the same candidate objects.
+
+    With `compact=True` quotes are stored as CompactQuotes and drained as
+    CompactCandidates, which keeps large books small in memory.
+    """
+
+    def __init__(self, compact: bool = False):
+        self.compact = compact
+        self.events: Dict[str, Dict[Tuple[str, str], Union[MarketQuote, CompactQuote]]] = {}
+        self.locations: Dict[Tuple[str, str], str] = {}
+        self.candidates: Dict[str, Union[ArbitrageCandidate, CompactCandidate]] = {}
+        self.dirty: Set[str] = set()
+
+    def _moved(self, old, quote) -> bool:
+        if self.compact:
+            return not old.same_prices(quote)
+        return old.outcomes != quote.outcomes
+
+    def upsert(self, quote: Union[MarketQuote, CompactQuote]) -> None:
+        if self.compact and isinstance(quote, MarketQuote):
+            quote = CompactQuote.from_market_quote(quote)
+        key = (quote.platform, quote.market_id)
+        old_event = self.locations.get(key)
+        if old_event is not None and old_event != quote.event_id:
+            self.remove(*key)
+            old_event = None
+        group = self.events.setdefault(quote.event_id, {})
+        old = group.get(key)
+        group[key] = quote
+        self.locations[key] = quote.event_id
+        if old is None or self._moved(old, quote):
+            self.dirty.add(quote.event_id)
+        elif old is not quote and quote.event_id in self.candidates and quote.event_id not in self.dirty:
+            # same prices, fresher object: swap it in without re-draining
+            qs = self.candidates[quote.event_id].platform_quotes
+            i = next((i for i, q in enumerate(qs) if q is old), None)
+            if i is None:
+                self.dirty.add(quote.event_id)
+            else:
+                qs[i] = quote
+
+    def remove(self, platform: str, market_id: str) -> None:
+        key = (platform, market_id)
+        event_id = self.locations.pop(key, None)
+        if event_id is None:
+            return
+        group = self.events[event_id]
+        del group[key]
+        if not group:
+            del self.events[event_id]
+        self.dirty.add(event_id)
+
+    def drain(self) -> List[Union[ArbitrageCandidate, CompactCandidate]]:
+        """Return candidates changed since the last drain and reset the dirty set."""
+        changed: List[ArbitrageCandidate] = []
+        for event_id in self.dirty:
+            group = self.events.get(event_id)
+            if group is None or len(group) < 2:
+                self.candidates.pop(event_id, None)
+                continue
+            cand = self.candidates.get(event_id)
+            if cand is None and self.compact:
+                cand = CompactCandidate(event_id, list(group.values()))
+                self.candidates[event_id] = cand
+            elif cand is None:
+                # quotes are already validated MarketQuote objects
+                cand = ArbitrageCandidate.construct(event_key=event_id, platform_quotes=list(group.values()))
+                self.candidates[event_id] = cand
+            else:
+                cand.platform_quotes[:] = group.values()
+            changed.append(cand)
+        self.dirty = set()
+        return changed
+
+    def all_candidates(self) -> List[Union[ArbitrageCandidate, CompactCandidate]]:
+        """Return every current candidate, draining pending changes first."""
+        self.drain()
+        return list(self.candidates.values())
@@ -1,7 +1,12 @@
-from typing import List, Dict
+from typing import List, Dict, Mapping, Optional, Sequence, Tuple, Union
+import numpy as np
 from pydantic import BaseModel
 from models import ArbitrageCandidate, PriceLevel
 from models import Settings
+from services.compact import CompactCandidate, CompactQuote
+from services.order_book import L2OrderBook
+
+AnyCandidate = Union[ArbitrageCandidate, CompactCandidate]
 
 
 class Opportunity(BaseModel):
@@ -50,3 +55,110 @@ def identify_opportunities(
             )
             opportunities.append(opp)
     return opportunities
+
+
+def _pack_candidates(
+    candidates: Sequence[AnyCandidate],
+    books: Optional[Mapping[Tuple[str, str], L2OrderBook]] = None,
+    size: float = 1.0,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Flatten every candidate's outcome levels into contiguous arrays.
+    Returns (asks, bids, group, groups_per_candidate) where `group` maps each
+    level to a global (candidate, outcome) segment id, numbered in order of
+    first appearance. Quotes with an order book in `books` are priced at
+    the fee-inclusive VWAP for `size` contracts instead of the top ask, for
+    the outcomes the book has a ladder for (Yes/No).
+    """
+    asks: List[float] = []
+    bids: List[float] = []
+    group: List[int] = []
+    counts: List[int] = []
+    next_group = 0
+    for c in candidates:
+        local: Dict[str, int] = {}
+        for mq in c.platform_quotes:
+            if isinstance(mq, CompactQuote):
+                levels = mq.levels()
+            else:
+                levels = ((outcome, pl.bid, pl.ask) for outcome, pl in mq.outcomes.items())
+            book = books.get((mq.platform, mq.market_id)) if books else None
+            if book is not None:
+                levels = (
+                    (outcome, bid, book.effective_ask(outcome, size) if outcome in book.asks else ask)
+                    for outcome, bid, ask in levels
+                )
+            for outcome, bid, ask in levels:
+                g = local.get(outcome)
+                if g is None:
+                    g = local[outcome] = next_group + len(local)
+                asks.append(ask)
+                bids.append(bid)
+                group.append(g)
+        next_group += len(local)
+        counts.append(len(local))
+    return (
+        np.array(asks, dtype=np.float64),
+        np.array(bids, dtype=np.float64),
+        np.array(group, dtype=np.intp),
+        np.array(counts, dtype=np.intp),
+    )
+
+
+def score_opportunities(
+    candidates: Sequence[AnyCandidate],
+    settings: Settings,
+    books: Optional[Mapping[Tuple[str, str], L2OrderBook]] = None,
+    size: float = 1.0,
+) -> List[Opportunity]:
+    """
+    Vectorized equivalent of identify_opportunities: all candidates are
+    scored in one pass over packed arrays and Opportunity objects are only
+    built for candidates passing the min_spread filter. CompactCandidates
+    are converted back to ArbitrageCandidates for those survivors only.
+
+    With `books` ((platform, market_id) -> L2OrderBook), those markets are
+    priced for executing `size` contracts, fees included; a book too thin
+    for `size` never supplies the best ask.
+    """
+    n = len(candidates)
+    if n == 0:
+        return []
+    asks, bids, group, counts = _pack_candidates(candidates, books, size)
+    net_cost = np.zeros(n)
+    slip_sum = np.zeros(n)
+    if len(asks):
+        # stable sort by (group, ask): the first row of each group is its min ask,
+        # ties resolved to the earliest quote like the scalar loop
+        order = np.lexsort((asks, group))
+        sorted_group = group[order]
+        first = np.empty(len(order), dtype=bool)
+        first[0] = True
+        np.not_equal(sorted_group[1:], sorted_group[:-1], out=first[1:])
+        best = order[first]
+        min_ask = asks[best]
+        owner = np.repeat(np.arange(n), counts)
+        net_cost = np.bincount(owner, weights=min_ask, minlength=n)
+        slip_sum = np.bincount(owner, weights=min_ask - bids[best], minlength=n)
+    executable = np.isfinite(net_cost)
+    spread = np.divide(1.0 - net_cost, net_cost, out=np.zeros(n), where=(net_cost > 0) & executable)
+    # some outcome cannot be filled at the requested size anywhere
+    spread[~executable] = -np.inf
+    slippage = np.divide(slip_sum, counts, out=np.zeros(n), where=counts > 0)
+
+    opportunities: List[Opportunity] = []
+    for i in np.flatnonzero(spread >= settings.min_spread):
+        c = candidates[i]
+        if isinstance(c, CompactCandidate):
+            c = c.to_candidate()
+        opportunities.append(
+            Opportunity.construct(
+                event_key=c.event_key,
+                net_cost=float(net_cost[i]),
+                spread=float(spread[i]),
+                slippage=float(slippage[i]),
+                apy=float(spread[i]),
+                candidate=c,
+            )
+        )
+    return opportunities
@@ -0,0 +1,253 @@
+import math
+import time
+from datetime import timezone
+from typing import Dict, Hashable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models import Settings
+from services.compact import CompactCandidate, CompactQuote
+from services.execution_amm import PoolCache, buy_cost
+from services.opportunity import AnyCandidate, Opportunity
+from services.order_book import L2OrderBook, _fee_from_basis
+
+# (price per contract incl. marginal fee, contracts, platform, market_id, kalshi fee basis per contract)
+_Step = Tuple[float, float, str, str, float]
+
+SECONDS_PER_YEAR = 365 * 86400
+
+
+class SizedOpportunity(Opportunity):
+    """An Opportunity sized against depth: `size` bundles for `capital` dollars."""
+
+    size: float
+    capital: float
+    profit: float
+    # outcome -> [(platform, market_id, contracts, dollars)]
+    legs: Dict[str, List[Tuple[str, str, float, float]]]
+    days_to_resolution: Optional[float] = None
+
+
+def _levels(mq) -> Iterator[Tuple[str, float, float]]:
+    if isinstance(mq, CompactQuote):
+        return mq.levels()
+    return ((outcome, pl.bid, pl.ask) for outcome, pl in mq.outcomes.items())
+
+
+def _close_epoch(mq) -> Optional[float]:
+    close = mq.close_time
+    if close is None or isinstance(close, float):
+        return close
+    if close.tzinfo is None:
+        close = close.replace(tzinfo=timezone.utc)
+    return close.timestamp()
+
+
+class SizeOptimizer:
+    """
+    Sizes each candidate against the depth available on every venue.
+
+    Per outcome, the supply curves of all venues (order-book levels with
+    Kalshi fees, a constant-product pool discretized into steps, or the top
+    ask with `assumed_depth` when nothing deeper is known) are merged into
+    one ascending step curve. Walking the outcome curves together gives the
+    marginal cost of one more complete bundle; bundles are added while that
+    stays below the $1 payout and the capital/size limits allow. Results
+    are cached per event and only re-solved when the candidate's quotes,
+    books or pools change.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        books: Optional[Mapping[Tuple[str, str], L2OrderBook]] = None,
+        pools: Optional[PoolCache] = None,
+        amm_steps: int = 16,
+        gas_cost: float = 0.0,
+        resolve_interval: float = 3600.0,
+    ):
+        self.settings = settings
+        self.books = books if books is not None else {}
+        self.pools = pools
+        self.amm_steps = amm_steps
+        self.gas_cost = gas_cost
+        # cached results are re-solved at least this often, so the APY filter sees time pass
+        self.resolve_interval = resolve_interval
+        self._cache: Dict[str, Tuple[Hashable, Optional[SizedOpportunity]]] = {}
+
+    def _signature(self, cand: AnyCandidate) -> Hashable:
+        parts = []
+        for mq in cand.platform_quotes:
+            book = self.books.get((mq.platform, mq.market_id))
+            pool = self.pools.get(mq.market_id) if self.pools is not None else None
+            parts.append((
+                mq.platform,
+                mq.market_id,
+                tuple(mq.prices) if isinstance(mq, CompactQuote) else tuple(
+                    (o, pl.bid, pl.ask) for o, pl in mq.outcomes.items()
+                ),
+                book.version if book is not None else None,
+                tuple(pool.reserves.values()) if pool is not None else None,
+            ))
+        return tuple(parts)
+
+    def _amm_steps(self, market_id: str, outcome: str, platform: str) -> List[_Step]:
+        pool = self.pools.get(market_id)
+        if outcome not in pool.reserves:
+            return []
+        r_in = pool.reserves[outcome]
+        r_out = next(r for name, r in pool.reserves.items() if name != outcome)
+        cap = self.settings.max_bundle_size or self.settings.max_capital
+        sizes = np.concatenate(([0.0], np.geomspace(1.0, max(cap, 1.0), self.amm_steps)))
+        costs = buy_cost(r_in, r_out, sizes, pool.fee)
+        steps = np.diff(sizes)
+        prices = np.diff(costs) / steps
+        return [(float(p), float(q), platform, market_id, 0.0) for p, q in zip(prices, steps)]
+
+    def _supply(self, cand: AnyCandidate) -> Dict[str, List[_Step]]:
+        curves: Dict[str, List[_Step]] = {}
+        for mq in cand.platform_quotes:
+            book = self.books.get((mq.platform, mq.market_id))
+            pooled = self.pools is not None and self.pools.get(mq.market_id) is not None
+            for outcome, _, ask in _levels(mq):
+                curve = curves.setdefault(outcome, [])
+                if book is not None:
+                    side = book.asks.get(outcome)
+                    if side is None:
+                        # order books only carry Yes/No
+                        continue
+                    for cents, qty in side.levels.items():
+                        basis = cents * (100 - cents)
+                        # marginal fee; the exact rounded fee is settled after the walk
+                        curve.append((cents / 100 + 7 * basis / 1e6, qty, mq.platform, mq.market_id, basis))
+                elif pooled:
+                    curve.extend(self._amm_steps(mq.market_id, outcome, mq.platform))
+                else:
+                    curve.append((ask, self.settings.assumed_depth, mq.platform, mq.market_id, 0.0))
+        for curve in curves.values():
+            curve.sort(key=lambda step: step[0])
+        return curves
+
+    def solve(self, cand: AnyCandidate, now: Optional[float] = None) -> Optional[SizedOpportunity]:
+        """Profit-maximising bundle for one candidate, or None if nothing clears the thresholds."""
+        curves = self._supply(cand)
+        if not curves or any(not c for c in curves.values()):
+            return None
+        outcomes = list(curves)
+        pos = [0] * len(outcomes)
+        left = [curves[o][0][1] for o in outcomes]
+        capital_left = self.settings.max_capital
+        size_left = self.settings.max_bundle_size if self.settings.max_bundle_size is not None else math.inf
+        size = 0.0
+        cost = 0.0
+        # (outcome, platform, market_id) -> [contracts, dollars, kalshi fee basis, approx fee]
+        fills: Dict[Tuple[str, str, str], List[float]] = {}
+        while True:
+            steps = [curves[o][pos[i]] for i, o in enumerate(outcomes)]
+            marginal = sum(step[0] for step in steps)
+            if marginal >= 1.0:
+                break
+            qty = min(min(left), size_left, capital_left / marginal if marginal > 0 else math.inf)
+            if qty <= 0:
+                break
+            for i, (o, step) in enumerate(zip(outcomes, steps)):
+                price, _, platform, market_id, basis = step
+                f = fills.setdefault((o, platform, market_id), [0.0, 0.0, 0.0, 0.0])
+                f[0] += qty
+                f[1] += qty * price
+                f[2] += qty * basis
+                f[3] += qty * 7 * basis / 1e6
+                left[i] -= qty
+            size += qty
+            cost += qty * marginal
+            capital_left -= qty * marginal
+            size_left -= qty
+            if capital_left <= 1e-12 or size_left <= 1e-12:
+                break
+            exhausted = False
+            for i, o in enumerate(outcomes):
+                if left[i] <= 1e-12:
+                    pos[i] += 1
+                    if pos[i] >= len(curves[o]):
+                        exhausted = True
+                        break
+                    left[i] = curves[o][pos[i]][1]
+            if exhausted:
+                break
+        if size <= 0:
+            return None
+
+        # settle Kalshi fees with their per-order rounding, and fixed gas per AMM leg
+        for f in fills.values():
+            if f[2] > 0:
+                exact = _fee_from_basis(f[2])
+                f[1] += exact - f[3]
+                cost += exact - f[3]
+        if self.pools is not None:
+            cost += self.gas_cost * len({m for (_, _, m) in fills if self.pools.get(m) is not None})
+        profit = size - cost
+        if profit <= 0:
+            return None
+        net_cost = cost / size
+        spread = profit / cost
+        # curves are sorted, so their first steps are the top-of-book bundle
+        top = sum(curve[0][0] for curve in curves.values())
+        apy, days = self._annualise(cand, spread, now)
+        if spread < self.settings.min_spread or apy < self.settings.min_apy:
+            return None
+        legs: Dict[str, List[Tuple[str, str, float, float]]] = {}
+        for (o, platform, market_id), f in fills.items():
+            legs.setdefault(o, []).append((platform, market_id, f[0], f[1]))
+        candidate = cand.to_candidate() if isinstance(cand, CompactCandidate) else cand
+        return SizedOpportunity.construct(
+            event_key=cand.event_key,
+            net_cost=net_cost,
+            spread=spread,
+            slippage=net_cost - top,
+            apy=apy,
+            candidate=candidate,
+            size=size,
+            capital=cost,
+            profit=profit,
+            legs=legs,
+            days_to_resolution=days,
+        )
+
+    @staticmethod
+    def _annualise(cand: AnyCandidate, spread: float, now: Optional[float]) -> Tuple[float, Optional[float]]:
+        """(apy, days to resolution) of a bundle with return `spread`."""
+        closes = [c for c in (_close_epoch(mq) for mq in cand.platform_quotes) if c is not None]
+        if not closes:
+            return spread, None
+        now = time.time() if now is None else now
+        # the bundle pays out when the last venue resolves
+        seconds = max(max(closes) - now, 3600.0)
+        return spread * SECONDS_PER_YEAR / seconds, seconds / 86400
+
+    def optimize(self, candidates: Sequence[AnyCandidate], now: Optional[float] = None) -> List[SizedOpportunity]:
+        """
+        Solve every candidate, reusing cached solutions for unchanged ones.
+        Cached solutions get their APY recomputed for `now`, and every entry
+        is re-solved once per `resolve_interval`.
+        """
+        now = time.time() if now is None else now
+        epoch = int(now // self.resolve_interval)
+        results: List[SizedOpportunity] = []
+        for cand in candidates:
+            signature = (self._signature(cand), epoch)
+            cached = self._cache.get(cand.event_key)
+            if cached is not None and cached[0] == signature:
+                result = cached[1]
+                if result is not None:
+                    # with fixed prices APY only rises as resolution nears, so the hit stays valid
+                    result.apy, result.days_to_resolution = self._annualise(cand, result.spread, now)
+            else:
+                result = self.solve(cand, now)
+                self._cache[cand.event_key] = (signature, result)
+            if result is not None:
+                results.append(result)
+        return results
+
+    def forget(self, event_key: str) -> None:
+        """Drop the cached solution of an event that is no longer a candidate."""
+        self._cache.pop(event_key, None)
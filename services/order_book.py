@@ -0,0 +1,216 @@
+import math
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from models import PriceLevel
+
+# Kalshi prices are whole cents 1..99
+TICKS = 99
+_EPS = 1e-9
+
+
+def kalshi_fee(contracts: float, price: float) -> float:
+    """Kalshi trading fee in dollars: ceil(0.07 * C * P * (1 - P)) to the next cent, P in dollars."""
+    cents = round(price * 100)
+    return _fee_from_basis(contracts * cents * (100 - cents))
+
+
+def _fee_from_basis(basis: float) -> float:
+    # 0.07 * C * P * (1 - P) dollars == 7 * C * p * (100 - p) / 10000 cents for p in cents;
+    # round first so float noise cannot push an exact cent up
+    return math.ceil(round(7 * basis / 10000, 6)) / 100
+
+
+class _Fenwick:
+    __slots__ = ("n", "tree", "top")
+
+    def __init__(self, n: int):
+        self.n = n
+        self.tree = [0.0] * (n + 1)
+        self.top = 1 << (n.bit_length() - 1)
+
+    def add(self, i: int, value: float) -> None:
+        while i <= self.n:
+            self.tree[i] += value
+            i += i & -i
+
+    def prefix(self, i: int) -> float:
+        total = 0.0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def lower_bound(self, target: float) -> int:
+        """Smallest i with prefix(i) >= target, or n + 1 if the total falls short."""
+        pos, remaining, step = 0, target, self.top
+        while step:
+            nxt = pos + step
+            if nxt <= self.n and self.tree[nxt] < remaining - _EPS:
+                pos = nxt
+                remaining -= self.tree[nxt]
+            step >>= 1
+        return pos + 1
+
+
+class BookSide:
+    """
+    One side of a price ladder over the 1..99 cent ticks, indexed best-first
+    (ascending prices for asks, descending for bids). Fenwick trees over
+    quantity, notional and the Kalshi fee basis make fill-cost and
+    depth-within-price queries O(log n) in the number of ticks.
+    """
+
+    def __init__(self, ascending: bool):
+        self.ascending = ascending
+        self.levels: Dict[int, float] = {}
+        self._qty = _Fenwick(TICKS)
+        self._notional = _Fenwick(TICKS)
+        self._fee_basis = _Fenwick(TICKS)
+
+    def _index(self, price: int) -> int:
+        return price if self.ascending else 100 - price
+
+    def _price(self, index: int) -> int:
+        return index if self.ascending else 100 - index
+
+    def apply(self, price: int, delta: float) -> None:
+        """Add `delta` contracts at `price` cents (negative to remove)."""
+        if not 1 <= price <= TICKS:
+            raise ValueError(f"Price {price} outside 1..{TICKS} cents")
+        old = self.levels.get(price, 0.0)
+        new = old + delta
+        if new <= _EPS:
+            self.levels.pop(price, None)
+            delta = -old
+        else:
+            self.levels[price] = new
+        i = self._index(price)
+        self._qty.add(i, delta)
+        self._notional.add(i, delta * price)
+        self._fee_basis.add(i, delta * price * (100 - price))
+
+    def set(self, price: int, size: float) -> None:
+        self.apply(price, size - self.levels.get(price, 0.0))
+
+    def depth(self) -> float:
+        return self._qty.prefix(TICKS)
+
+    def best(self) -> Optional[int]:
+        i = self._qty.lower_bound(_EPS * 2)
+        return self._price(i) if i <= TICKS else None
+
+    def fill(self, size: float) -> Optional[Tuple[float, float, int]]:
+        """
+        Walk the ladder for `size` contracts. Returns (notional in cents,
+        fee basis, worst price touched) or None if depth is insufficient.
+        """
+        if size <= 0 or size > self.depth() + _EPS:
+            return None
+        i = self._qty.lower_bound(size)
+        price = self._price(i)
+        part = size - self._qty.prefix(i - 1)
+        notional = self._notional.prefix(i - 1) + part * price
+        basis = self._fee_basis.prefix(i - 1) + part * price * (100 - price)
+        return notional, basis, price
+
+    def size_within(self, price: int) -> float:
+        """Contracts available at `price` or better."""
+        i = min(TICKS, max(0, self._index(price)))
+        return self._qty.prefix(i)
+
+
+class L2OrderBook:
+    """
+    Kalshi depth for one market. Kalshi publishes Yes and No bids only; a No
+    bid at p is a Yes ask at 100 - p, so each update is mirrored into the
+    other outcome's ask ladder.
+    """
+
+    def __init__(self, market_id: str):
+        self.market_id = market_id
+        self.bids: Dict[str, BookSide] = {"Yes": BookSide(ascending=False), "No": BookSide(ascending=False)}
+        self.asks: Dict[str, BookSide] = {"Yes": BookSide(ascending=True), "No": BookSide(ascending=True)}
+        # bumped on every change, so callers can tell whether a cached result is stale
+        self.version = 0
+
+    @staticmethod
+    def _sides(side: str) -> Tuple[str, str]:
+        return ("Yes", "No") if side.lower() == "yes" else ("No", "Yes")
+
+    def apply_level(self, side: str, price: int, delta: float) -> None:
+        outcome, other = self._sides(side)
+        self.version += 1
+        self.bids[outcome].apply(price, delta)
+        self.asks[other].apply(100 - price, delta)
+
+    def apply_snapshot(self, body: Dict[str, Any]) -> None:
+        """Replace the book from an `orderbook_snapshot` message body."""
+        version = self.version
+        self.__init__(self.market_id)
+        self.version = version + 1
+        for side in ("yes", "no"):
+            for price, size in body.get(side) or []:
+                self.apply_level(side, price, size)
+
+    def apply_delta(self, body: Dict[str, Any]) -> None:
+        """Apply an `orderbook_delta` message body (price, delta, side)."""
+        self.apply_level(body["side"], body["price"], body["delta"])
+
+    def buy_cost(self, outcome: str, size: float) -> Optional[Tuple[float, float, float]]:
+        """(notional, fee, worst price) in dollars to buy `size` contracts, or None if too thin."""
+        filled = self.asks[outcome].fill(size)
+        if filled is None:
+            return None
+        notional, basis, worst = filled
+        return notional / 100, _fee_from_basis(basis), worst / 100
+
+    def vwap(self, outcome: str, size: float) -> Optional[float]:
+        cost = self.buy_cost(outcome, size)
+        return None if cost is None else cost[0] / size
+
+    def effective_ask(self, outcome: str, size: float) -> float:
+        """Per-contract cost of buying `size`, fees included; inf if the book is too thin."""
+        cost = self.buy_cost(outcome, size)
+        return math.inf if cost is None else (cost[0] + cost[1]) / size
+
+    def max_size(self, outcome: str, limit_price: float) -> float:
+        """Contracts buyable at or below `limit_price` dollars."""
+        return self.asks[outcome].size_within(math.floor(limit_price * 100 + _EPS))
+
+    def top_of_book(self) -> Dict[str, PriceLevel]:
+        levels: Dict[str, PriceLevel] = {}
+        for outcome in ("Yes", "No"):
+            bid, ask = self.bids[outcome].best(), self.asks[outcome].best()
+            levels[outcome] = PriceLevel(bid=(bid or 0) / 100, ask=(ask or 100) / 100)
+        return levels
+
+
+class KalshiBooks:
+    """
+    L2OrderBooks keyed by ("kalshi", market_ticker), fed from WS orderbook
+    messages. A book starts at its `orderbook_snapshot`: deltas for a market
+    without one (never snapshotted, or `reset` after a gap) are ignored.
+    """
+
+    def __init__(self):
+        self.books: Dict[Tuple[str, str], L2OrderBook] = {}
+
+    def apply(self, message: Dict[str, Any]) -> Optional[L2OrderBook]:
+        kind = message.get("type")
+        body = message.get("msg") or {}
+        ticker = body.get("market_ticker")
+        if not ticker or kind not in ("orderbook_snapshot", "orderbook_delta"):
+            return None
+        book = self.books.get(("kalshi", ticker))
+        if kind == "orderbook_snapshot":
+            if book is None:
+                book = self.books[("kalshi", ticker)] = L2OrderBook(ticker)
+            book.apply_snapshot(body)
+        elif book is not None:
+            book.apply_delta(body)
+        return book
+
+    def reset(self, market_ids: Iterable[str]) -> None:
+        """Drop the books of `market_ids` until their next snapshot."""
+        for ticker in market_ids:
+            self.books.pop(("kalshi", ticker), None)
@@ -1,9 +1,18 @@
+import asyncio
 import json
-from typing import List
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import structlog
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from db.models import Quote
+from db.models import Quote, QuoteTick
 from models import MarketQuote
-from metrics import quotes_ingested
+from metrics import quotes_ingested, quote_rows_skipped, quote_rows_written
+
+logger = structlog.get_logger(__name__)
+
+QUOTE_COLUMNS = ["platform", "event_id", "market_id", "outcomes", "timestamp"]
+QUOTE_TICK_COLUMNS = ["platform", "market_id", "timestamp", "outcome", "event_id", "bid", "ask"]
 
 
 async def save_quotes(quotes: List[MarketQuote], session: AsyncSession) -> None:
@@ -19,3 +28,181 @@ async def save_quotes(quotes: List[MarketQuote], session: AsyncSession) -> None:
         session.add(q)
     await session.commit()
     quotes_ingested.inc(len(quotes))
+
+
+def _outcomes(mq: MarketQuote) -> dict:
+    return {k: {"bid": v.bid, "ask": v.ask} for k, v in mq.outcomes.items()}
+
+
+async def save_quotes_bulk(quotes: List[MarketQuote], session: AsyncSession) -> None:
+    """
+    Persist quotes in one round trip, bypassing the ORM unit of work.
+    Uses COPY on asyncpg and a Core executemany insert on other drivers.
+    """
+    if not quotes:
+        return
+    conn = await session.connection()
+    if conn.dialect.driver == "asyncpg":
+        records: List[Tuple[Any, ...]] = [
+            (mq.platform, mq.event_id, mq.market_id, json.dumps(_outcomes(mq)), mq.timestamp) for mq in quotes
+        ]
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            Quote.__tablename__, records=records, columns=QUOTE_COLUMNS
+        )
+    else:
+        rows = [
+            {
+                "platform": mq.platform,
+                "event_id": mq.event_id,
+                "market_id": mq.market_id,
+                "outcomes": _outcomes(mq),
+                "timestamp": mq.timestamp,
+            }
+            for mq in quotes
+        ]
+        await session.execute(insert(Quote), rows)
+    await session.commit()
+    quotes_ingested.inc(len(quotes))
+
+
+async def save_quote_ticks(quotes: List[MarketQuote], session: AsyncSession) -> None:
+    """Persist quotes into the partitioned quote_ticks layout, one row per outcome."""
+    records: List[Tuple[Any, ...]] = [
+        (mq.platform, mq.market_id, mq.timestamp, outcome, mq.event_id, pl.bid, pl.ask)
+        for mq in quotes
+        for outcome, pl in mq.outcomes.items()
+    ]
+    if not records:
+        return
+    conn = await session.connection()
+    if conn.dialect.driver == "asyncpg":
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            QuoteTick.__tablename__, records=records, columns=QUOTE_TICK_COLUMNS
+        )
+    else:
+        await session.execute(insert(QuoteTick), [dict(zip(QUOTE_TICK_COLUMNS, r)) for r in records])
+    await session.commit()
+    quotes_ingested.inc(len(quotes))
+
+
+class QuoteDeduplicator:
+    """
+    Keeps a hash of the last persisted outcomes per (platform, market_id) and
+    drops quotes that have not moved. If `heartbeat_interval` is set, an
+    unchanged market is still written once every `heartbeat_interval` seconds.
+
+    `filter` only selects quotes; call `commit` with them once the write has
+    succeeded, so a failed write is retried on the next poll.
+    """
+
+    def __init__(self, heartbeat_interval: Optional[float] = None):
+        self.heartbeat_interval = heartbeat_interval
+        self.last: Dict[Tuple[str, str], Tuple[int, float]] = {}
+
+    @staticmethod
+    def _digest(mq: MarketQuote) -> int:
+        return hash(tuple((k, v.bid, v.ask) for k, v in mq.outcomes.items()))
+
+    def filter(self, quotes: List[MarketQuote], now: Optional[float] = None) -> List[MarketQuote]:
+        """Return only the quotes that need to be written."""
+        if now is None:
+            now = time.monotonic()
+        changed: List[MarketQuote] = []
+        for mq in quotes:
+            last = self.last.get((mq.platform, mq.market_id))
+            if (
+                last is not None
+                and last[0] == self._digest(mq)
+                and (self.heartbeat_interval is None or now - last[1] < self.heartbeat_interval)
+            ):
+                continue
+            changed.append(mq)
+        quote_rows_skipped.inc(len(quotes) - len(changed))
+        return changed
+
+    def commit(self, quotes: List[MarketQuote], now: Optional[float] = None) -> None:
+        """Record `quotes` (as returned by `filter`) as persisted."""
+        if now is None:
+            now = time.monotonic()
+        for mq in quotes:
+            self.last[(mq.platform, mq.market_id)] = (self._digest(mq), now)
+        quote_rows_written.inc(len(quotes))
+
+
+class QuoteWriter:
+    """
+    Streams quotes from a bounded queue into bulk inserts, flushing when
+    `flush_size` quotes are buffered or `flush_interval` seconds have passed.
+    Each batch is written with `save`: `save_quotes_bulk` for the legacy
+    `quotes` table, or `save_quote_ticks` for the partitioned layout.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        flush_size: int = 1000,
+        flush_interval: float = 1.0,
+        queue_size: int = 10000,
+        deduplicator: Optional[QuoteDeduplicator] = None,
+        save: Callable[[List[MarketQuote], AsyncSession], Awaitable[None]] = save_quotes_bulk,
+    ):
+        self.session_factory = session_factory
+        self.save = save
+        self.deduplicator = deduplicator
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.queue: "asyncio.Queue[MarketQuote]" = asyncio.Queue(maxsize=queue_size)
+        self._batch: List[MarketQuote] = []
+        self._task = None
+
+    async def put(self, quotes: List[MarketQuote]) -> None:
+        """Enqueue quotes, waiting if the queue is full (back-pressure)."""
+        for q in quotes:
+            await self.queue.put(q)
+
+    async def flush(self, batch: List[MarketQuote]) -> None:
+        if self.deduplicator is not None:
+            batch = self.deduplicator.filter(batch)
+            if not batch:
+                return
+        async with self.session_factory() as session:
+            await self.save(batch, session)
+        if self.deduplicator is not None:
+            self.deduplicator.commit(batch)
+
+    async def run(self) -> None:
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            timeout = deadline - time.monotonic()
+            try:
+                async with asyncio.timeout(max(timeout, 0.0)):
+                    self._batch.append(await self.queue.get())
+                while len(self._batch) < self.flush_size and not self.queue.empty():
+                    self._batch.append(self.queue.get_nowait())
+            except asyncio.TimeoutError:
+                pass
+            if len(self._batch) >= self.flush_size or time.monotonic() >= deadline:
+                if self._batch:
+                    batch, self._batch = self._batch, []
+                    try:
+                        await self.flush(batch)
+                    except Exception:
+                        logger.exception("flush_failed", quotes=len(batch))
+                deadline = time.monotonic() + self.flush_interval
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stop the flush loop and write whatever is still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        remaining, self._batch = self._batch, []
+        while not self.queue.empty():
+            remaining.append(self.queue.get_nowait())
+        for i in range(0, len(remaining), self.flush_size):
+            await self.flush(remaining[i:i + self.flush_size])
@@ -1,19 +1,35 @@
-from typing import Dict, Tuple, List
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Mapping, Set, Tuple
 from pydantic import BaseModel
+from services.compact import CompactQuote, best_bids
 
 
 class Position(BaseModel):
     event_key: str
     outcome: str
+    # negative for a short
     quantity: float
     avg_cost: float
+    realized_pnl: float = 0.0
 
 
 class PortfolioManager:
-    """Tracks positions, computes PnL, and identifies early-exit triggers."""
+    """
+    Tracks positions, computes PnL, and identifies early-exit triggers.
+
+    PnL is maintained incrementally: each position's unrealized PnL is only
+    recomputed when its price or quantity changes, and open positions are
+    kept in a list ordered by PnL so exits above a threshold are found by
+    bisection. Positions are also indexed by event.
+    """
 
     def __init__(self):
         self.positions: Dict[Tuple[str, str], Position] = {}
+        self.prices: Dict[Tuple[str, str], float] = {}
+        self.pnls: Dict[Tuple[str, str], float] = {}
+        self.by_event: Dict[str, Set[Tuple[str, str]]] = {}
+        # (pnl, key) for open positions with a known price, ascending
+        self._ranked: List[Tuple[float, Tuple[str, str]]] = []
 
     def record_fill(
         self,
@@ -23,50 +39,80 @@ class PortfolioManager:
         price: float,
         side: str,
     ) -> None:
-        """Record a fill and update the position."""
+        """
+        Record a fill and update the position. Fills in the position's
+        direction average into avg_cost; opposite fills realize PnL on the
+        closed quantity, and any excess opens the other way at `price`.
+        """
         key = (event_key, outcome)
-        if key not in self.positions:
-            qty = size if side.upper() == "BUY" else -size
-            avg = price if side.upper() == "BUY" else 0.0
-            self.positions[key] = Position(
-                event_key=event_key,
-                outcome=outcome,
-                quantity=qty,
-                avg_cost=avg,
-            )
+        signed = size if side.upper() == "BUY" else -size
+        pos = self.positions.get(key)
+        if pos is None:
+            pos = self.positions[key] = Position(event_key=event_key, outcome=outcome, quantity=0.0, avg_cost=0.0)
+            self.by_event.setdefault(event_key, set()).add(key)
+        qty = pos.quantity
+        if qty * signed >= 0:
+            new_qty = qty + signed
+            pos.avg_cost = (pos.avg_cost * abs(qty) + price * size) / abs(new_qty) if new_qty else 0.0
         else:
-            pos = self.positions[key]
-            if side.upper() == "BUY":
-                new_qty = pos.quantity + size
-                pos.avg_cost = (
-                    (pos.avg_cost * pos.quantity + price * size) / new_qty
-                    if new_qty != 0
-                    else 0.0
-                )
-                pos.quantity = new_qty
-            else:
-                pos.quantity -= size
+            closed = min(size, abs(qty))
+            pos.realized_pnl += (price - pos.avg_cost) * closed * (1 if qty > 0 else -1)
+            new_qty = qty + signed
+            if new_qty * qty < 0:
+                pos.avg_cost = price
+            elif new_qty == 0:
+                pos.avg_cost = 0.0
+        pos.quantity = new_qty
+        self._refresh(key)
+
+    def _refresh(self, key: Tuple[str, str]) -> None:
+        old = self.pnls.pop(key, None)
+        if old is not None:
+            # closed positions keep a pnl entry but are not ranked
+            i = bisect_left(self._ranked, (old, key))
+            if i < len(self._ranked) and self._ranked[i] == (old, key):
+                del self._ranked[i]
+        price = self.prices.get(key)
+        pos = self.positions[key]
+        if price is None:
+            return
+        pnl = (price - pos.avg_cost) * pos.quantity
+        self.pnls[key] = pnl
+        if pos.quantity:
+            insort(self._ranked, (pnl, key))
+
+    def update_prices(self, latest_prices: Mapping[Tuple[str, str], float]) -> Dict[Tuple[str, str], float]:
+        """Apply new prices; returns the PnL of positions whose price changed."""
+        changed: Dict[Tuple[str, str], float] = {}
+        for key, price in latest_prices.items():
+            if key not in self.positions or self.prices.get(key) == price:
+                continue
+            self.prices[key] = price
+            self._refresh(key)
+            changed[key] = self.pnls[key]
+        return changed
 
     def compute_pnls(
         self, latest_prices: Dict[Tuple[str, str], float]
     ) -> Dict[Tuple[str, str], float]:
         """Compute PnL for each position given latest prices."""
-        pnls: Dict[Tuple[str, str], float] = {}
-        for key, pos in self.positions.items():
-            price = latest_prices.get(key)
-            if price is None:
-                continue
-            pnl = (price - pos.avg_cost) * pos.quantity
-            pnls[key] = pnl
-        return pnls
+        self.update_prices(latest_prices)
+        return {key: self.pnls[key] for key in latest_prices if key in self.pnls}
+
+    def mark_to_market(self, quotes: Iterable[CompactQuote]) -> Dict[Tuple[str, str], float]:
+        """Compute PnL marking each position at the best bid across venues."""
+        return self.compute_pnls(best_bids(quotes))
+
+    def event_positions(self, event_key: str) -> List[Position]:
+        return [self.positions[key] for key in self.by_event.get(event_key, ())]
+
+    def realized_pnl(self) -> float:
+        return sum(pos.realized_pnl for pos in self.positions.values())
 
     def get_exits(
         self, latest_prices: Dict[Tuple[str, str], float], threshold: float
     ) -> List[Position]:
-        """Return positions where PnL >= threshold."""
-        exits: List[Position] = []
-        pnls = self.compute_pnls(latest_prices)
-        for key, pnl in pnls.items():
-            if pnl >= threshold:
-                exits.append(self.positions[key])
-        return exits
+        """Return open positions where PnL >= threshold, highest PnL first."""
+        self.update_prices(latest_prices)
+        start = bisect_left(self._ranked, (threshold,))
+        return [self.positions[key] for _, key in reversed(self._ranked[start:])]
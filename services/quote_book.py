@@ -0,0 +1,102 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from models import MarketQuote, QuoteDelta
+
+QuoteKey = Tuple[str, str]
+
+
+class QuoteBook:
+    """
+    Holds the latest MarketQuote per (platform, market_id) and tracks which
+    event_ids changed, so downstream stages only revisit dirty events.
+    """
+
+    def __init__(self):
+        self.quotes: Dict[QuoteKey, MarketQuote] = {}
+        self.events: Dict[str, Set[QuoteKey]] = {}
+        self.dirty: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self.quotes)
+
+    def get(self, platform: str, market_id: str) -> Optional[MarketQuote]:
+        return self.quotes.get((platform, market_id))
+
+    def quotes_for_event(self, event_id: str) -> List[MarketQuote]:
+        """Return the current quotes of every market mapped to `event_id`."""
+        return [self.quotes[key] for key in self.events.get(event_id, ())]
+
+    def upsert(self, quote: MarketQuote) -> Set[str]:
+        """Insert or replace a full quote; return the event_ids it changed."""
+        key = (quote.platform, quote.market_id)
+        old = self.quotes.get(key)
+        self.quotes[key] = quote
+        if old is None:
+            self.events.setdefault(quote.event_id, set()).add(key)
+            changed = {quote.event_id}
+        elif old.event_id != quote.event_id:
+            self._unindex(old.event_id, key)
+            self.events.setdefault(quote.event_id, set()).add(key)
+            changed = {old.event_id, quote.event_id}
+        elif old.outcomes != quote.outcomes:
+            changed = {quote.event_id}
+        else:
+            changed = set()
+        self.dirty |= changed
+        return changed
+
+    def apply_snapshot(self, quotes: Iterable[MarketQuote], platform: str = None) -> Set[str]:
+        """
+        Apply a REST snapshot. When `platform` is given the snapshot is treated
+        as complete for that venue and markets missing from it are removed.
+        """
+        changed: Set[str] = set()
+        seen: Set[QuoteKey] = set()
+        for q in quotes:
+            seen.add((q.platform, q.market_id))
+            changed |= self.upsert(q)
+        if platform is not None:
+            stale = [key for key in self.quotes if key[0] == platform and key not in seen]
+            for key in stale:
+                changed |= self.remove(*key)
+        return changed
+
+    def apply_delta(self, delta: QuoteDelta) -> Set[str]:
+        """Merge a partial outcome update into the stored quote in place."""
+        quote = self.quotes.get((delta.platform, delta.market_id))
+        if quote is None:
+            # no snapshot yet, so the event_id is unknown
+            return set()
+        quote.timestamp = delta.timestamp
+        # unsampled deltas clear the stamp, so a trace never outlives its tick
+        quote.received_at = delta.received_at
+        moved = False
+        for outcome, level in delta.outcomes.items():
+            if quote.outcomes.get(outcome) != level:
+                quote.outcomes[outcome] = level
+                moved = True
+        if not moved:
+            return set()
+        self.dirty.add(quote.event_id)
+        return {quote.event_id}
+
+    def remove(self, platform: str, market_id: str) -> Set[str]:
+        """Drop a market (e.g. delisted); return the event_ids it changed."""
+        key = (platform, market_id)
+        old = self.quotes.pop(key, None)
+        if old is None:
+            return set()
+        self._unindex(old.event_id, key)
+        self.dirty.add(old.event_id)
+        return {old.event_id}
+
+    def drain_dirty(self) -> Set[str]:
+        """Return and reset the event_ids changed since the last drain."""
+        dirty, self.dirty = self.dirty, set()
+        return dirty
+
+    def _unindex(self, event_id: str, key: QuoteKey) -> None:
+        keys = self.events.get(event_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.events[event_id]
@@ -0,0 +1,137 @@
+"""
+Multi-process scoring: events are sharded by a hash of event_id across
+persistent worker processes, each owning a compact MatchIndex for its
+shard, so matching and scoring run off the event loop.
+"""
+import asyncio
+import hashlib
+import multiprocessing
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterable, List, Optional, Tuple, Union
+
+from models import MarketQuote, Settings
+from services.compact import CompactQuote, intern_names
+from services.match import MatchIndex
+from services.opportunity import Opportunity, score_opportunities
+
+# (platform, event_id, market_id, outcome names, timestamp, title, category, close_time)
+_Meta = Tuple[str, str, str, Tuple[str, ...], float, Optional[str], Optional[str], Optional[float]]
+
+# per-process state of a shard worker
+_index: Optional[MatchIndex] = None
+_settings: Optional[Settings] = None
+
+
+def process_shard(event_id: str, shards: int) -> int:
+    """
+    Process owning `event_id`. Deliberately not crc32: broker shards are
+    crc32-based (connectors.broker.shard_for), and a worker only receives
+    events of the broker shards it owns, so a correlated hash would send all
+    of them to a few processes.
+    """
+    if shards <= 1:
+        return 0
+    return int.from_bytes(hashlib.blake2b(event_id.encode(), digest_size=8).digest(), "little") % shards
+
+
+def _init_shard(settings: Settings) -> None:
+    global _index, _settings
+    _index = MatchIndex(compact=True)
+    _settings = settings
+
+
+def _score_batch(shm_name: str, floats: int, meta: List[_Meta]) -> List[Opportunity]:
+    """Upsert a batch whose prices sit in shared memory and score the events it changed."""
+    # the parent owns (and unlinks) the block; workers share its resource tracker
+    shm = SharedMemory(name=shm_name)
+    try:
+        prices = array("d")
+        prices.frombytes(shm.buf[: floats * 8])
+    finally:
+        shm.close()
+    offset = 0
+    for platform, event_id, market_id, names, timestamp, title, category, close_time in meta:
+        end = offset + 2 * len(names)
+        _index.upsert(
+            CompactQuote(
+                platform, event_id, market_id, intern_names(names), prices[offset:end], timestamp, title, category, close_time
+            )
+        )
+        offset = end
+    return score_opportunities(_index.drain(), _settings)
+
+
+def _ready() -> bool:
+    return True
+
+
+class _Shard:
+    def __init__(self, settings: Settings, context):
+        self.pool = ProcessPoolExecutor(1, mp_context=context, initializer=_init_shard, initargs=(settings,))
+        self.shm: Optional[SharedMemory] = None
+        # one batch in flight per shard, so the buffer can be reused
+        self.lock = asyncio.Lock()
+
+    def buffer(self, size: int) -> SharedMemory:
+        if self.shm is None or self.shm.size < size:
+            self.close_buffer()
+            self.shm = SharedMemory(create=True, size=max(size, 4096) * 2)
+        return self.shm
+
+    def close_buffer(self) -> None:
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+
+class ShardedScorer:
+    """
+    Scores quote updates in `shards` worker processes. `submit` routes each
+    quote to the process owning its event (`process_shard`), writes the
+    batch's prices into that shard's shared-memory buffer and sends only the
+    small per-quote metadata through the pipe; the processes upsert into
+    their MatchIndex and score the changed candidates concurrently while the
+    event loop stays free. Opportunities are merged back on the loop.
+    """
+
+    def __init__(self, settings: Settings, shards: int = 4, start_method: str = "spawn"):
+        context = multiprocessing.get_context(start_method)
+        self.shards = [_Shard(settings, context) for _ in range(shards)]
+
+    async def start(self) -> None:
+        """Spawn the worker processes now rather than on the first batch."""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(s.pool, _ready) for s in self.shards))
+
+    async def _submit_shard(self, shard: _Shard, quotes: List[CompactQuote]) -> List[Opportunity]:
+        async with shard.lock:
+            flat = array("d")
+            meta: List[_Meta] = []
+            for q in quotes:
+                flat.extend(q.prices)
+                meta.append((q.platform, q.event_id, q.market_id, q.names, q.timestamp, q.title, q.category, q.close_time))
+            shm = shard.buffer(len(flat) * 8)
+            shm.buf[: len(flat) * 8] = memoryview(flat).cast("B")
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(shard.pool, _score_batch, shm.name, len(flat), meta)
+
+    async def submit(self, quotes: Iterable[Union[MarketQuote, CompactQuote]]) -> List[Opportunity]:
+        """Apply quote updates and return the opportunities among the events they changed."""
+        n = len(self.shards)
+        batches: List[List[CompactQuote]] = [[] for _ in range(n)]
+        for q in quotes:
+            if isinstance(q, MarketQuote):
+                q = CompactQuote.from_market_quote(q)
+            batches[process_shard(q.event_id, n)].append(q)
+        results = await asyncio.gather(
+            *(self._submit_shard(shard, batch) for shard, batch in zip(self.shards, batches) if batch)
+        )
+        return [opp for shard_opps in results for opp in shard_opps]
+
+    def close(self) -> None:
+        for shard in self.shards:
+            shard.pool.shutdown()
+            shard.close_buffer()
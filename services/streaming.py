@@ -0,0 +1,282 @@
+import asyncio
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import structlog
+
+from connectors.codec import loads
+from metrics import (
+    ws_message_lag,
+    ws_messages,
+    ws_parse_errors,
+    ws_updates_coalesced,
+    ws_updates_dropped,
+)
+from models import PriceLevel, QuoteDelta
+from services.order_book import KalshiBooks
+from services.quote_book import QuoteBook
+from tracing import Tracer
+
+logger = structlog.get_logger(__name__)
+
+
+def _binary_outcomes(yes_bid: float, yes_ask: float) -> Dict[str, PriceLevel]:
+    """Yes/No levels from Yes prices in cents; No is the complement of Yes."""
+    return {
+        "Yes": PriceLevel(bid=yes_bid / 100, ask=yes_ask / 100),
+        "No": PriceLevel(bid=(100 - yes_ask) / 100, ask=(100 - yes_bid) / 100),
+    }
+
+
+class KalshiNormalizer:
+    """
+    Turns Kalshi `ticker`, `orderbook_snapshot` and `orderbook_delta`
+    messages into QuoteDeltas. Order book messages are applied to per-market
+    L2 books (`books`, which can be shared with a SizeOptimizer), and each
+    one yields the book's new top of book. Deltas for a market whose book
+    awaits its snapshot yield nothing.
+    """
+
+    venue = "kalshi"
+
+    def __init__(self, books: Optional[KalshiBooks] = None):
+        self.books = books if books is not None else KalshiBooks()
+
+    def parse(self, message: Dict[str, Any]) -> List[QuoteDelta]:
+        kind = message.get("type")
+        body = message.get("msg") or {}
+        market_id = body.get("market_ticker")
+        if not market_id:
+            return []
+        if kind == "ticker":
+            outcomes = _binary_outcomes(body["yes_bid"], body["yes_ask"])
+        elif kind in ("orderbook_snapshot", "orderbook_delta"):
+            book = self.books.apply(message)
+            if book is None:
+                return []
+            outcomes = book.top_of_book()
+        else:
+            return []
+        ts = body.get("ts")
+        timestamp = datetime.fromtimestamp(ts, tz=timezone.utc) if ts else datetime.now(timezone.utc)
+        return [QuoteDelta(platform=self.venue, market_id=market_id, outcomes=outcomes, timestamp=timestamp)]
+
+
+class PolymarketNormalizer:
+    """
+    Turns Polymarket market-channel `book` and `price_change` messages into
+    top-of-book QuoteDeltas. Polymarket quotes per outcome token, so `assets`
+    maps each asset_id to its (market_id, outcome).
+    """
+
+    venue = "polymarket"
+
+    def __init__(self, assets: Dict[str, Tuple[str, str]]):
+        self.assets = assets
+        # asset_id -> (bids, asks) as {price: size}
+        self.books: Dict[str, Tuple[Dict[float, float], Dict[float, float]]] = {}
+
+    def parse(self, message: str) -> List[QuoteDelta]:
+        try:
+            data = loads(message)
+        except ValueError:
+            # control frames such as PONG
+            return []
+        events = data if isinstance(data, list) else [data]
+        deltas: List[QuoteDelta] = []
+        for ev in events:
+            asset_id = ev.get("asset_id")
+            if asset_id not in self.assets:
+                continue
+            kind = ev.get("event_type")
+            if kind == "book":
+                bids = {float(lvl["price"]): float(lvl["size"]) for lvl in ev.get("bids") or ev.get("buys") or []}
+                asks = {float(lvl["price"]): float(lvl["size"]) for lvl in ev.get("asks") or ev.get("sells") or []}
+                self.books[asset_id] = (bids, asks)
+            elif kind == "price_change":
+                bids, asks = self.books.setdefault(asset_id, ({}, {}))
+                for change in ev.get("changes", []):
+                    side = bids if change["side"] == "BUY" else asks
+                    price, size = float(change["price"]), float(change["size"])
+                    if size > 0:
+                        side[price] = size
+                    else:
+                        side.pop(price, None)
+            else:
+                continue
+            bids, asks = self.books[asset_id]
+            market_id, outcome = self.assets[asset_id]
+            ts = ev.get("timestamp")
+            deltas.append(
+                QuoteDelta(
+                    platform=self.venue,
+                    market_id=market_id,
+                    outcomes={outcome: PriceLevel(bid=max(bids, default=0.0), ask=min(asks, default=1.0))},
+                    timestamp=datetime.fromtimestamp(int(ts) / 1000, tz=timezone.utc) if ts else datetime.now(timezone.utc),
+                )
+            )
+        return deltas
+
+
+class CoalescingQueue:
+    """
+    Bounded queue of pending QuoteDeltas keyed by (platform, market_id).
+
+    A new update for a market that is still pending is merged into the pending
+    one (coalesce), so a slow consumer sees the latest prices rather than a
+    backlog; the merged update keeps the earliest receive stamp of a sampled
+    one. When `maxsize` distinct markets are pending, the `drop_oldest`
+    policy evicts the oldest pending market; `block` waits for room instead.
+    """
+
+    def __init__(self, maxsize: int = 10000, overflow: str = "drop_oldest"):
+        if overflow not in ("drop_oldest", "block"):
+            raise ValueError(f"Unknown overflow policy {overflow}")
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.pending: "OrderedDict[Tuple[str, str], QuoteDelta]" = OrderedDict()
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+
+    def qsize(self) -> int:
+        return len(self.pending)
+
+    async def put(self, delta: QuoteDelta) -> None:
+        key = (delta.platform, delta.market_id)
+        while True:
+            pending = self.pending.get(key)
+            if pending is not None:
+                pending.outcomes.update(delta.outcomes)
+                pending.timestamp = delta.timestamp
+                if pending.received_at is None:
+                    pending.received_at = delta.received_at
+                ws_updates_coalesced.labels(delta.platform).inc()
+                return
+            if len(self.pending) < self.maxsize:
+                break
+            if self.overflow == "drop_oldest":
+                _, dropped = self.pending.popitem(last=False)
+                ws_updates_dropped.labels(dropped.platform).inc()
+                break
+            self._not_full.clear()
+            await self._not_full.wait()
+        self.pending[key] = delta
+        self._not_empty.set()
+
+    async def get(self) -> QuoteDelta:
+        while not self.pending:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        _, delta = self.pending.popitem(last=False)
+        self._not_full.set()
+        return delta
+
+
+class SnapshotRecovery:
+    """Resyncs a QuoteBook for specific markets via a targeted REST snapshot."""
+
+    def __init__(self, rest_client: Any, book: QuoteBook):
+        self.rest_client = rest_client
+        self.book = book
+
+    async def __call__(self, market_ids: Set[str]) -> None:
+        quotes = await self.rest_client.fetch_markets(sorted(market_ids))
+        self.book.apply_snapshot(quotes)
+
+
+class KalshiBookRecovery:
+    """
+    Resyncs Kalshi L2 books for specific markets, e.g. after a sequence gap.
+    Their books are dropped, so deltas are ignored until a fresh
+    `orderbook_snapshot` arrives, and the snapshot is re-requested by
+    resubscribing the order book channel. `recover` (e.g. a SnapshotRecovery)
+    then repairs the QuoteBook over REST in the meantime.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        books: KalshiBooks,
+        recover: Optional[Callable[[Set[str]], Awaitable[None]]] = None,
+        channel: str = "orderbook_delta",
+    ):
+        self.client = client
+        self.books = books
+        self.recover = recover
+        self.channel = channel
+
+    async def __call__(self, market_ids: Set[str]) -> None:
+        self.books.reset(market_ids)
+        for channel, market_id in list(self.client.subscriptions):
+            if channel == self.channel and (market_id is None or market_id in market_ids):
+                await self.client.unsubscribe(channel, market_id)
+                await self.client.subscribe(channel, market_id)
+        if self.recover is not None:
+            await self.recover(market_ids)
+
+
+class StreamingPipeline:
+    """
+    Runs WebSocket clients concurrently, normalizes their messages with a
+    per-venue parser and hands QuoteDeltas downstream through a CoalescingQueue.
+    Clients must already be connected and subscribed. With a `tracer`,
+    the deltas of sampled messages are stamped with their receive time,
+    which the QuoteBook carries onto the quotes they update, and their parse
+    time and staleness are observed.
+    """
+
+    def __init__(
+        self,
+        sources: List[Tuple[Any, Any]],
+        queue: Optional[CoalescingQueue] = None,
+        tracer: Optional[Tracer] = None,
+    ):
+        self.sources = sources
+        self.queue = queue if queue is not None else CoalescingQueue()
+        self.tracer = tracer
+        self._tasks: List[asyncio.Task] = []
+
+    async def _consume(self, client: Any, normalizer: Any) -> None:
+        venue = normalizer.venue
+        async for message in client.listen():
+            ws_messages.labels(venue).inc()
+            trace = self.tracer.start() if self.tracer is not None else None
+            try:
+                updates = normalizer.parse(message)
+            except Exception:
+                ws_parse_errors.labels(venue).inc()
+                logger.exception("ws_parse_failed", venue=venue)
+                continue
+            if trace is not None:
+                trace.mark("parse")
+                self.tracer.stamp(trace, updates)
+            now = time.time()
+            for update in updates:
+                ws_message_lag.labels(venue).observe(max(0.0, now - update.timestamp.timestamp()))
+                await self.queue.put(update)
+
+    async def apply_to(self, book: QuoteBook) -> None:
+        """Consume the queue forever, applying each update to `book`."""
+        while True:
+            book.apply_delta(await self.queue.get())
+
+    def start(self) -> None:
+        for client, normalizer in self.sources:
+            self._tasks.append(asyncio.create_task(self._consume(client, normalizer)))
+
+    async def run(self) -> None:
+        """Run until every source's listen() iterator ends."""
+        self.start()
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            self._tasks = []
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
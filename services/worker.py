@@ -0,0 +1,133 @@
+"""
+Scoring worker: consumes quotes from its shard of the quotes topic, matches
+and scores the events they change, and publishes the opportunities.
+
+    BROKER=kafka WORKER_INDEX=0 python -m services.worker
+"""
+import asyncio
+import time
+from typing import List, Optional
+
+import structlog
+from prometheus_client import start_http_server
+
+from connectors.broker import BrokerMessage, Consumer, Publisher, build_consumer, build_publisher
+from connectors.codec import loads
+from logging_config import configure_logging
+from metrics import worker_batch_seconds, worker_consumer_lag, worker_messages_consumed
+from models import MarketQuote, Settings
+from services.match import MatchIndex
+from services.opportunity import Opportunity, score_opportunities
+from services.sharded import ShardedScorer
+from tracing import LoopMonitor, Tracer
+
+logger = structlog.get_logger(__name__)
+
+
+class ScoringWorker:
+    """
+    Quotes are partitioned by event_id, so every quote of an event reaches
+    the same worker and each worker's MatchIndex holds complete candidates
+    for its shard. Each polled batch is upserted, the changed candidates are
+    scored, and the batch is committed only after the opportunities are
+    published, so a crashed worker's replacement (with Redis, the one with
+    the same WORKER_INDEX) re-reads it. With a
+    `scorer`, matching and scoring move to its worker processes. Batches
+    holding quotes stamped by a sampled ingestion trace are timed per stage.
+    """
+
+    def __init__(
+        self,
+        consumer: Consumer,
+        settings: Settings,
+        publisher: Optional[Publisher] = None,
+        max_records: int = 500,
+        poll_timeout: float = 1.0,
+        scorer: Optional[ShardedScorer] = None,
+    ):
+        self.consumer = consumer
+        self.settings = settings
+        self.publisher = publisher
+        self.max_records = max_records
+        self.poll_timeout = poll_timeout
+        self.scorer = scorer
+        self.index = MatchIndex()
+        self._stopping = False
+
+    def _decode(self, message: BrokerMessage) -> Optional[MarketQuote]:
+        try:
+            return MarketQuote.parse_obj(loads(message.value))
+        except Exception:
+            logger.exception("quote_decode_failed", topic=message.topic, partition=message.partition)
+            return None
+
+    async def step(self) -> List[Opportunity]:
+        """Process one polled batch; returns the opportunities it produced."""
+        messages = await self.consumer.poll(self.max_records, self.poll_timeout)
+        if not messages:
+            return []
+        started = time.perf_counter()
+        worker_messages_consumed.labels(self.settings.quotes_topic).inc(len(messages))
+        quotes = [q for q in map(self._decode, messages) if q is not None]
+        trace = Tracer.resume(quotes, started=started)
+        if trace is not None:
+            trace.mark("parse")
+        if self.scorer is not None:
+            opportunities = await self.scorer.submit(quotes)
+        else:
+            for quote in quotes:
+                self.index.upsert(quote)
+            candidates = self.index.drain()
+            if trace is not None:
+                trace.mark("match")
+            opportunities = score_opportunities(candidates, self.settings)
+        if trace is not None:
+            trace.mark("score")
+        if opportunities and self.publisher is not None:
+            await self.publisher.publish_many(self.settings.opportunities_topic, opportunities)
+        if trace is not None:
+            trace.mark("decision")
+        await self.consumer.commit(messages)
+        worker_batch_seconds.observe(time.perf_counter() - started)
+        for partition, lag in (await self.consumer.lag()).items():
+            worker_consumer_lag.labels(self.settings.quotes_topic, str(partition)).set(lag)
+        return opportunities
+
+    async def run(self) -> None:
+        await self.consumer.start()
+        if self.scorer is not None:
+            await self.scorer.start()
+        if self.publisher is not None:
+            await self.publisher.start()
+        try:
+            while not self._stopping:
+                await self.step()
+        finally:
+            await self.consumer.stop()
+            if self.publisher is not None:
+                await self.publisher.stop()
+            if self.scorer is not None:
+                self.scorer.close()
+
+    def stop(self) -> None:
+        """Finish the current batch and exit `run`."""
+        self._stopping = True
+
+
+async def main():
+    configure_logging()
+    settings = Settings()
+    if settings.metrics_port:
+        start_http_server(settings.metrics_port)
+    monitor = LoopMonitor()
+    monitor.start()
+    scorer = ShardedScorer(settings, shards=settings.scoring_processes) if settings.scoring_processes else None
+    worker = ScoringWorker(build_consumer(settings), settings, publisher=build_publisher(settings), scorer=scorer)
+    try:
+        await worker.run()
+    finally:
+        await monitor.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
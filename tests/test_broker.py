@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 import json
 from connectors import broker as broker_module
@@ -7,12 +8,14 @@ class DummyProducer:
         self.started = False
         self.stopped = False
         self.sent = []
+        self.keys = []
 
     async def start(self):
         self.started = True
 
-    async def send_and_wait(self, topic, payload):
+    async def send_and_wait(self, topic, payload, key=None):
         self.sent.append((topic, payload))
+        self.keys.append(key)
 
     async def stop(self):
         self.stopped = True
@@ -42,6 +45,9 @@ async def test_kafka_publisher(monkeypatch):
     await pub.publish("topic1", msg)
     # Expect payload as bytes
     assert dummy.sent == [("topic1", b'{"foo": "bar"}')]
+    # single publishes are keyed by event like publish_many
+    await pub.publish("quotes", {"event_id": "e7", "n": 1})
+    assert dummy.keys == [None, b"e7"]
     await pub.stop()
     assert dummy.stopped
 
@@ -59,3 +65,131 @@ async def test_redis_publisher(monkeypatch):
     assert dummy.published == [("topic2", json.dumps(msg))]
     await pub.stop()
     assert dummy.closed
+
+class BatchingProducer(DummyProducer):
+    def __init__(self):
+        super().__init__()
+        self.pending = []
+        self.peak = 0
+
+    async def send(self, topic, payload, key=None):
+        fut = asyncio.get_running_loop().create_future()
+        self.pending.append(fut)
+        self.peak = max(self.peak, sum(not f.done() for f in self.pending))
+        self.sent.append((topic, payload, key))
+        # the broker acknowledges shortly afterwards
+        asyncio.get_running_loop().call_soon(fut.set_result, None)
+        return fut
+
+class DummyPipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def xadd(self, topic, fields, maxlen=None, approximate=True):
+        self.commands.append(("xadd", topic, fields["data"], maxlen))
+
+    def publish(self, topic, payload):
+        self.commands.append(("publish", topic, payload, None))
+
+    async def execute(self):
+        self.redis.executed.append(self.commands)
+
+class PipelineRedis(DummyRedis):
+    def __init__(self):
+        super().__init__()
+        self.executed = []
+
+    def pipeline(self, transaction=True):
+        return DummyPipeline(self)
+
+@pytest.mark.asyncio
+async def test_kafka_publish_many_keys_and_window(monkeypatch):
+    dummy = BatchingProducer()
+    monkeypatch.setattr(broker_module.aiokafka, 'AIOKafkaProducer', lambda bootstrap_servers, **kw: dummy)
+    pub = broker_module.KafkaPublisher(bootstrap_servers="server1:9092", max_in_flight=3)
+    messages = [{"event_id": f"e{i % 2}", "n": i} for i in range(10)]
+    assert await pub.publish_many("quotes", messages) == 10
+    assert [key for _, _, key in dummy.sent] == [b"e0", b"e1"] * 5
+    assert json.loads(dummy.sent[3][1]) == {"event_id": "e1", "n": 3}
+    assert dummy.peak <= 3
+    assert all(f.done() for f in dummy.pending)
+
+@pytest.mark.asyncio
+async def test_redis_publish_many_streams(monkeypatch):
+    dummy = PipelineRedis()
+    async def dummy_from_url(addr):
+        return dummy
+    monkeypatch.setattr(broker_module.aioredis, 'from_url', dummy_from_url)
+    pub = broker_module.RedisPublisher(address="redis://localhost:6379", streams=True, maxlen=1000, batch_size=4)
+    await pub.start()
+    assert await pub.publish_many("quotes", [{"n": i} for i in range(10)]) == 10
+    assert [len(batch) for batch in dummy.executed] == [4, 4, 2]
+    op, topic, payload, maxlen = dummy.executed[0][1]
+    assert (op, topic, maxlen) == ("xadd", "quotes", 1000)
+    assert json.loads(payload) == {"n": 1}
+
+class StreamsRedis:
+    """Consumer-group subset of Redis Streams: entries, last-delivered id and per-consumer pending lists."""
+
+    def __init__(self):
+        self.entries = {}
+        self.delivered = {}
+        self.pending = {}
+
+    def add(self, stream, n):
+        log = self.entries.setdefault(stream, [])
+        entry_id = f"{len(log) + 1}-0".encode()
+        log.append((entry_id, {b"data": json.dumps({"n": n}).encode()}))
+
+    async def xgroup_create(self, stream, group, id="0", mkstream=False):
+        self.entries.setdefault(stream, [])
+        self.delivered.setdefault(stream, 0)
+
+    async def xreadgroup(self, group, name, streams, count=None, block=None):
+        pel = self.pending.setdefault(name, [])
+        response = []
+        for stream, after in streams.items():
+            log = self.entries[stream]
+            if after == ">":
+                batch = log[self.delivered[stream]:][:count]
+                self.delivered[stream] += len(batch)
+                pel.extend((stream, entry_id) for entry_id, _ in batch)
+                if batch:
+                    response.append([stream.encode(), batch])
+            else:
+                after = 0 if after == "0" else int(after.split(b"-")[0])
+                ids = [i for s, i in pel if s == stream and int(i.split(b"-")[0]) > after][:count]
+                response.append([stream.encode(), [e for e in log if e[0] in ids]])
+        return response
+
+    async def xack(self, stream, group, *ids):
+        for name, pel in self.pending.items():
+            self.pending[name] = [(s, i) for s, i in pel if not (s == stream and i in ids)]
+
+    async def close(self):
+        pass
+
+@pytest.mark.asyncio
+async def test_redis_consumer_redelivers_pending_after_restart(monkeypatch):
+    redis = StreamsRedis()
+    async def from_url(addr):
+        return redis
+    monkeypatch.setattr(broker_module.aioredis, 'from_url', from_url)
+    stream = broker_module.shard_stream("quotes", 0, 1)
+
+    crashed = broker_module.RedisStreamConsumer("redis://", "quotes", "workers", "worker-0")
+    await crashed.start()
+    for n in range(3):
+        redis.add(stream, n)
+    assert len(await crashed.poll(timeout=0)) == 3
+    # dies before committing; its replacement re-reads the pending entries first
+    redis.add(stream, 3)
+    worker = broker_module.RedisStreamConsumer("redis://", "quotes", "workers", "worker-0")
+    await worker.start()
+    replayed = await worker.poll(max_records=2, timeout=0)
+    assert [json.loads(m.value)["n"] for m in replayed] == [0, 1]
+    replayed += await worker.poll(max_records=2, timeout=0)
+    assert [json.loads(m.value)["n"] for m in replayed] == [0, 1, 2]
+    await worker.commit(replayed)
+    assert [json.loads(m.value)["n"] for m in await worker.poll(timeout=0)] == [3]
@@ -0,0 +1,48 @@
+import pytest
+from datetime import datetime, timezone
+from models import MarketQuote, PriceLevel
+from services.compact import CompactCandidate, CompactQuote, best_bids
+from services.position import PortfolioManager
+
+
+def create_quote(platform: str, market_id: str, yes_bid: float, no_bid: float) -> MarketQuote:
+    return MarketQuote(
+        platform=platform,
+        event_id="e1",
+        market_id=market_id,
+        outcomes={"Yes": PriceLevel(bid=yes_bid, ask=yes_bid + 0.02), "No": PriceLevel(bid=no_bid, ask=no_bid + 0.02)},
+        timestamp=datetime(2025, 4, 1, 12, tzinfo=timezone.utc),
+        title="Fed cuts in June?",
+        close_time=datetime(2025, 6, 18, tzinfo=timezone.utc),
+    )
+
+
+def test_round_trip_and_shared_names():
+    q = create_quote("kalshi", "m1", 0.4, 0.5)
+    a = CompactQuote.from_market_quote(q)
+    b = CompactQuote.from_market_quote(create_quote("polymarket", "m2", 0.41, 0.5))
+    assert a.names is b.names
+    assert [name for name, _, _ in a.levels()] == ["Yes", "No"]
+    assert list(a.prices) == pytest.approx([0.4, 0.42, 0.5, 0.52])
+    assert a.to_market_quote() == q
+    assert not a.same_prices(b)
+    assert a.same_prices(CompactQuote.from_market_quote(q))
+
+
+def test_naive_timestamps_are_utc():
+    q = create_quote("kalshi", "m1", 0.4, 0.5)
+    naive = q.copy(update={"timestamp": datetime(2025, 4, 1, 12)})
+    assert CompactQuote.from_market_quote(naive).timestamp == CompactQuote.from_market_quote(q).timestamp
+
+
+def test_candidate_conversion_and_portfolio_marks():
+    quotes = [
+        CompactQuote.from_market_quote(create_quote("kalshi", "m1", 0.4, 0.5)),
+        CompactQuote.from_market_quote(create_quote("polymarket", "m2", 0.45, 0.48)),
+    ]
+    cand = CompactCandidate("e1", quotes).to_candidate()
+    assert [q.market_id for q in cand.platform_quotes] == ["m1", "m2"]
+    assert best_bids(quotes) == {("e1", "Yes"): 0.45, ("e1", "No"): 0.5}
+    manager = PortfolioManager()
+    manager.record_fill("e1", "Yes", size=10, price=0.35, side="BUY")
+    assert manager.mark_to_market(quotes)[("e1", "Yes")] == pytest.approx((0.45 - 0.35) * 10)
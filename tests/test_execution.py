@@ -0,0 +1,147 @@
+import asyncio
+import pytest
+from datetime import datetime
+from models import ArbitrageCandidate, MarketQuote, PriceLevel
+from services.execution import ExecutionCoordinator, plan_legs
+from services.opportunity import Opportunity
+from services.position import PortfolioManager
+
+
+class FakeVenue:
+    def __init__(self, fill_ratio=1.0, delay=0.0, fail=False, report_fill=True, cancel_fill=None):
+        self.fill_ratio = fill_ratio
+        self.delay = delay
+        self.fail = fail
+        # acks without filled_size; the cancel then reports cancel_fill
+        self.report_fill = report_fill
+        self.cancel_fill = cancel_fill
+        self.orders = []
+        self.cancels = []
+
+    async def place_order(self, market_id, outcome, side, price, size):
+        self.orders.append((market_id, outcome, side, price, size))
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("rejected")
+        # unwinds always fill
+        filled = size if side == "SELL" else size * self.fill_ratio
+        if not self.report_fill and side == "BUY":
+            return {"order_id": f"o{len(self.orders)}"}
+        return {"order_id": f"o{len(self.orders)}", "filled_size": filled, "avg_price": price}
+
+    async def cancel_order(self, order_id):
+        self.cancels.append(order_id)
+        if self.cancel_fill is not None:
+            return {"cancelled": order_id, "filled_size": self.cancel_fill}
+        return {"cancelled": order_id}
+
+
+def make_opportunity() -> Opportunity:
+    now = datetime.utcnow()
+    kalshi = MarketQuote(platform="kalshi", event_id="e1", market_id="k1",
+                         outcomes={"Yes": PriceLevel(bid=0.38, ask=0.40), "No": PriceLevel(bid=0.55, ask=0.60)}, timestamp=now)
+    poly = MarketQuote(platform="polymarket", event_id="e1", market_id="p1",
+                       outcomes={"Yes": PriceLevel(bid=0.42, ask=0.45), "No": PriceLevel(bid=0.48, ask=0.50)}, timestamp=now)
+    cand = ArbitrageCandidate(event_key="e1", platform_quotes=[kalshi, poly])
+    return Opportunity(event_key="e1", net_cost=0.9, spread=0.11, slippage=0.02, apy=0.11, candidate=cand)
+
+
+def test_plan_legs_buys_each_outcome_at_best_ask():
+    legs = plan_legs(make_opportunity(), size=10)
+    assert [(l.platform, l.outcome, l.price) for l in legs] == [("kalshi", "Yes", 0.40), ("polymarket", "No", 0.50)]
+
+
+@pytest.mark.asyncio
+async def test_all_legs_fill_and_are_recorded():
+    kalshi, poly = FakeVenue(delay=0.01), FakeVenue()
+    portfolio = PortfolioManager()
+    coord = ExecutionCoordinator({"kalshi": kalshi, "polymarket": poly}, portfolio)
+    result = await coord.execute(make_opportunity(), size=10)
+    assert result.status == "filled" and result.unwinds == []
+    assert portfolio.positions[("e1", "Yes")].quantity == 10
+    assert portfolio.positions[("e1", "No")].avg_cost == pytest.approx(0.50)
+    # both legs were in flight together, so skew is about the slower leg's delay
+    assert result.skew < 0.05
+
+
+@pytest.mark.asyncio
+async def test_partial_fill_cancels_remainder_and_unwinds_excess():
+    kalshi, poly = FakeVenue(), FakeVenue(fill_ratio=0.4)
+    portfolio = PortfolioManager()
+    coord = ExecutionCoordinator({"kalshi": kalshi, "polymarket": poly}, portfolio)
+    result = await coord.execute(make_opportunity(), size=10)
+    assert result.status == "partial"
+    assert poly.cancels == ["o1"]
+    # 6 excess Yes sold back on kalshi at its bid
+    assert kalshi.orders[-1] == ("k1", "Yes", "SELL", 0.38, 6)
+    assert portfolio.positions[("e1", "Yes")].quantity == pytest.approx(4)
+    assert portfolio.positions[("e1", "No")].quantity == pytest.approx(4)
+
+
+@pytest.mark.asyncio
+async def test_failed_or_slow_leg_unwinds_everything():
+    kalshi = FakeVenue()
+    for poly in (FakeVenue(fail=True), FakeVenue(delay=1.0)):
+        portfolio = PortfolioManager()
+        coord = ExecutionCoordinator({"kalshi": kalshi, "polymarket": poly}, portfolio, deadline=0.05)
+        result = await coord.execute(make_opportunity(), size=5)
+        assert result.status == "unwound"
+        assert result.fills[1].error is not None
+        assert [u.leg.side for u in result.unwinds] == ["SELL"]
+        assert portfolio.positions[("e1", "Yes")].quantity == 0
+
+
+@pytest.mark.asyncio
+async def test_ack_without_fill_size_is_not_a_fill():
+    kalshi, poly = FakeVenue(), FakeVenue(report_fill=False)
+    portfolio = PortfolioManager()
+    coord = ExecutionCoordinator({"kalshi": kalshi, "polymarket": poly}, portfolio)
+    result = await coord.execute(make_opportunity(), size=5)
+    assert poly.cancels == ["o1"]
+    assert result.status == "unwound"
+    assert ("e1", "No") not in portfolio.positions
+
+
+@pytest.mark.asyncio
+async def test_late_leg_is_cancelled_and_reconciled():
+    kalshi = FakeVenue()
+    poly = FakeVenue(delay=0.1, report_fill=False, cancel_fill=5)
+    portfolio = PortfolioManager()
+    coord = ExecutionCoordinator({"kalshi": kalshi, "polymarket": poly}, portfolio, deadline=0.05, ack_timeout=1.0)
+    result = await coord.execute(make_opportunity(), size=5)
+    # the late order is cancelled at the venue and its fills kept hedged
+    assert poly.cancels == ["o1"]
+    assert result.fills[1].error == "deadline exceeded"
+    assert result.status == "filled" and result.unwinds == []
+    assert portfolio.positions[("e1", "No")].quantity == 5
+
+
+@pytest.mark.asyncio
+async def test_traced_opportunity_records_tick_to_trade():
+    from prometheus_client import REGISTRY
+    from datetime import timezone
+
+    opp = make_opportunity()
+    trigger = opp.candidate.platform_quotes[1]
+    trigger.received_at = datetime.now(timezone.utc)
+    before = REGISTRY.get_sample_value("tick_to_trade_seconds_count") or 0.0
+    coordinator = ExecutionCoordinator({"kalshi": FakeVenue(), "polymarket": FakeVenue()}, PortfolioManager())
+    await coordinator.execute(opp, size=1, trigger=trigger)
+    assert REGISTRY.get_sample_value("tick_to_trade_seconds_count") == before + 1
+    assert REGISTRY.get_sample_value("tick_stage_seconds_count", {"stage": "order_ack"}) >= 1
+
+
+@pytest.mark.asyncio
+async def test_stale_sampled_leg_does_not_trace_an_unsampled_trigger():
+    from prometheus_client import REGISTRY
+    from datetime import timedelta, timezone
+
+    opp = make_opportunity()
+    stale, trigger = opp.candidate.platform_quotes
+    # sampled half an hour ago and not updated since
+    stale.received_at = datetime.now(timezone.utc) - timedelta(minutes=30)
+    before = REGISTRY.get_sample_value("tick_to_trade_seconds_count") or 0.0
+    coordinator = ExecutionCoordinator({"kalshi": FakeVenue(), "polymarket": FakeVenue()}, PortfolioManager())
+    await coordinator.execute(opp, size=1, trigger=trigger)
+    await coordinator.execute(opp, size=1)
+    assert (REGISTRY.get_sample_value("tick_to_trade_seconds_count") or 0.0) == before
@@ -1,7 +1,8 @@
+import numpy as np
 import pytest
 from datetime import datetime
 from models import MarketQuote, PriceLevel
-from services.execution_amm import PolymarketAmmExecutor
+from services.execution_amm import PolymarketAmmExecutor, PoolCache, buy_cost, shares_for
 
 
 def create_quote(platform: str, event_id: str, outcomes: dict) -> MarketQuote:
@@ -34,3 +35,86 @@ def test_simulate_swap_invalid_outcome():
     executor = PolymarketAmmExecutor(rpc_url="http://test", max_slippage=0.1)
     with pytest.raises(ValueError):
         executor.simulate_swap(quote, "No", amount=5)
+
+
+def test_buy_cost_closed_form_keeps_product_and_vectorizes():
+    r_in, r_out, fee = 100.0, 300.0, 0.02
+    sizes = np.array([1.0, 10.0, 50.0])
+    costs = buy_cost(r_in, r_out, sizes, fee)
+    invested = costs * (1 - fee)
+    # reserves after the trade keep the constant product
+    assert np.allclose((r_in + invested - sizes) * (r_out + invested), r_in * r_out)
+    assert np.allclose(shares_for(r_in, r_out, invested), sizes)
+    # tiny trades pay the spot price r_out / (r_in + r_out), plus the fee
+    assert buy_cost(r_in, r_out, 1e-6) / 1e-6 == pytest.approx(0.75, rel=1e-5)
+    # average price rises with size
+    assert np.all(np.diff(costs / sizes) > 0)
+
+
+def test_simulate_swap_uses_cached_pool():
+    pools = PoolCache()
+    pools.update("e1_polymarket", {"Yes": 100.0, "No": 100.0}, fee=0.0)
+    quote = create_quote("polymarket", "e1", {"Yes": (0.45, 0.5)})
+    executor = PolymarketAmmExecutor(rpc_url="http://test", max_slippage=0.1, pools=pools, gas_cost=0.05)
+    result = executor.simulate_swap(quote, "Yes", amount=10)
+    assert result["cost"] == pytest.approx(buy_cost(100.0, 100.0, 10))
+    assert result["slippage"] > 0
+    assert result["total_cost"] == pytest.approx(result["cost"] * 1.1 + 0.05)
+    # a trade moves the pool incrementally
+    pools.apply_trade("e1_polymarket", "Yes", shares=10, invested=result["cost"])
+    assert executor.cost_ladder("e1_polymarket", "Yes", np.array([1.0]))[0] > buy_cost(100.0, 100.0, 1.0)
+
+
+def test_optimal_size_equates_marginal_cost_with_edge():
+    pools = PoolCache()
+    pools.update("m", {"Yes": 1000.0, "No": 1000.0}, fee=0.01)
+    executor = PolymarketAmmExecutor(rpc_url="http://test", max_slippage=0.0, pools=pools)
+    size, profit = executor.optimal_size("m", "Yes", hedge_price=0.4)
+    sizes = np.linspace(1, 2000, 20000)
+    ladder = sizes * 0.6 - executor.cost_ladder("m", "Yes", sizes)
+    assert profit == pytest.approx(ladder.max(), rel=1e-4)
+    assert size == pytest.approx(sizes[ladder.argmax()], rel=1e-2)
+    # no edge, no trade; capital caps the size
+    assert executor.optimal_size("m", "Yes", hedge_price=0.5) == (0.0, 0.0)
+    assert executor.optimal_size("m", "Yes", hedge_price=0.4, max_size=10)[0] == 10
+
+
+def test_size_opportunity_hedges_with_other_venue():
+    from models import ArbitrageCandidate
+    from services.opportunity import Opportunity
+
+    pools = PoolCache()
+    pools.update("e1_polymarket", {"Yes": 1000.0, "No": 1000.0}, fee=0.0)
+    poly = create_quote("polymarket", "e1", {"Yes": (0.48, 0.5), "No": (0.48, 0.5)})
+    kalshi = create_quote("kalshi", "e1", {"Yes": (0.5, 0.55), "No": (0.38, 0.4)})
+    cand = ArbitrageCandidate(event_key="e1", platform_quotes=[poly, kalshi])
+    opp = Opportunity(event_key="e1", net_cost=0.9, spread=0.11, slippage=0.02, apy=0.11, candidate=cand)
+    executor = PolymarketAmmExecutor(rpc_url="http://test", max_slippage=0.0, pools=pools)
+    assert executor.size_opportunity(opp) == executor.optimal_size("e1_polymarket", "Yes", hedge_price=0.4)
+
+
+@pytest.mark.asyncio
+async def test_place_order_routes_to_client_and_moves_pool():
+    class FakeClient:
+        def __init__(self):
+            self.orders = []
+
+        async def place_order(self, market_id, outcome, side, price, size):
+            self.orders.append((market_id, outcome, side, price, size))
+            return {"order_id": "o1", "filled_size": size, "avg_price": 0.52}
+
+        async def cancel_order(self, order_id):
+            return {"order_id": order_id, "filled_size": 0}
+
+    pools = PoolCache()
+    pools.update("m", {"Yes": 100.0, "No": 100.0}, fee=0.0)
+    client = FakeClient()
+    executor = PolymarketAmmExecutor(rpc_url="http://test", max_slippage=0.0, pools=pools, client=client)
+    resp = await executor.place_order("m", "Yes", "BUY", 0.6, 10)
+    assert resp["filled_size"] == 10 and client.orders == [("m", "Yes", "BUY", 0.6, 10)]
+    assert pools.get("m").reserves == pytest.approx({"Yes": 95.2, "No": 105.2})
+    # the pool's average cost exceeds the limit: rejected before sending
+    with pytest.raises(ValueError):
+        await executor.place_order("m", "Yes", "BUY", 0.5, 10)
+    assert len(client.orders) == 1
+    assert (await executor.cancel_order("o1"))["filled_size"] == 0
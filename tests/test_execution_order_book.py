@@ -32,3 +32,17 @@ async def test_cancel_order():
     result = await executor.cancel_order("o1")
     assert client.cancellations == ["o1"]
     assert result == {"cancelled": "o1"}
+
+def test_price_order_walks_depth():
+    from services.order_book import L2OrderBook
+
+    book = L2OrderBook("m1")
+    book.apply_level("no", 60, 5)
+    book.apply_level("no", 55, 5)
+    executor = KalshiOrderBookExecutor(DummyClient(), fee_rate=0.0)
+    priced = executor.price_order(book, "Yes", 10)
+    assert priced["vwap"] == pytest.approx(0.425)
+    assert priced["limit_price"] == pytest.approx(0.45)
+    assert priced["total_cost"] == pytest.approx(4.25 + priced["fee"])
+    with pytest.raises(ValueError):
+        executor.price_order(book, "Yes", 11)
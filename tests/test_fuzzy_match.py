@@ -0,0 +1,65 @@
+import pytest
+from datetime import datetime, timedelta
+from models import MarketQuote, PriceLevel
+from services.fuzzy_match import FuzzyMatcher, levenshtein_ratio, tokenize
+
+CLOSE = datetime(2025, 11, 5)
+
+
+def create_quote(platform: str, market_id: str, title: str, event_id: str = None, close_time: datetime = CLOSE, category: str = None) -> MarketQuote:
+    return MarketQuote(
+        platform=platform,
+        event_id=event_id or f"{platform}_{market_id}",
+        market_id=market_id,
+        outcomes={"Yes": PriceLevel(bid=0.4, ask=0.5)},
+        timestamp=datetime.utcnow(),
+        title=title,
+        category=category,
+        close_time=close_time,
+    )
+
+
+def test_tokenize_and_levenshtein():
+    assert tokenize("Will the Fed cut rates in 2025?") == {"fed", "cut", "rates", "2025"}
+    assert levenshtein_ratio("kitten", "sitting") == pytest.approx(1 - 3 / 7)
+    assert levenshtein_ratio("abc", "abc") == 1.0
+
+
+def test_matches_similar_titles_across_venues():
+    quotes = [
+        create_quote("kalshi", "k1", "Will the Fed cut rates in December 2025?"),
+        create_quote("polymarket", "p1", "Fed cuts rates in December 2025?"),
+        create_quote("polymarket", "p2", "Will Bitcoin close above 100k in 2025?"),
+    ]
+    matcher = FuzzyMatcher(threshold=0.7)
+    candidates = matcher.match(quotes)
+    assert len(candidates) == 1
+    assert {q.market_id for q in candidates[0].platform_quotes} == {"k1", "p1"}
+
+
+def test_filters_on_close_time_and_category():
+    matcher = FuzzyMatcher(threshold=0.7, time_window=timedelta(days=1))
+    quotes = [
+        create_quote("kalshi", "k1", "Fed cuts rates in December 2025", category="economics"),
+        create_quote("polymarket", "p1", "Fed cuts rates in December 2025", close_time=CLOSE + timedelta(days=30)),
+        create_quote("polymarket", "p2", "Fed cuts rates in December 2025", category="sports"),
+    ]
+    assert matcher.match(quotes) == []
+
+
+def test_cache_skips_rescoring_unchanged_markets(tmp_path):
+    path = str(tmp_path / "matches.json")
+    quotes = [
+        create_quote("kalshi", "k1", "Fed cuts rates in December 2025"),
+        create_quote("polymarket", "p1", "Fed cuts rates in December 2025?"),
+    ]
+    matcher = FuzzyMatcher(cache_path=path)
+    assert matcher.update(quotes) == 2
+    matcher.save()
+
+    reloaded = FuzzyMatcher(cache_path=path)
+    changed = create_quote("kalshi", "k2", "Bitcoin above 100k by June 2025")
+    assert reloaded.update(quotes + [changed]) == 1
+    candidates = reloaded.match(quotes + [changed])
+    assert len(candidates) == 1
+    assert {q.market_id for q in candidates[0].platform_quotes} == {"k1", "p1"}
@@ -0,0 +1,176 @@
+import asyncio
+import pytest
+from datetime import datetime
+from models import MarketQuote, PriceLevel
+from services.ingestion import IngestionScheduler
+
+
+class FakeConnector:
+    def __init__(self, platform, delay=0.0, fail=False):
+        self.platform = platform
+        self.delay = delay
+        self.fail = fail
+        self.polls = 0
+        self.since = []
+
+    async def fetch_raw(self):
+        self.polls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("venue down")
+        return [f"{self.platform}_m{self.polls}"]
+
+    async def fetch_pages(self, updated_since=None):
+        self.since.append(updated_since)
+        yield await self.fetch_raw()
+
+    def normalize(self, data):
+        return [
+            MarketQuote(
+                platform=self.platform,
+                event_id="e1",
+                market_id=market_id,
+                outcomes={"Yes": PriceLevel(bid=0.4, ask=0.5)},
+                timestamp=datetime.utcnow(),
+            )
+            for market_id in data
+        ]
+
+
+class DummySession:
+    def __init__(self, store):
+        self.store = store
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def add(self, item):
+        self.store.append(item)
+
+    async def commit(self):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_slow_venue_does_not_stall_fast_venue():
+    stored = []
+    fast = FakeConnector("kalshi")
+    slow = FakeConnector("polymarket", delay=10.0)
+    scheduler = IngestionScheduler(
+        connectors=[(fast, 0.01), (slow, 0.01)],
+        session_factory=lambda: DummySession(stored),
+    )
+    await scheduler.run(duration=0.1)
+    platforms = {q.platform for q in stored}
+    assert platforms == {"kalshi"}
+    assert fast.polls > 1
+    assert slow.polls == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_poll_keeps_scheduler_running():
+    stored = []
+    good = FakeConnector("kalshi")
+    bad = FakeConnector("polymarket", fail=True)
+    scheduler = IngestionScheduler(
+        connectors=[(good, 0.01), (bad, 0.01)],
+        session_factory=lambda: DummySession(stored),
+    )
+    await scheduler.run(duration=0.05)
+    assert bad.polls > 1
+    assert stored and all(q.platform == "kalshi" for q in stored)
+    assert scheduler._tasks == []
+
+
+@pytest.mark.asyncio
+async def test_incremental_polls_pass_updated_since():
+    stored = []
+    conn = FakeConnector("kalshi")
+    scheduler = IngestionScheduler(
+        connectors=[(conn, 0.01)],
+        session_factory=lambda: DummySession(stored),
+        incremental=True,
+    )
+    await scheduler.run(duration=0.05)
+    assert conn.since[0] is None
+    assert len(conn.since) > 1 and all(isinstance(s, datetime) for s in conn.since[1:])
+
+
+class ListPublisher:
+    def __init__(self):
+        self.published = []
+
+    async def publish_many(self, topic, messages):
+        messages = list(messages)
+        self.published.append((topic, messages))
+        return len(messages)
+
+
+@pytest.mark.asyncio
+async def test_persisted_quotes_are_published():
+    stored = []
+    publisher = ListPublisher()
+    scheduler = IngestionScheduler(
+        connectors=[(FakeConnector("kalshi"), 0.01)],
+        session_factory=lambda: DummySession(stored),
+        publisher=publisher,
+        topic="quotes",
+    )
+    await scheduler.run(duration=0.05)
+    published = [q for topic, qs in publisher.published for q in qs]
+    assert {topic for topic, _ in publisher.published} == {"quotes"}
+    assert [q.market_id for q in published] == [q.market_id for q in stored]
+
+
+@pytest.mark.asyncio
+async def test_failed_persist_is_not_deduplicated():
+    from services.persistence import QuoteDeduplicator
+
+    class SameMarket(FakeConnector):
+        async def fetch_raw(self):
+            self.polls += 1
+            return ["m"]
+
+    stored, attempts = [], []
+
+    async def flaky_persist(quotes, session):
+        attempts.append(len(quotes))
+        if len(attempts) == 1:
+            raise RuntimeError("db down")
+        for q in quotes:
+            session.add(q)
+
+    scheduler = IngestionScheduler(
+        connectors=[(SameMarket("kalshi"), 0.01)],
+        session_factory=lambda: DummySession(stored),
+        persist=flaky_persist,
+        deduplicator=QuoteDeduplicator(),
+    )
+    await scheduler.run(duration=0.05)
+    # the unchanged quote is written once, after the failed attempt
+    assert attempts[:2] == [1, 1]
+    assert [q.market_id for q in stored] == ["m"]
+
+
+@pytest.mark.asyncio
+async def test_writer_batches_and_flushes_on_stop():
+    from services.persistence import QuoteWriter
+
+    flushes = []
+
+    class RecordingWriter(QuoteWriter):
+        async def flush(self, batch):
+            flushes.append([q.market_id for q in batch])
+
+    writer = RecordingWriter(lambda: None, flush_size=1000, flush_interval=60.0)
+    scheduler = IngestionScheduler(
+        connectors=[(FakeConnector("kalshi"), 0.01)],
+        session_factory=lambda: None,
+        writer=writer,
+    )
+    await scheduler.run(duration=0.05)
+    # nothing reached the size or interval, so everything is written on stop
+    assert len(flushes) == 1 and len(flushes[0]) > 1
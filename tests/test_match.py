@@ -2,15 +2,15 @@ import pytest
 from datetime import datetime
 
 from models import MarketQuote, PriceLevel
-from services.match import match_quotes
+from services.match import match_quotes, MatchIndex
 
 
-def create_quote(event_id: str, platform: str, bid: float = 0.5, ask: float = 0.6) -> MarketQuote:
+def create_quote(event_id: str, platform: str, bid: float = 0.5, ask: float = 0.6, market_id: str = None) -> MarketQuote:
     outcomes = {"Yes": PriceLevel(bid=bid, ask=ask)}
     return MarketQuote(
         platform=platform,
         event_id=event_id,
-        market_id=f"m_{platform}",
+        market_id=market_id or f"m_{platform}",
         outcomes=outcomes,
         timestamp=datetime.utcnow(),
     )
@@ -40,3 +40,80 @@ def test_multiple_events():
     candidates = match_quotes([q1, q2, q3, q4])
     keys = {c.event_key for c in candidates}
     assert keys == {"e3"}
+
+
+def test_match_index_matches_match_quotes():
+    quotes = [
+        create_quote("e3", "kalshi", market_id="k3"),
+        create_quote("e3", "polymarket", market_id="p3"),
+        create_quote("e4", "kalshi", market_id="k4"),
+        create_quote("e5", "polymarket", market_id="p5"),
+    ]
+    index = MatchIndex()
+    for q in quotes:
+        index.upsert(q)
+    drained = index.drain()
+    expected = match_quotes(quotes)
+    assert [(c.event_key, c.platform_quotes) for c in drained] == [
+        (c.event_key, c.platform_quotes) for c in expected
+    ]
+    assert index.drain() == []
+
+
+def test_match_index_drains_only_changed_and_reuses_candidates():
+    index = MatchIndex()
+    for q in [
+        create_quote("e1", "kalshi", market_id="k1"),
+        create_quote("e1", "polymarket", market_id="p1"),
+        create_quote("e2", "kalshi", market_id="k2"),
+        create_quote("e2", "polymarket", market_id="p2"),
+    ]:
+        index.upsert(q)
+    first = {c.event_key: c for c in index.drain()}
+    # unchanged prices do not dirty the event
+    index.upsert(create_quote("e2", "kalshi", market_id="k2"))
+    assert index.drain() == []
+    index.upsert(create_quote("e1", "kalshi", bid=0.55, ask=0.65, market_id="k1"))
+    changed = index.drain()
+    assert [c.event_key for c in changed] == ["e1"]
+    assert changed[0] is first["e1"]
+    assert changed[0].platform_quotes[0].outcomes["Yes"].ask == 0.65
+
+
+def test_match_index_remove_drops_candidate():
+    index = MatchIndex()
+    index.upsert(create_quote("e1", "kalshi", market_id="k1"))
+    index.upsert(create_quote("e1", "polymarket", market_id="p1"))
+    assert len(index.drain()) == 1
+    index.remove("polymarket", "p1")
+    assert index.drain() == []
+    assert index.all_candidates() == []
+
+
+def test_compact_match_index_tracks_prices():
+    index = MatchIndex(compact=True)
+    index.upsert(create_quote("e1", "kalshi"))
+    index.upsert(create_quote("e1", "polymarket"))
+    [cand] = index.drain()
+    assert [q.platform for q in cand.platform_quotes] == ["kalshi", "polymarket"]
+    # same prices: nothing to re-drain
+    index.upsert(create_quote("e1", "kalshi"))
+    assert index.drain() == []
+    index.upsert(create_quote("e1", "kalshi", bid=0.55, ask=0.58))
+    [again] = index.drain()
+    assert again is cand
+    assert again.to_candidate().platform_quotes[0].outcomes["Yes"].ask == 0.58
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_match_index_repeated_poll_before_drain(compact):
+    index = MatchIndex(compact=compact)
+    index.upsert(create_quote("e1", "kalshi"))
+    index.upsert(create_quote("e1", "polymarket"))
+    index.drain()
+    # two polls of the same moved market in one batch
+    index.upsert(create_quote("e1", "kalshi", bid=0.55, ask=0.58))
+    index.upsert(create_quote("e1", "kalshi", bid=0.55, ask=0.58))
+    [cand] = index.drain()
+    quotes = cand.to_candidate().platform_quotes if compact else cand.platform_quotes
+    assert quotes[0].outcomes["Yes"].ask == 0.58
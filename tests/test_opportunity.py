@@ -1,7 +1,9 @@
 import pytest
 from datetime import datetime
 from models import MarketQuote, PriceLevel, Settings, ArbitrageCandidate
-from services.opportunity import identify_opportunities, Opportunity
+import random
+from services.compact import CompactCandidate, CompactQuote
+from services.opportunity import identify_opportunities, score_opportunities, Opportunity
 
 
 def create_quote(event_id: str, platform: str, bids_asks: dict) -> MarketQuote:
@@ -39,3 +41,88 @@ def test_identify_positive_opportunity():
     expected_spread = (1 - opp.net_cost) / opp.net_cost
     assert opp.spread == pytest.approx(expected_spread)
     assert opp.candidate == candidate
+
+
+def test_score_opportunities_matches_identify_opportunities():
+    rng = random.Random(42)
+    candidates = []
+    for i in range(200):
+        quotes = []
+        for platform in ["kalshi", "polymarket", "predictit"][: rng.randint(1, 3)]:
+            levels = {}
+            for outcome in rng.sample(["Yes", "No", "Maybe"], rng.randint(0, 3)):
+                ask = round(rng.uniform(0.05, 0.6), 2)
+                levels[outcome] = (round(ask - rng.uniform(0, 0.05), 2), ask)
+            quotes.append(create_quote(f"e{i}", platform, levels))
+        candidates.append(ArbitrageCandidate(event_key=f"e{i}", platform_quotes=quotes))
+    settings = Settings(kalshi_api_key="k", polymarket_rpc_url="url", min_spread=0.05)
+    expected = identify_opportunities(candidates, settings)
+    actual = score_opportunities(candidates, settings)
+    assert expected
+    assert [o.event_key for o in actual] == [o.event_key for o in expected]
+    for a, e in zip(actual, expected):
+        assert a.net_cost == pytest.approx(e.net_cost)
+        assert a.spread == pytest.approx(e.spread)
+        assert a.slippage == pytest.approx(e.slippage)
+        assert a.apy == pytest.approx(e.apy)
+        assert a.candidate == e.candidate
+    compact = [
+        CompactCandidate(c.event_key, [CompactQuote.from_market_quote(q) for q in c.platform_quotes])
+        for c in candidates
+    ]
+    from_compact = score_opportunities(compact, settings)
+    assert [o.event_key for o in from_compact] == [o.event_key for o in expected]
+    assert [o.net_cost for o in from_compact] == [o.net_cost for o in actual]
+    assert isinstance(from_compact[0].candidate, ArbitrageCandidate)
+
+
+def test_score_opportunities_empty_inputs():
+    settings = Settings(kalshi_api_key="k", polymarket_rpc_url="url", min_spread=-1.0)
+    assert score_opportunities([], settings) == []
+    empty = ArbitrageCandidate(event_key="e0", platform_quotes=[create_quote("e0", "kalshi", {})])
+    opps = score_opportunities([empty], settings)
+    assert len(opps) == 1
+    assert opps[0].net_cost == 0.0
+    assert opps[0].spread == 0.0
+    assert opps[0].slippage == 0.0
+
+
+def test_score_opportunities_prices_books_at_executable_size():
+    from services.order_book import L2OrderBook
+
+    kalshi = create_quote("e1", "kalshi", {"Yes": (0.38, 0.40), "No": (0.55, 0.60)})
+    poly = create_quote("e1", "polymarket", {"Yes": (0.42, 0.45), "No": (0.47, 0.50)})
+    cand = ArbitrageCandidate(event_key="e1", platform_quotes=[kalshi, poly])
+    settings = Settings(kalshi_api_key="k", polymarket_rpc_url="url", min_spread=0.0)
+    book = L2OrderBook("e1_kalshi")
+    # only 5 Yes contracts at 40c, then 46c
+    book.apply_level("no", 60, 5)
+    book.apply_level("no", 54, 100)
+    [top] = score_opportunities([cand], settings)
+    assert top.net_cost == pytest.approx(0.90)
+    [deep] = score_opportunities([cand], settings, books={("kalshi", "e1_kalshi"): book}, size=20)
+    # polymarket's 0.45 now beats kalshi's fee-inclusive VWAP for 20
+    assert deep.net_cost == pytest.approx(0.95)
+    assert score_opportunities([cand], settings, books={("kalshi", "e1_kalshi"): book}, size=1000)[0].net_cost == pytest.approx(0.95)
+
+
+def test_score_opportunities_falls_back_to_top_ask_without_a_ladder():
+    from services.order_book import L2OrderBook
+
+    settings = Settings(kalshi_api_key="k", polymarket_rpc_url="url", min_spread=0.0)
+    backed = ArbitrageCandidate(event_key="e1", platform_quotes=[
+        create_quote("e1", "kalshi", {"Yes": (0.38, 0.40), "No": (0.55, 0.60)}),
+        create_quote("e1", "polymarket", {"Yes": (0.42, 0.45), "No": (0.47, 0.50)}),
+    ])
+    # the book has no "YES"/"NO" ladders, so these outcomes keep their quoted asks
+    other = ArbitrageCandidate(event_key="e2", platform_quotes=[
+        create_quote("e2", "kalshi", {"YES": (0.38, 0.40), "NO": (0.50, 0.52)}),
+    ])
+    e1_book, e2_book = L2OrderBook("e1_kalshi"), L2OrderBook("e2_kalshi")
+    e1_book.apply_level("no", 60, 5)
+    e1_book.apply_level("no", 54, 100)
+    e2_book.apply_level("no", 60, 100)
+    books = {("kalshi", "e1_kalshi"): e1_book, ("kalshi", "e2_kalshi"): e2_book}
+    deep, mixed = score_opportunities([backed, other], settings, books=books, size=20)
+    assert deep.net_cost == pytest.approx(0.95)
+    assert mixed.net_cost == pytest.approx(0.92)
@@ -0,0 +1,145 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from models import ArbitrageCandidate, MarketQuote, PriceLevel, Settings
+from services.compact import CompactCandidate, CompactQuote
+from services.execution_amm import PoolCache, buy_cost
+from services.optimizer import SizeOptimizer
+from services.order_book import L2OrderBook, kalshi_fee
+
+NOW = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def make_settings(**kwargs):
+    kwargs.setdefault("min_spread", 0.0)
+    return Settings(kalshi_api_key="k", polymarket_rpc_url="url", **kwargs)
+
+
+def quote(platform, market_id, yes_ask, no_ask, close_time=None):
+    return MarketQuote(
+        platform=platform,
+        event_id="e1",
+        market_id=market_id,
+        outcomes={"Yes": PriceLevel(bid=yes_ask - 0.01, ask=yes_ask), "No": PriceLevel(bid=no_ask - 0.01, ask=no_ask)},
+        timestamp=NOW,
+        close_time=close_time,
+    )
+
+
+def test_sizes_against_assumed_depth_and_capital():
+    cand = ArbitrageCandidate(event_key="e1", platform_quotes=[quote("a", "a1", 0.4, 0.7), quote("b", "b1", 0.6, 0.5)])
+    opt = SizeOptimizer(make_settings(assumed_depth=50, max_capital=1000))
+    opp = opt.solve(cand, now=NOW.timestamp())
+    assert opp.size == pytest.approx(50)
+    assert opp.net_cost == pytest.approx(0.9)
+    assert opp.profit == pytest.approx(5.0)
+    assert opp.legs == {"Yes": [("a", "a1", 50, pytest.approx(20))], "No": [("b", "b1", 50, pytest.approx(25))]}
+
+    capped = SizeOptimizer(make_settings(assumed_depth=50, max_capital=9)).solve(cand)
+    assert capped.capital == pytest.approx(9)
+    assert capped.size == pytest.approx(10)
+
+
+def test_walks_book_depth_until_marginal_bundle_unprofitable():
+    book = L2OrderBook("k1")
+    # Yes asks: 40c x 10, 45c x 10, 52c x 100
+    book.apply_level("no", 60, 10)
+    book.apply_level("no", 55, 10)
+    book.apply_level("no", 48, 100)
+    cand = ArbitrageCandidate(event_key="e1", platform_quotes=[quote("kalshi", "k1", 0.4, 0.99), quote("b", "b1", 0.9, 0.5)])
+    opt = SizeOptimizer(make_settings(assumed_depth=1000), books={("kalshi", "k1"): book})
+    opp = opt.solve(cand)
+    # the 52c level (plus fee) against the 50c No ask costs more than $1
+    assert opp.size == pytest.approx(20)
+    fee = kalshi_fee(10, 0.40) + kalshi_fee(10, 0.45)
+    assert opp.capital == pytest.approx(4.0 + 4.5 + fee + 10.0, abs=0.011)
+    assert opp.profit == pytest.approx(20 - opp.capital)
+    assert opp.slippage > 0
+
+
+def test_apy_from_time_to_resolution():
+    close = NOW + timedelta(days=73)
+    cand = ArbitrageCandidate(
+        event_key="e1", platform_quotes=[quote("a", "a1", 0.4, 0.7, close), quote("b", "b1", 0.6, 0.5, close)]
+    )
+    opp = SizeOptimizer(make_settings()).solve(cand, now=NOW.timestamp())
+    assert opp.days_to_resolution == pytest.approx(73)
+    assert opp.apy == pytest.approx(opp.spread * 5)
+    assert SizeOptimizer(make_settings(min_apy=1.0)).solve(cand, now=NOW.timestamp()) is None
+
+
+def test_unprofitable_candidate_is_dropped():
+    cand = ArbitrageCandidate(event_key="e1", platform_quotes=[quote("a", "a1", 0.55, 0.5)])
+    assert SizeOptimizer(make_settings()).optimize([cand]) == []
+
+
+def test_amm_pool_supply_curve():
+    pools = PoolCache()
+    pools.update("p1", {"Yes": 1000.0, "No": 1000.0}, fee=0.0)
+    cand = ArbitrageCandidate(event_key="e1", platform_quotes=[quote("polymarket", "p1", 0.5, 0.5), quote("b", "b1", 0.9, 0.4)])
+    opt = SizeOptimizer(make_settings(assumed_depth=10_000, max_bundle_size=500), pools=pools, amm_steps=64)
+    opp = opt.solve(cand)
+    # Yes gets dearer along the pool curve; stop near marginal price 0.6
+    assert 0 < opp.size < 500
+    yes_leg = opp.legs["Yes"][0]
+    assert yes_leg[:2] == ("polymarket", "p1")
+    assert yes_leg[3] == pytest.approx(float(buy_cost(1000.0, 1000.0, opp.size)), rel=0.02)
+
+
+def test_incremental_resolve_only_on_change():
+    book = L2OrderBook("k1")
+    book.apply_level("no", 60, 10)
+    cand = ArbitrageCandidate(event_key="e1", platform_quotes=[quote("kalshi", "k1", 0.4, 0.99), quote("b", "b1", 0.9, 0.5)])
+    opt = SizeOptimizer(make_settings(), books={("kalshi", "k1"): book})
+    calls = []
+    solve = opt.solve
+    opt.solve = lambda c, now=None: calls.append(c.event_key) or solve(c, now)
+
+    first = opt.optimize([cand])
+    assert opt.optimize([cand]) == first
+    assert calls == ["e1"]
+    book.apply_level("no", 60, 10)
+    (second,) = opt.optimize([cand])
+    assert calls == ["e1", "e1"]
+    assert second.size == pytest.approx(20)
+
+
+def test_compact_candidate():
+    cand = ArbitrageCandidate(event_key="e1", platform_quotes=[quote("a", "a1", 0.4, 0.7), quote("b", "b1", 0.6, 0.5)])
+    compact = CompactCandidate("e1", [CompactQuote.from_market_quote(q) for q in cand.platform_quotes])
+    opt = SizeOptimizer(make_settings())
+    (opp,) = opt.optimize([compact])
+    assert opp.net_cost == pytest.approx(0.9)
+    assert isinstance(opp.candidate, ArbitrageCandidate)
+
+
+def test_cached_solution_reannualises_as_resolution_nears():
+    close = NOW + timedelta(days=10)
+    cand = ArbitrageCandidate(
+        event_key="e1", platform_quotes=[quote("a", "a1", 0.4, 0.7, close), quote("b", "b1", 0.6, 0.5, close)]
+    )
+    opt = SizeOptimizer(make_settings(min_apy=5.0))
+    # 11.1% over 10 days is below 500% APY, over 0.5 days it is above
+    assert opt.optimize([cand], now=NOW.timestamp()) == []
+    later = (close - timedelta(hours=12)).timestamp()
+    (opp,) = opt.optimize([cand], now=later)
+    assert opp.days_to_resolution == pytest.approx(0.5)
+    (again,) = opt.optimize([cand], now=later + 600)
+    assert again.days_to_resolution == pytest.approx(0.5 - 600 / 86400)
+
+
+def test_book_without_outcome_is_skipped():
+    book = L2OrderBook("k1")
+    book.apply_level("no", 60, 10)
+    multi = MarketQuote(
+        platform="kalshi", event_id="e1", market_id="k1",
+        outcomes={"Alice": PriceLevel(bid=0.3, ask=0.4)}, timestamp=NOW,
+    )
+    other = MarketQuote(
+        platform="b", event_id="e1", market_id="b1",
+        outcomes={"Alice": PriceLevel(bid=0.3, ask=0.45), "Bob": PriceLevel(bid=0.4, ask=0.5)}, timestamp=NOW,
+    )
+    cand = ArbitrageCandidate(event_key="e1", platform_quotes=[multi, other])
+    opp = SizeOptimizer(make_settings(assumed_depth=10), books={("kalshi", "k1"): book}).solve(cand)
+    assert opp.legs["Alice"][0][:2] == ("b", "b1")
@@ -0,0 +1,51 @@
+import pytest
+from services.order_book import BookSide, KalshiBooks, kalshi_fee
+
+
+def test_kalshi_fee_rounds_up_to_the_cent():
+    assert kalshi_fee(100, 0.50) == pytest.approx(1.75)
+    # 0.07 * 1 * 0.5 * 0.5 = 0.0175 -> 0.02
+    assert kalshi_fee(1, 0.50) == pytest.approx(0.02)
+    # exact cents are not bumped by float noise: 0.07 * 10 * 0.2 * 0.8 = 0.112 -> 0.12; 0.07*25*0.4*0.6 = 0.42
+    assert kalshi_fee(10, 0.20) == pytest.approx(0.12)
+    assert kalshi_fee(25, 0.40) == pytest.approx(0.42)
+
+
+def test_book_side_fill_and_depth_queries():
+    asks = BookSide(ascending=True)
+    asks.set(40, 10)
+    asks.set(42, 5)
+    asks.set(45, 20)
+    assert asks.best() == 40
+    notional, _, worst = asks.fill(12)
+    assert notional == pytest.approx(10 * 40 + 2 * 42) and worst == 42
+    assert asks.fill(36) is None
+    assert asks.size_within(42) == 15
+    asks.set(40, 0)
+    assert asks.best() == 42 and 40 not in asks.levels
+    bids = BookSide(ascending=False)
+    bids.set(30, 3)
+    bids.set(35, 2)
+    assert bids.best() == 35
+    assert bids.fill(4)[0] == pytest.approx(2 * 35 + 2 * 30)
+    assert bids.size_within(31) == 2
+
+
+def test_l2_book_mirrors_kalshi_bids_into_asks():
+    books = KalshiBooks()
+    books.apply({"type": "orderbook_snapshot", "msg": {"market_ticker": "FED", "yes": [[44, 10]], "no": [[52, 5], [50, 10]]}})
+    book = books.books[("kalshi", "FED")]
+    # No bids at 52/50 are Yes asks at 48/50
+    assert book.top_of_book()["Yes"].ask == pytest.approx(0.48)
+    assert book.vwap("Yes", 10) == pytest.approx((5 * 0.48 + 5 * 0.50) / 10)
+    notional, fee, worst = book.buy_cost("Yes", 10)
+    assert fee == kalshi_fee_sum([(5, 48), (5, 50)]) and worst == 0.5
+    assert book.max_size("Yes", 0.49) == 5
+    books.apply({"type": "orderbook_delta", "msg": {"market_ticker": "FED", "price": 52, "delta": -5, "side": "no"}})
+    assert book.top_of_book()["Yes"].ask == pytest.approx(0.50)
+    assert book.effective_ask("Yes", 11) == float("inf")
+
+
+def kalshi_fee_sum(fills):
+    import math
+    return math.ceil(round(sum(7 * c * p * (100 - p) for c, p in fills) / 10000, 6)) / 100
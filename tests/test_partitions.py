@@ -0,0 +1,92 @@
+import pytest
+from datetime import date
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+from db.models import QuoteTick
+from db.partitions import (
+    create_partition_sql,
+    drop_partitions_before,
+    ensure_partitions,
+    maintain,
+    partition_day,
+    partition_name,
+)
+
+
+class DummyResult:
+    def __init__(self, rows):
+        self.rows = rows
+        self.rowcount = len(rows)
+
+    def fetchall(self):
+        return self.rows
+
+
+class DummyConn:
+    def __init__(self, partitions=(), caught=()):
+        self.partitions = [(p,) for p in partitions]
+        # days with rows in the default partition
+        self.caught = [(d,) for d in caught]
+        self.executed = []
+
+    async def execute(self, stmt, params=None):
+        sql = str(stmt)
+        self.executed.append(sql)
+        if "pg_inherits" in sql:
+            return DummyResult(self.partitions)
+        if "SELECT DISTINCT" in sql:
+            return DummyResult(self.caught)
+        return DummyResult([])
+
+
+def test_quote_tick_ddl_is_partitioned_with_composite_key():
+    ddl = str(CreateTable(QuoteTick.__table__).compile(dialect=postgresql.dialect()))
+    assert "PARTITION BY RANGE (timestamp)" in ddl
+    assert "PRIMARY KEY (platform, market_id, timestamp, outcome)" in ddl
+    assert "bid FLOAT" in ddl and "ask FLOAT" in ddl
+
+
+def test_partition_names_round_trip():
+    day = date(2025, 4, 1)
+    assert partition_name(day) == "quote_ticks_20250401"
+    assert partition_day("quote_ticks_20250401") == day
+    assert partition_day("quote_ticks_default") is None
+    assert create_partition_sql(day) == (
+        "CREATE TABLE IF NOT EXISTS quote_ticks_20250401 PARTITION OF quote_ticks "
+        "FOR VALUES FROM ('2025-04-01') TO ('2025-04-02')"
+    )
+
+
+@pytest.mark.asyncio
+async def test_ensure_partitions_creates_one_per_day():
+    conn = DummyConn()
+    created = await ensure_partitions(conn, date(2025, 12, 31), 2)
+    assert created == ["quote_ticks_20251231", "quote_ticks_20260101"]
+    assert len(conn.executed) == 2
+
+
+@pytest.mark.asyncio
+async def test_retention_drops_only_old_partitions():
+    conn = DummyConn(["quote_ticks_20250101", "quote_ticks_20250105", "quote_ticks_20250110", "quote_ticks_default"])
+    dropped = await drop_partitions_before(conn, date(2025, 1, 6))
+    assert dropped == ["quote_ticks_20250101", "quote_ticks_20250105"]
+    drops = [sql for sql in conn.executed if sql.startswith("DROP")]
+    assert drops == ["DROP TABLE IF EXISTS quote_ticks_20250101", "DROP TABLE IF EXISTS quote_ticks_20250105"]
+
+
+@pytest.mark.asyncio
+async def test_maintain_adopts_rows_caught_by_default_partition():
+    from datetime import datetime, timedelta
+
+    today = datetime.utcnow().date()
+    missed = today - timedelta(days=1)
+    conn = DummyConn([partition_name(today)], caught=[missed])
+    await maintain(conn, retention_days=30)
+    assert conn.executed[0] == "CREATE TABLE IF NOT EXISTS quote_ticks_default PARTITION OF quote_ticks DEFAULT"
+    name = partition_name(missed)
+    adopt = [sql for sql in conn.executed if name in sql]
+    assert adopt[0].startswith(f"CREATE TABLE {name} (LIKE quote_ticks")
+    assert "DELETE FROM quote_ticks_default" in adopt[1]
+    assert adopt[2].startswith(f"ALTER TABLE quote_ticks ATTACH PARTITION {name}")
+    # upcoming partitions are created after the default rows are moved out
+    assert conn.executed.index(create_partition_sql(today)) > conn.executed.index(adopt[2])
@@ -1,7 +1,9 @@
+import asyncio
+import json
 import pytest
 from datetime import datetime
 from models import MarketQuote, PriceLevel
-from services.persistence import save_quotes
+from services.persistence import save_quotes, save_quotes_bulk, save_quote_ticks, QuoteWriter, QuoteDeduplicator
 
 class DummySession:
     def __init__(self):
@@ -44,3 +46,197 @@ async def test_save_quotes_and_metrics(monkeypatch):
     assert session.committed is True
     # Verify metrics increment
     assert inc_calls == [2]
+
+
+class DummyDialect:
+    def __init__(self, driver):
+        self.driver = driver
+
+
+class DummyCopyConnection:
+    def __init__(self):
+        self.copied = []
+
+    async def copy_records_to_table(self, table, records, columns):
+        self.copied.append((table, records, columns))
+
+
+class DummyRawConnection:
+    def __init__(self):
+        self.driver_connection = DummyCopyConnection()
+
+
+class DummyConnection:
+    def __init__(self, driver):
+        self.dialect = DummyDialect(driver)
+        self.raw = DummyRawConnection()
+
+    async def get_raw_connection(self):
+        return self.raw
+
+
+class DummyBulkSession(DummySession):
+    def __init__(self, driver="asyncpg", store=None):
+        super().__init__()
+        self.conn = DummyConnection(driver)
+        self.executed = []
+        self.store = store if store is not None else []
+
+    async def connection(self):
+        return self.conn
+
+    async def execute(self, stmt, rows):
+        self.executed.append((stmt, rows))
+        self.store.extend(rows)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def make_quotes(n):
+    return [
+        MarketQuote(
+            platform="kalshi",
+            event_id=f"e{i}",
+            market_id=f"m{i}",
+            outcomes={"Yes": PriceLevel(bid=0.5, ask=0.6)},
+            timestamp=datetime.utcnow()
+        )
+        for i in range(n)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_save_quotes_bulk_uses_copy_on_asyncpg(monkeypatch):
+    inc_calls = []
+    monkeypatch.setattr(
+        'services.persistence.quotes_ingested',
+        type('C', (), {'inc': lambda self, n: inc_calls.append(n)})()
+    )
+    session = DummyBulkSession("asyncpg")
+    await save_quotes_bulk(make_quotes(3), session)
+    copied = session.conn.raw.driver_connection.copied
+    assert len(copied) == 1
+    table, records, columns = copied[0]
+    assert table == "quotes"
+    assert columns == ["platform", "event_id", "market_id", "outcomes", "timestamp"]
+    assert records[0][:3] == ("kalshi", "e0", "m0")
+    assert json.loads(records[0][3]) == {"Yes": {"bid": 0.5, "ask": 0.6}}
+    assert session.executed == []
+    assert session.committed is True
+    assert inc_calls == [3]
+
+
+@pytest.mark.asyncio
+async def test_save_quotes_bulk_falls_back_to_executemany():
+    session = DummyBulkSession("pysqlite")
+    await save_quotes_bulk(make_quotes(2), session)
+    assert len(session.executed) == 1
+    rows = session.executed[0][1]
+    assert [r["market_id"] for r in rows] == ["m0", "m1"]
+    assert rows[0]["outcomes"] == {"Yes": {"bid": 0.5, "ask": 0.6}}
+    assert session.conn.raw.driver_connection.copied == []
+
+
+@pytest.mark.asyncio
+async def test_quote_writer_flushes_on_size_and_interval():
+    stored = []
+    flushes = []
+    writer = QuoteWriter(
+        session_factory=lambda: DummyBulkSession("pysqlite", stored),
+        flush_size=5,
+        flush_interval=0.05,
+    )
+    original = writer.flush
+
+    async def recording_flush(batch):
+        flushes.append(len(batch))
+        await original(batch)
+
+    writer.flush = recording_flush
+    writer.start()
+    await writer.put(make_quotes(12))
+    await asyncio.sleep(0.01)
+    # two full batches go out immediately, the remainder waits for the interval
+    assert flushes == [5, 5]
+    await asyncio.sleep(0.08)
+    assert flushes == [5, 5, 2]
+    await writer.put(make_quotes(1))
+    await writer.stop()
+    assert flushes == [5, 5, 2, 1]
+    assert len(stored) == 13
+
+
+@pytest.mark.asyncio
+async def test_quote_writer_writes_quote_ticks():
+    stored = []
+    writer = QuoteWriter(
+        session_factory=lambda: DummyBulkSession("pysqlite", stored),
+        flush_size=5,
+        save=save_quote_ticks,
+    )
+    await writer.put(make_quotes(3))
+    await writer.stop()
+    # one quote_ticks row per outcome, not a legacy quotes row
+    assert [(r["market_id"], r["outcome"], r["ask"]) for r in stored] == [
+        ("m0", "Yes", 0.6), ("m1", "Yes", 0.6), ("m2", "Yes", 0.6)
+    ]
+
+
+def test_deduplicator_skips_unchanged_and_sends_heartbeats():
+    dedup = QuoteDeduplicator(heartbeat_interval=60.0)
+    quotes = make_quotes(2)
+    assert dedup.filter(quotes, now=0.0) == quotes
+    dedup.commit(quotes, now=0.0)
+    # nothing moved
+    assert dedup.filter(make_quotes(2), now=1.0) == []
+    moved = make_quotes(2)
+    moved[1] = moved[1].copy(update={"outcomes": {"Yes": PriceLevel(bid=0.55, ask=0.6)}})
+    assert [q.market_id for q in dedup.filter(moved, now=2.0)] == ["m1"]
+    dedup.commit(moved[1:], now=2.0)
+    # m0 is due a heartbeat (last written at 0.0), m1 is not (written at 2.0)
+    assert [q.market_id for q in dedup.filter(moved, now=61.0)] == ["m0"]
+
+
+def test_deduplicator_counts_written_and_skipped(monkeypatch):
+    counts = {"written": [], "skipped": []}
+    monkeypatch.setattr(
+        'services.persistence.quote_rows_written',
+        type('C', (), {'inc': lambda self, n: counts["written"].append(n)})()
+    )
+    monkeypatch.setattr(
+        'services.persistence.quote_rows_skipped',
+        type('C', (), {'inc': lambda self, n: counts["skipped"].append(n)})()
+    )
+    dedup = QuoteDeduplicator()
+    dedup.commit(dedup.filter(make_quotes(3)))
+    dedup.commit(dedup.filter(make_quotes(3)))
+    assert counts == {"written": [3, 0], "skipped": [0, 3]}
+
+
+def test_deduplicator_keeps_quotes_of_failed_writes():
+    dedup = QuoteDeduplicator()
+    quotes = make_quotes(2)
+    assert dedup.filter(quotes) == quotes
+    # the write failed, so nothing was committed and the quotes are retried
+    assert [q.market_id for q in dedup.filter(make_quotes(2))] == ["m0", "m1"]
+
+
+@pytest.mark.asyncio
+async def test_save_quote_ticks_writes_one_row_per_outcome():
+    quote = MarketQuote(
+        platform="kalshi",
+        event_id="e1",
+        market_id="m1",
+        outcomes={"Yes": PriceLevel(bid=0.5, ask=0.6), "No": PriceLevel(bid=0.3, ask=0.4)},
+        timestamp=datetime.utcnow()
+    )
+    session = DummyBulkSession("asyncpg")
+    await save_quote_ticks([quote], session)
+    table, records, columns = session.conn.raw.driver_connection.copied[0]
+    assert table == "quote_ticks"
+    assert columns == ["platform", "market_id", "timestamp", "outcome", "event_id", "bid", "ask"]
+    assert [(r[3], r[5], r[6]) for r in records] == [("Yes", 0.5, 0.6), ("No", 0.3, 0.4)]
@@ -41,3 +41,54 @@ def test_compute_pnls_and_get_exits(manager):
     assert len(exits) == 1
     assert isinstance(exits[0], Position)
     assert exits[0].outcome == 'Yes'
+
+def test_sell_realizes_pnl(manager):
+    manager.record_fill('e4', 'Yes', size=10, price=0.4, side='BUY')
+    manager.record_fill('e4', 'Yes', size=4, price=0.6, side='SELL')
+    pos = manager.positions[('e4', 'Yes')]
+    assert pos.quantity == 6
+    assert pos.avg_cost == pytest.approx(0.4)
+    assert pos.realized_pnl == pytest.approx(0.8)
+    # selling through zero opens a short at the fill price
+    manager.record_fill('e4', 'Yes', size=8, price=0.5, side='SELL')
+    assert pos.quantity == pytest.approx(-2)
+    assert pos.avg_cost == pytest.approx(0.5)
+    assert pos.realized_pnl == pytest.approx(0.8 + 0.6)
+    # covering the short below its entry is a gain
+    manager.record_fill('e4', 'Yes', size=2, price=0.3, side='BUY')
+    assert pos.quantity == pytest.approx(0)
+    assert pos.realized_pnl == pytest.approx(0.8 + 0.6 + 0.4)
+    assert manager.realized_pnl() == pytest.approx(1.8)
+
+def test_short_pnl_and_averaging(manager):
+    manager.record_fill('e5', 'No', size=2, price=0.6, side='SELL')
+    manager.record_fill('e5', 'No', size=2, price=0.8, side='SELL')
+    pos = manager.positions[('e5', 'No')]
+    assert pos.quantity == -4
+    assert pos.avg_cost == pytest.approx(0.7)
+    assert manager.compute_pnls({('e5', 'No'): 0.5})[('e5', 'No')] == pytest.approx(0.8)
+
+def test_incremental_updates_and_ranked_exits(manager):
+    for i, cost in enumerate((0.1, 0.2, 0.3)):
+        manager.record_fill(f'e{i}', 'Yes', size=10, price=cost, side='BUY')
+    prices = {(f'e{i}', 'Yes'): 0.5 for i in range(3)}
+    assert len(manager.update_prices(prices)) == 3
+    # unchanged prices are not recomputed
+    assert manager.update_prices(prices) == {}
+    changed = manager.update_prices({('e2', 'Yes'): 0.9, ('unknown', 'Yes'): 0.9})
+    assert changed == {('e2', 'Yes'): pytest.approx(6.0)}
+    exits = manager.get_exits({}, threshold=3.5)
+    assert [p.event_key for p in exits] == ['e2', 'e0']
+    # a fill moves the position within the ranking
+    manager.record_fill('e0', 'Yes', size=10, price=0.5, side='SELL')
+    assert [p.event_key for p in manager.get_exits({}, threshold=3.5)] == ['e2']
+    assert manager.event_positions('e1')[0].avg_cost == pytest.approx(0.2)
+
+def test_closed_position_refresh_keeps_ranking(manager):
+    manager.record_fill('a', 'Yes', size=10, price=0.5, side='BUY')
+    manager.record_fill('b', 'Yes', size=10, price=0.2, side='BUY')
+    manager.update_prices({('a', 'Yes'): 0.5, ('b', 'Yes'): 0.5})
+    manager.record_fill('a', 'Yes', size=10, price=0.5, side='SELL')
+    # refreshing the closed position must not drop another from the ranking
+    manager.update_prices({('a', 'Yes'): 0.6})
+    assert [p.event_key for p in manager.get_exits({}, threshold=1.0)] == ['b']
@@ -0,0 +1,66 @@
+import pytest
+from datetime import datetime
+from models import MarketQuote, PriceLevel, QuoteDelta
+from services.quote_book import QuoteBook
+
+
+def create_quote(event_id: str, platform: str, market_id: str, bid: float = 0.4, ask: float = 0.5) -> MarketQuote:
+    return MarketQuote(
+        platform=platform,
+        event_id=event_id,
+        market_id=market_id,
+        outcomes={"Yes": PriceLevel(bid=bid, ask=ask)},
+        timestamp=datetime.utcnow(),
+    )
+
+
+def test_snapshot_reports_only_changed_events():
+    book = QuoteBook()
+    changed = book.apply_snapshot([create_quote("e1", "kalshi", "m1"), create_quote("e2", "kalshi", "m2")])
+    assert changed == {"e1", "e2"}
+    assert book.drain_dirty() == {"e1", "e2"}
+    # same prices for m1, new prices for m2
+    changed = book.apply_snapshot([create_quote("e1", "kalshi", "m1"), create_quote("e2", "kalshi", "m2", ask=0.6)])
+    assert changed == {"e2"}
+    assert book.drain_dirty() == {"e2"}
+    assert book.drain_dirty() == set()
+
+
+def test_complete_snapshot_removes_missing_markets():
+    book = QuoteBook()
+    book.apply_snapshot([create_quote("e1", "kalshi", "m1"), create_quote("e2", "kalshi", "m2")])
+    book.apply_snapshot([create_quote("e3", "polymarket", "p1")])
+    changed = book.apply_snapshot([create_quote("e1", "kalshi", "m1")], platform="kalshi")
+    assert changed == {"e2"}
+    assert book.get("kalshi", "m2") is None
+    assert book.get("polymarket", "p1") is not None
+    assert "e2" not in book.events
+
+
+def test_delta_updates_quote_in_place():
+    book = QuoteBook()
+    quote = create_quote("e1", "kalshi", "m1")
+    book.apply_snapshot([quote])
+    book.drain_dirty()
+    delta = QuoteDelta(
+        platform="kalshi",
+        market_id="m1",
+        outcomes={"Yes": PriceLevel(bid=0.45, ask=0.55)},
+        timestamp=datetime.utcnow(),
+    )
+    assert book.apply_delta(delta) == {"e1"}
+    assert book.get("kalshi", "m1") is quote
+    assert quote.outcomes["Yes"].ask == pytest.approx(0.55)
+    # replaying the same delta is a no-op
+    assert book.apply_delta(delta) == set()
+    unknown = QuoteDelta(platform="kalshi", market_id="mX", outcomes={}, timestamp=datetime.utcnow())
+    assert book.apply_delta(unknown) == set()
+
+
+def test_event_reassignment_dirties_both_events():
+    book = QuoteBook()
+    book.upsert(create_quote("e1", "kalshi", "m1"))
+    book.drain_dirty()
+    assert book.upsert(create_quote("e2", "kalshi", "m1")) == {"e1", "e2"}
+    assert book.quotes_for_event("e1") == []
+    assert [q.market_id for q in book.quotes_for_event("e2")] == ["m1"]
@@ -0,0 +1,36 @@
+import time
+import pytest
+from connectors.rate_limit import RetryBudget, TokenBucket, retry_after
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_after_burst():
+    bucket = TokenBucket(rate=100, capacity=2)
+    started = time.monotonic()
+    waits = [await bucket.acquire() for _ in range(4)]
+    # two burst tokens, then one token every 10ms
+    assert waits[0] < 0.005 and waits[1] < 0.005
+    assert time.monotonic() - started >= 0.015
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_pause_holds_waiters():
+    bucket = TokenBucket(rate=1000)
+    bucket.pause(0.05)
+    assert await bucket.acquire() >= 0.04
+
+
+def test_retry_budget_limits_retries_to_ratio():
+    budget = RetryBudget(ratio=0.5, min_retries=1)
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    budget.deposit()
+    assert budget.withdraw()
+
+
+def test_retry_after_parses_seconds_and_dates():
+    assert retry_after("2") == 2.0
+    assert retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert retry_after(None) is None
+    assert retry_after("soon") is None
@@ -0,0 +1,129 @@
+import asyncio
+import gzip
+import time
+import pytest
+import httpx
+
+from connectors.recording import Recorder, ReplayConnector, Replayer, ReplayWSClient, read_records
+from connectors.rest_client import KalshiRestClient, PolymarketRestClient
+from connectors.ws_client import PolymarketWSClient
+from services.ingestion import IngestionScheduler
+
+
+class DummySession:
+    def __init__(self, store):
+        self.store = store
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def add(self, item):
+        self.store.append(item)
+
+    async def commit(self):
+        pass
+
+
+class DummyConn:
+    def __init__(self, messages):
+        self.messages = list(messages)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.messages:
+            return self.messages.pop(0)
+        raise StopAsyncIteration
+
+
+def kalshi_page(market_id, bid=0.4, ask=0.5):
+    return {"markets": [{
+        "event_id": "e1",
+        "market_id": market_id,
+        "outcomes": {"Yes": {"bid": bid, "ask": ask}},
+        "timestamp": "2025-04-01T12:00:00Z",
+    }]}
+
+
+def test_recorder_appends_readable_gzip_members(tmp_path):
+    path = str(tmp_path / "rec.jsonl.gz")
+    recorder = Recorder(path, flush_every=2)
+    for i in range(5):
+        recorder.record("kalshi", "ws", f'{{"seq": {i}}}')
+    # two full batches flushed, one record still pending
+    assert [r["payload"] for r in read_records(path)] == ['{"seq": 0}', '{"seq": 1}', '{"seq": 2}', '{"seq": 3}']
+    recorder.close()
+    records = list(read_records(path))
+    assert [r["payload"] for r in records][-1] == '{"seq": 4}'
+    assert {r["source"] for r in records} == {"kalshi"}
+    with open(path, "rb") as f:
+        assert gzip.decompress(f.read()).count(b"\n") == 5
+
+
+@pytest.mark.asyncio
+async def test_rest_and_ws_traffic_is_recorded(tmp_path):
+    path = str(tmp_path / "rec.jsonl.gz")
+    recorder = Recorder(path)
+    client = KalshiRestClient(base_url="http://test", api_key=None, recorder=recorder)
+    client.client._transport = httpx.MockTransport(lambda req: httpx.Response(200, json=kalshi_page("m1")))
+    await client.fetch_quotes()
+    ws = PolymarketWSClient(api_key="k", recorder=recorder)
+    ws.conn = DummyConn(["frame-1", "frame-2"])
+    assert [m async for m in ws.listen()] == ["frame-1", "frame-2"]
+    recorder.close()
+    records = list(read_records(path))
+    assert [(r["source"], r["kind"]) for r in records] == [("kalshi", "rest"), ("polymarket", "ws"), ("polymarket", "ws")]
+    assert records[0]["path"] == client.markets_path
+
+
+@pytest.mark.asyncio
+async def test_replayer_paces_at_speed_multiple(tmp_path, monkeypatch):
+    path = str(tmp_path / "rec.jsonl.gz")
+    recorder = Recorder(path)
+    clock = iter([100.0, 100.5, 101.0])
+    monkeypatch.setattr(time, "time", lambda: next(clock))
+    for i in range(3):
+        recorder.record("polymarket", "ws", f"frame-{i}")
+    monkeypatch.undo()
+    recorder.close()
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    frames = [m async for m in ReplayWSClient(Replayer(path, speed=10.0), "polymarket").listen()]
+    elapsed = loop.time() - start
+    assert frames == ["frame-0", "frame-1", "frame-2"]
+    # 1s of recorded traffic at 10x
+    assert 0.09 <= elapsed < 0.5
+
+    start = loop.time()
+    assert len([r async for r in Replayer(path, speed=None).records()]) == 3
+    assert loop.time() - start < 0.05
+
+
+@pytest.mark.asyncio
+async def test_replay_connector_feeds_ingestion(tmp_path):
+    path = str(tmp_path / "rec.jsonl.gz")
+    recorder = Recorder(path)
+    client = KalshiRestClient(base_url="http://test", api_key=None, recorder=recorder)
+    pages = iter([kalshi_page("m1"), kalshi_page("m2")])
+    client.client._transport = httpx.MockTransport(lambda req: httpx.Response(200, json=next(pages)))
+    await client.fetch_quotes()
+    await client.fetch_quotes()
+    recorder.close()
+
+    replayer = Replayer(path, speed=None)
+    stored = []
+    scheduler = IngestionScheduler(
+        connectors=[
+            (ReplayConnector(KalshiRestClient(base_url="http://test"), replayer), 0.01),
+            (ReplayConnector(PolymarketRestClient(base_url="http://test"), replayer), 0.01),
+        ],
+        session_factory=lambda: DummySession(stored),
+    )
+    await scheduler.run(duration=0.1)
+    assert sorted(q.market_id for q in stored) == ["m1", "m2"]
+    assert {q.platform for q in stored} == {"kalshi"}
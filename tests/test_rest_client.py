@@ -1,8 +1,12 @@
+import asyncio
 import pytest
 from datetime import datetime
 import httpx
 
+from connectors.rate_limit import VenueLimiter
 from connectors.rest_client import KalshiRestClient, PolymarketRestClient
+from connectors.transport import RequestTimer, TransportConfig
+from prometheus_client import REGISTRY
 from models import MarketQuote
 
 @pytest.mark.asyncio
@@ -40,3 +44,208 @@ async def test_polymarket_fetch_quotes():
     assert isinstance(q, MarketQuote)
     assert q.market_id == "m2"
     assert q.outcomes["No"].ask == 0.5
+
+@pytest.mark.asyncio
+async def test_kalshi_fetch_markets_filters_by_ticker():
+    seen = []
+    sample = {"markets": [{
+        "event_id": "e1",
+        "market_id": "m1",
+        "outcomes": {"Yes": {"bid": 0.7, "ask": 0.8}},
+        "timestamp": "2025-04-01T12:00:00Z"
+    }]}
+
+    def handler(req):
+        seen.append(req.url.params["tickers"])
+        return httpx.Response(200, json=sample)
+
+    client = KalshiRestClient(base_url="http://test", api_key=None)
+    client.client._transport = httpx.MockTransport(handler)
+    quotes = await client.fetch_markets(["m1", "m2"])
+    assert seen == ["m1,m2"]
+    assert [q.market_id for q in quotes] == ["m1"]
+
+@pytest.mark.asyncio
+async def test_fast_decode_matches_validated_path():
+    sample = {"markets": [
+        {"event_id": "e1", "market_id": "m1", "outcomes": {"Yes": {"bid": 0.7, "ask": 1}},
+         "timestamp": "2025-04-01T12:00:00Z"},
+        # string prices fail the schema check and go through validation
+        {"event_id": "e2", "market_id": "m2", "outcomes": {"Yes": {"bid": "0.2", "ask": "0.3"}},
+         "timestamp": "2025-04-01T12:00:00Z"},
+    ]}
+    results = []
+    for fast in (False, True):
+        client = KalshiRestClient(base_url="http://test", api_key=None, fast_decode=fast)
+        client.client._transport = httpx.MockTransport(lambda req: httpx.Response(200, json=sample))
+        results.append(await client.fetch_quotes())
+    slow, fast = results
+    assert fast == slow
+    assert fast[0].outcomes["Yes"].ask == 1.0 and isinstance(fast[0].outcomes["Yes"].ask, float)
+    assert fast[1].outcomes["Yes"].bid == 0.2
+
+def market(i):
+    return {"event_id": f"e{i}", "market_id": f"m{i}", "outcomes": {"Yes": {"bid": 0.4, "ask": 0.5}},
+            "timestamp": "2025-04-01T12:00:00Z"}
+
+@pytest.mark.asyncio
+async def test_kalshi_follows_cursor_and_uses_etags():
+    requests = []
+
+    def handler(req):
+        requests.append(req)
+        cursor = req.url.params.get("cursor")
+        if req.headers.get("If-None-Match") == f'"{cursor}"':
+            return httpx.Response(304)
+        body = {"markets": [market(0)], "cursor": "c1"} if cursor is None else {"markets": [market(1)], "cursor": ""}
+        return httpx.Response(200, json=body, headers={"ETag": f'"{cursor}"'})
+
+    client = KalshiRestClient(base_url="http://test", page_size=1)
+    client.client._transport = httpx.MockTransport(handler)
+    quotes = await client.fetch_quotes()
+    assert [q.market_id for q in quotes] == ["m0", "m1"]
+    assert requests[1].url.params["cursor"] == "c1"
+    # second poll: both pages unchanged, the cached cursor still advances
+    assert await client.fetch_quotes() == []
+    assert len(requests) == 4
+    assert requests[3].url.params["cursor"] == "c1"
+
+@pytest.mark.asyncio
+async def test_polymarket_fetches_offset_pages_concurrently():
+    total = 7
+    in_flight = 0
+    peak = 0
+
+    async def handler(req):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        offset, limit = int(req.url.params["offset"]), int(req.url.params["limit"])
+        rows = [{"event_id": f"e{i}", "market_id": f"m{i}",
+                 "outcomes": [{"outcome": "Yes", "bid_price": 0.4, "ask_price": 0.5}],
+                 "updated_at": "2025-04-01T12:00:00Z"} for i in range(offset, min(offset + limit, total))]
+        assert req.url.params["updated_since"].startswith("2025-04-01")
+        return httpx.Response(200, json={"markets": rows})
+
+    client = PolymarketRestClient(base_url="http://test", page_size=2, page_concurrency=2)
+    client.client._transport = httpx.MockTransport(handler)
+    pages = [p async for p in client.fetch_pages(updated_since=datetime(2025, 4, 1))]
+    ids = sorted(q.market_id for p in pages for q in client.normalize(p))
+    assert ids == sorted(f"m{i}" for i in range(total))
+    assert peak == 2
+
+@pytest.mark.asyncio
+async def test_429_retry_after_is_honoured():
+    calls = []
+
+    def handler(req):
+        calls.append(req)
+        if len(calls) == 1:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        return httpx.Response(200, json={"markets": [market(0)]})
+
+    client = KalshiRestClient(base_url="http://test")
+    client.client._transport = httpx.MockTransport(handler)
+    quotes = await client.fetch_quotes()
+    assert [q.market_id for q in quotes] == ["m0"] and len(calls) == 2
+
+@pytest.mark.asyncio
+async def test_orders_are_not_retried_on_ambiguous_errors():
+    calls = []
+
+    def handler(req):
+        calls.append(req)
+        return httpx.Response(503)
+
+    client = KalshiRestClient(base_url="http://test", retry_base_delay=0)
+    client.client._transport = httpx.MockTransport(handler)
+    client.order_client._transport = httpx.MockTransport(handler)
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.place_order("m1", "Yes", "BUY", 0.5, 1)
+    assert len(calls) == 1
+    # reads are retried up to max_retries
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.fetch_quotes()
+    assert len(calls) == 1 + 4
+
+@pytest.mark.asyncio
+async def test_retry_budget_caps_retry_storms():
+    calls = []
+
+    def handler(req):
+        calls.append(req)
+        return httpx.Response(503)
+
+    limiter = VenueLimiter("kalshi", read_rate=1000, order_rate=1000, min_retries=2)
+    client = KalshiRestClient(base_url="http://test", limiter=limiter, retry_base_delay=0)
+    client.client._transport = httpx.MockTransport(handler)
+    for _ in range(3):
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.fetch_quotes()
+    # 3 first attempts plus the 2 retries the budget allowed
+    assert len(calls) == 5
+
+@pytest.mark.asyncio
+async def test_orders_use_dedicated_client_and_warm_up_touches_both_pools():
+    reads, orders = [], []
+    client = KalshiRestClient(base_url="http://test", transport=TransportConfig(http2=True))
+    client.client._transport = httpx.MockTransport(lambda req: reads.append(req) or httpx.Response(405))
+    client.order_client._transport = httpx.MockTransport(
+        lambda req: orders.append(req) or httpx.Response(200, json={"order_id": "o1"})
+    )
+    await client.warm_up(order_connections=2)
+    assert [r.method for r in reads] == ["HEAD"] and len(orders) == 2
+    assert (await client.place_order("m1", "Yes", "BUY", 0.5, 1))["order_id"] == "o1"
+    assert orders[-1].method == "POST" and len(reads) == 1
+    await client.close()
+
+@pytest.mark.asyncio
+async def test_request_timer_observes_connection_phases():
+    timer = RequestTimer("kalshi", "order")
+    before = REGISTRY.get_sample_value("rest_tls_seconds_count", {"venue": "kalshi", "pool": "order"}) or 0
+    for event in (
+        "connection.connect_tcp.started", "connection.connect_tcp.complete",
+        "connection.start_tls.started", "connection.start_tls.complete",
+        "http11.send_request_headers.started", "http11.receive_response_headers.started",
+        "http11.receive_response_headers.complete",
+    ):
+        await timer(event, {})
+    assert REGISTRY.get_sample_value("rest_tls_seconds_count", {"venue": "kalshi", "pool": "order"}) == before + 1
+    assert REGISTRY.get_sample_value("rest_ttfb_seconds_count", {"venue": "kalshi", "pool": "order"}) >= 1
+
+@pytest.mark.asyncio
+async def test_polymarket_orders_use_order_pool():
+    seen = []
+
+    def handler(req):
+        seen.append((req.method, req.url.path))
+        return httpx.Response(200, json={"order_id": "o1", "filled_size": 1})
+
+    client = PolymarketRestClient(base_url="http://test", api_key=None)
+    client.order_client._transport = httpx.MockTransport(handler)
+    assert (await client.place_order("m1", "Yes", "BUY", 0.5, 1))["filled_size"] == 1
+    await client.cancel_order("o1")
+    assert seen == [("POST", "/api/v2/orders"), ("DELETE", "/api/v2/orders/o1")]
+
+@pytest.mark.asyncio
+async def test_incremental_polls_reuse_bounded_etag_cache():
+    requests = []
+
+    def handler(req):
+        requests.append(req)
+        if req.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json={"markets": [market(0)], "cursor": ""}, headers={"ETag": '"v1"'})
+
+    client = KalshiRestClient(base_url="http://test")
+    client.max_validators = 2
+    client.client._transport = httpx.MockTransport(handler)
+    assert len(await client.fetch_quotes(updated_since=datetime(2025, 1, 1))) == 1
+    # a later updated_since maps to the same cache entry, so the ETag is sent
+    assert await client.fetch_quotes(updated_since=datetime(2025, 1, 2)) == []
+    assert len(client._validators) == 1
+    for i in range(3):
+        await client._get_page(f"/v1/other{i}", {}, lambda p: None)
+    assert len(client._validators) == 2
@@ -0,0 +1,46 @@
+import zlib
+from datetime import datetime
+
+import pytest
+
+from models import MarketQuote, PriceLevel, Settings
+from services.sharded import ShardedScorer, process_shard
+
+
+def quote(platform, event_id, yes_ask, no_ask):
+    return MarketQuote(
+        platform=platform,
+        event_id=event_id,
+        market_id=f"{platform}-{event_id}",
+        outcomes={"Yes": PriceLevel(bid=yes_ask - 0.02, ask=yes_ask), "No": PriceLevel(bid=no_ask - 0.02, ask=no_ask)},
+        timestamp=datetime(2025, 1, 1),
+    )
+
+
+@pytest.mark.asyncio
+async def test_sharded_scoring_matches_across_batches():
+    scorer = ShardedScorer(Settings(kalshi_api_key="k", polymarket_rpc_url="url", min_spread=0.01), shards=2)
+    try:
+        await scorer.start()
+        events = [f"e{i}" for i in range(10)]
+        # one venue alone is not a candidate yet
+        assert await scorer.submit([quote("kalshi", e, 0.40, 0.70) for e in events]) == []
+        opps = await scorer.submit([quote("polymarket", e, 0.60, 0.45) for e in events])
+        assert sorted(o.event_key for o in opps) == sorted(events)
+        assert all(o.net_cost == pytest.approx(0.85) for o in opps)
+        assert {q.platform for q in opps[0].candidate.platform_quotes} == {"kalshi", "polymarket"}
+        # unchanged prices do not rescore; a move that closes the gap drops the event
+        assert await scorer.submit([quote("kalshi", "e1", 0.40, 0.70)]) == []
+        opps = await scorer.submit([quote("kalshi", "e1", 0.55, 0.70), quote("kalshi", "e2", 0.30, 0.70)])
+        assert [(o.event_key, round(o.net_cost, 2)) for o in opps] == [("e2", 0.75)]
+    finally:
+        scorer.close()
+
+
+def test_process_shard_is_independent_of_broker_shard():
+    # worker 0 of 2 over 4 broker shards (crc32 % 4) only sees events on even shards
+    owned = [e for e in (f"event-{i}" for i in range(10_000)) if zlib.crc32(e.encode()) % 4 % 2 == 0]
+    counts = [0, 0]
+    for e in owned:
+        counts[process_shard(e, 2)] += 1
+    assert min(counts) > 0.45 * len(owned)
@@ -0,0 +1,226 @@
+import asyncio
+import json
+import pytest
+from datetime import datetime
+from models import MarketQuote, PriceLevel, QuoteDelta
+from services.quote_book import QuoteBook
+from services.streaming import (
+    CoalescingQueue,
+    KalshiBookRecovery,
+    KalshiNormalizer,
+    PolymarketNormalizer,
+    SnapshotRecovery,
+    StreamingPipeline,
+)
+from tracing import Tracer
+
+
+class DummyClient:
+    def __init__(self, messages):
+        self.messages = messages
+
+    async def listen(self):
+        for m in self.messages:
+            yield m
+
+
+def delta(market_id: str, ask: float, outcome: str = "Yes") -> QuoteDelta:
+    return QuoteDelta(
+        platform="kalshi",
+        market_id=market_id,
+        outcomes={outcome: PriceLevel(bid=ask - 0.1, ask=ask)},
+        timestamp=datetime.utcnow(),
+    )
+
+
+def test_kalshi_normalizer_ticker_and_snapshot():
+    norm = KalshiNormalizer()
+    [d] = norm.parse({"type": "ticker", "sid": 1, "msg": {"market_ticker": "FED", "yes_bid": 45, "yes_ask": 53, "ts": 1700000000}})
+    assert d.platform == "kalshi" and d.market_id == "FED"
+    assert d.outcomes["Yes"] == PriceLevel(bid=0.45, ask=0.53)
+    assert d.outcomes["No"].bid == pytest.approx(0.47)
+    assert d.outcomes["No"].ask == pytest.approx(0.55)
+    [d] = norm.parse({"type": "orderbook_snapshot", "msg": {"market_ticker": "FED", "yes": [[40, 10], [44, 5]], "no": [[50, 3]]}})
+    assert d.outcomes["Yes"].bid == pytest.approx(0.44)
+    assert d.outcomes["Yes"].ask == pytest.approx(0.50)
+    assert norm.parse({"type": "subscribed", "msg": {}}) == []
+
+
+def test_kalshi_normalizer_applies_orderbook_deltas():
+    norm = KalshiNormalizer()
+    norm.parse({"type": "orderbook_snapshot", "msg": {"market_ticker": "FED", "yes": [[40, 10], [44, 5]], "no": [[50, 3]]}})
+    # the best Yes bid is taken out, and a better No bid lowers the Yes ask
+    [d] = norm.parse({"type": "orderbook_delta", "msg": {"market_ticker": "FED", "side": "yes", "price": 44, "delta": -5}})
+    assert d.outcomes["Yes"].bid == pytest.approx(0.40)
+    [d] = norm.parse({"type": "orderbook_delta", "msg": {"market_ticker": "FED", "side": "no", "price": 52, "delta": 4}})
+    assert d.outcomes["Yes"].ask == pytest.approx(0.48)
+    assert d.outcomes["No"].bid == pytest.approx(0.52)
+    assert norm.books.books[("kalshi", "FED")].version > 0
+
+
+def test_polymarket_normalizer_tracks_book_changes():
+    norm = PolymarketNormalizer(assets={"a1": ("m1", "Yes")})
+    book = {
+        "event_type": "book",
+        "asset_id": "a1",
+        "bids": [{"price": "0.40", "size": "100"}, {"price": "0.42", "size": "10"}],
+        "asks": [{"price": "0.45", "size": "50"}],
+        "timestamp": "1700000000000",
+    }
+    [d] = norm.parse(json.dumps([book]))
+    assert d.market_id == "m1"
+    assert d.outcomes["Yes"] == PriceLevel(bid=0.42, ask=0.45)
+    change = {
+        "event_type": "price_change",
+        "asset_id": "a1",
+        "changes": [{"price": "0.42", "side": "BUY", "size": "0"}, {"price": "0.44", "side": "SELL", "size": "5"}],
+        "timestamp": "1700000001000",
+    }
+    [d] = norm.parse(json.dumps(change))
+    assert d.outcomes["Yes"] == PriceLevel(bid=0.40, ask=0.44)
+    assert norm.parse("PONG") == []
+    assert norm.parse(json.dumps({"event_type": "book", "asset_id": "unknown"})) == []
+
+
+@pytest.mark.asyncio
+async def test_coalescing_queue_merges_and_drops_oldest():
+    queue = CoalescingQueue(maxsize=2)
+    await queue.put(delta("m1", 0.5))
+    await queue.put(delta("m2", 0.6))
+    await queue.put(delta("m1", 0.55, outcome="No"))
+    assert queue.qsize() == 2
+    # m3 evicts m1, the oldest pending market
+    await queue.put(delta("m3", 0.7))
+    first = await queue.get()
+    second = await queue.get()
+    assert [first.market_id, second.market_id] == ["m2", "m3"]
+
+
+@pytest.mark.asyncio
+async def test_coalescing_queue_block_policy_waits_for_room():
+    queue = CoalescingQueue(maxsize=1, overflow="block")
+    await queue.put(delta("m1", 0.5))
+    # a coalesced update never blocks
+    await queue.put(delta("m1", 0.52))
+    blocked = asyncio.create_task(queue.put(delta("m2", 0.6)))
+    await asyncio.sleep(0)
+    assert not blocked.done()
+    got = await queue.get()
+    assert got.outcomes["Yes"].ask == 0.52
+    await blocked
+    assert (await queue.get()).market_id == "m2"
+
+
+@pytest.mark.asyncio
+async def test_pipeline_feeds_quote_book():
+    book = QuoteBook()
+    book.upsert(
+        MarketQuote(
+            platform="kalshi",
+            event_id="e1",
+            market_id="FED",
+            outcomes={"Yes": PriceLevel(bid=0.4, ask=0.5)},
+            timestamp=datetime.utcnow(),
+        )
+    )
+    book.drain_dirty()
+    client = DummyClient([
+        {"type": "ticker", "msg": {"market_ticker": "FED", "yes_bid": 45, "yes_ask": 48, "ts": 1700000000}},
+        {"type": "garbage"},
+    ])
+    pipeline = StreamingPipeline([(client, KalshiNormalizer())])
+    await pipeline.run()
+    consumer = asyncio.create_task(pipeline.apply_to(book))
+    await asyncio.sleep(0)
+    consumer.cancel()
+    assert book.get("kalshi", "FED").outcomes["Yes"] == PriceLevel(bid=0.45, ask=0.48)
+    assert book.drain_dirty() == {"e1"}
+
+
+@pytest.mark.asyncio
+async def test_sampled_ws_updates_carry_their_receive_stamp_to_the_book():
+    book = QuoteBook()
+    book.upsert(
+        MarketQuote(
+            platform="kalshi",
+            event_id="e1",
+            market_id="FED",
+            outcomes={"Yes": PriceLevel(bid=0.4, ask=0.5)},
+            timestamp=datetime.utcnow(),
+        )
+    )
+    client = DummyClient([{"type": "ticker", "msg": {"market_ticker": "FED", "yes_bid": 45, "yes_ask": 48}}])
+    pipeline = StreamingPipeline([(client, KalshiNormalizer())], tracer=Tracer(sample_rate=1.0))
+    await pipeline.run()
+    stamped = await pipeline.queue.get()
+    assert stamped.received_at is not None
+    # an unsampled update coalesced into a sampled one keeps the earlier stamp
+    await pipeline.queue.put(stamped)
+    await pipeline.queue.put(delta("FED", 0.49))
+    book.apply_delta(await pipeline.queue.get())
+    quote = book.get("kalshi", "FED")
+    assert quote.received_at == stamped.received_at
+    assert Tracer.resume([quote]) is not None
+    # the next unsampled update clears it
+    book.apply_delta(delta("FED", 0.47))
+    assert quote.received_at is None
+
+
+@pytest.mark.asyncio
+async def test_kalshi_book_recovery_waits_for_a_fresh_snapshot():
+    class DummyWS:
+        def __init__(self):
+            self.subscriptions = {("orderbook_delta", "FED"): None, ("orderbook_delta", "CPI"): None, ("ticker", None): None}
+            self.commands = []
+
+        async def subscribe(self, channel, market_id=None):
+            self.commands.append(("subscribe", channel, market_id))
+            self.subscriptions[(channel, market_id)] = None
+
+        async def unsubscribe(self, channel, market_id=None):
+            self.commands.append(("unsubscribe", channel, market_id))
+            self.subscriptions.pop((channel, market_id), None)
+
+    norm = KalshiNormalizer()
+    snapshot = {"type": "orderbook_snapshot", "msg": {"market_ticker": "FED", "yes": [[44, 5]], "no": [[50, 3]]}}
+    norm.parse(snapshot)
+    recovered = []
+
+    async def rest_recover(markets):
+        recovered.append(markets)
+
+    ws = DummyWS()
+    await KalshiBookRecovery(ws, norm.books, recover=rest_recover)({"FED"})
+    # only FED's order book subscription is replayed, which re-sends its snapshot
+    assert ws.commands == [("unsubscribe", "orderbook_delta", "FED"), ("subscribe", "orderbook_delta", "FED")]
+    assert recovered == [{"FED"}]
+    # deltas against the dropped ladder would overwrite the REST snapshot, so they are ignored
+    delta_msg = {"type": "orderbook_delta", "msg": {"market_ticker": "FED", "side": "yes", "price": 44, "delta": -5}}
+    assert norm.parse(delta_msg) == []
+    [d] = norm.parse(snapshot)
+    assert d.outcomes["Yes"].bid == pytest.approx(0.44)
+    [d] = norm.parse(delta_msg)
+    assert d.outcomes["Yes"].bid == 0.0
+
+
+@pytest.mark.asyncio
+async def test_snapshot_recovery_applies_targeted_snapshot():
+    class DummyRest:
+        async def fetch_markets(self, market_ids):
+            self.requested = market_ids
+            return [
+                MarketQuote(
+                    platform="kalshi",
+                    event_id="e1",
+                    market_id=m,
+                    outcomes={"Yes": PriceLevel(bid=0.3, ask=0.35)},
+                    timestamp=datetime.utcnow(),
+                )
+                for m in market_ids
+            ]
+
+    rest = DummyRest()
+    book = QuoteBook()
+    await SnapshotRecovery(rest, book)({"B", "A"})
+    assert rest.requested == ["A", "B"]
+    assert book.get("kalshi", "A").outcomes["Yes"].ask == 0.35
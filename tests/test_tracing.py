@@ -0,0 +1,76 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from prometheus_client import REGISTRY
+
+from models import MarketQuote, PriceLevel
+from tracing import LoopMonitor, Tracer
+
+
+def sample_count(name, labels=None):
+    return REGISTRY.get_sample_value(f"{name}_count", labels or {}) or 0.0
+
+
+def quote(platform="kalshi", age=0.0):
+    return MarketQuote(
+        platform=platform,
+        event_id="e1",
+        market_id="m1",
+        outcomes={"Yes": PriceLevel(bid=0.4, ask=0.5)},
+        timestamp=datetime.now(timezone.utc) - timedelta(seconds=age),
+    )
+
+
+def test_sampling_stride():
+    tracer = Tracer(sample_rate=0.25)
+    assert [tracer.start() is not None for _ in range(8)] == [False, False, False, True] * 2
+    assert all(Tracer(sample_rate=0).start() is None for _ in range(10))
+
+
+def test_stamp_and_resume_across_stages():
+    tracer = Tracer(sample_rate=1.0)
+    before = sample_count("quote_staleness_seconds", {"venue": "tracevenue"})
+    received = time.time() - 0.5
+    trace = tracer.start(received)
+    quotes = [quote("tracevenue", age=2.0), quote("tracevenue", age=1.0)]
+    tracer.stamp(trace, quotes)
+    assert quotes[0].received_at.timestamp() == pytest.approx(received)
+    assert sample_count("quote_staleness_seconds", {"venue": "tracevenue"}) == before + 2
+
+    # downstream, e.g. in a scoring worker, the stamp continues the trace
+    score_before = sample_count("tick_stage_seconds", {"stage": "score"})
+    ticks_before = sample_count("tick_to_trade_seconds")
+    downstream = Tracer.resume(quotes + [quote()])
+    downstream.mark("score")
+    downstream.finish()
+    assert sample_count("tick_stage_seconds", {"stage": "score"}) == score_before + 1
+    assert sample_count("tick_to_trade_seconds") == ticks_before + 1
+    assert REGISTRY.get_sample_value("tick_to_trade_seconds_sum") >= 0.5
+    assert Tracer.resume([quote()]) is None
+
+
+def test_staleness_buckets_cover_minutes_old_quotes():
+    tracer = Tracer(sample_rate=1.0)
+    labels = {"venue": "quietvenue"}
+    tracer.stamp(tracer.start(), [quote("quietvenue", age=120.0)])
+    assert REGISTRY.get_sample_value("quote_staleness_seconds_bucket", {**labels, "le": "60.0"}) == 0.0
+    assert REGISTRY.get_sample_value("quote_staleness_seconds_bucket", {**labels, "le": "300.0"}) == 1.0
+
+
+@pytest.mark.asyncio
+async def test_loop_monitor_observes_lag_and_queue_depth():
+    queue = asyncio.Queue()
+    for i in range(3):
+        queue.put_nowait(i)
+    before = sample_count("event_loop_lag_seconds")
+    monitor = LoopMonitor(interval=0.005, queues={"test_queue": queue})
+    monitor.start()
+    await asyncio.sleep(0.01)
+    # block the loop so the monitor's timer fires late
+    time.sleep(0.02)
+    await asyncio.sleep(0.01)
+    await monitor.stop()
+    assert sample_count("event_loop_lag_seconds") > before
+    assert REGISTRY.get_sample_value("queue_depth", {"queue": "test_queue"}) == 3
@@ -0,0 +1,110 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from connectors.broker import MemoryBroker, MemoryConsumer, MemoryPublisher, shard_for
+from models import MarketQuote, PriceLevel, Settings
+from services.worker import ScoringWorker
+
+
+def make_settings():
+    return Settings(kalshi_api_key="k", polymarket_rpc_url="url", min_spread=0.01)
+
+
+def quote(platform, event_id, yes_ask, no_ask):
+    return MarketQuote(
+        platform=platform,
+        event_id=event_id,
+        market_id=f"{platform}-{event_id}",
+        outcomes={"Yes": PriceLevel(bid=yes_ask - 0.02, ask=yes_ask), "No": PriceLevel(bid=no_ask - 0.02, ask=no_ask)},
+        timestamp=datetime(2025, 1, 1),
+    )
+
+
+async def publish_arbitrage(broker, events):
+    publisher = MemoryPublisher(broker)
+    for event_id in events:
+        await publisher.publish_many("quotes", [quote("kalshi", event_id, 0.40, 0.70), quote("polymarket", event_id, 0.60, 0.45)])
+
+
+@pytest.mark.asyncio
+async def test_worker_scores_and_commits():
+    broker = MemoryBroker(partitions=2)
+    await publish_arbitrage(broker, ["e1", "e2"])
+    consumer = MemoryConsumer(broker, "quotes", "scoring")
+    await consumer.start()
+    worker = ScoringWorker(consumer, make_settings(), publisher=MemoryPublisher(broker), poll_timeout=0)
+    opportunities = await worker.step()
+    assert sorted(o.event_key for o in opportunities) == ["e1", "e2"]
+    assert opportunities[0].net_cost == pytest.approx(0.85)
+    published = [json.loads(v) for p in range(2) for _, v in broker.logs.get(("opportunities", p), [])]
+    assert sorted(o["event_key"] for o in published) == ["e1", "e2"]
+    assert await consumer.lag() == {0: 0, 1: 0}
+    assert sum(broker.committed.get(("scoring", "quotes", p), 0) for p in range(2)) == 4
+    # nothing new: no rescoring
+    assert await worker.step() == []
+
+
+@pytest.mark.asyncio
+async def test_shards_keep_events_on_one_worker():
+    broker = MemoryBroker(partitions=4)
+    events = [f"e{i}" for i in range(20)]
+    await publish_arbitrage(broker, events)
+    scored = []
+    for owned in ([0, 2], [1, 3]):
+        consumer = MemoryConsumer(broker, "quotes", "scoring", partitions=owned)
+        await consumer.start()
+        worker = ScoringWorker(consumer, make_settings(), poll_timeout=0)
+        keys = [o.event_key for o in await worker.step()]
+        assert all(shard_for(k.encode(), 4) in owned for k in keys)
+        scored.extend(keys)
+    assert sorted(scored) == sorted(events)
+
+
+@pytest.mark.asyncio
+async def test_uncommitted_batch_is_redelivered():
+    class FailingPublisher(MemoryPublisher):
+        async def publish_many(self, topic, messages):
+            raise RuntimeError("broker down")
+
+    broker = MemoryBroker(partitions=1)
+    await publish_arbitrage(broker, ["e1"])
+    consumer = MemoryConsumer(broker, "quotes", "scoring")
+    await consumer.start()
+    worker = ScoringWorker(consumer, make_settings(), publisher=FailingPublisher(broker), poll_timeout=0)
+    with pytest.raises(RuntimeError):
+        await worker.step()
+    assert ("scoring", "quotes", 0) not in broker.committed
+    # a replacement worker resumes from the last commit
+    replacement = MemoryConsumer(broker, "quotes", "scoring")
+    await replacement.start()
+    opportunities = await ScoringWorker(replacement, make_settings(), poll_timeout=0).step()
+    assert [o.event_key for o in opportunities] == ["e1"]
+
+
+@pytest.mark.asyncio
+async def test_memory_consumer_waits_for_messages():
+    broker = MemoryBroker(partitions=1)
+    consumer = MemoryConsumer(broker, "quotes", "scoring")
+    await consumer.start()
+    assert await consumer.poll(timeout=0.01) == []
+    await MemoryPublisher(broker).publish("quotes", {"event_id": "e1"})
+    (message,) = await consumer.poll(timeout=0.01)
+    assert (message.partition, message.offset, message.key) == (0, 0, b"e1")
+
+
+@pytest.mark.asyncio
+async def test_worker_with_sharded_scorer():
+    from services.sharded import ShardedScorer
+
+    broker = MemoryBroker(partitions=1)
+    await publish_arbitrage(broker, ["e1", "e2"])
+    consumer = MemoryConsumer(broker, "quotes", "scoring")
+    await consumer.start()
+    scorer = ShardedScorer(make_settings(), shards=2)
+    try:
+        opportunities = await ScoringWorker(consumer, make_settings(), poll_timeout=0, scorer=scorer).step()
+    finally:
+        scorer.close()
+    assert sorted(o.event_key for o in opportunities) == ["e1", "e2"]
@@ -1,7 +1,14 @@
+import asyncio
 import pytest
 import json
 import websockets
-from connectors.ws_client import KalshiWSClient, PolymarketWSClient
+from connectors.ws_client import (
+    KalshiSequenceTracker,
+    KalshiWSClient,
+    PolymarketResyncTracker,
+    PolymarketWSClient,
+    SupervisedConnection,
+)
 
 
 class DummyConn:
@@ -62,3 +69,95 @@ async def test_polymarket_ws_subscribe_listen_unsubscribe(monkeypatch):
     assert dummy.sent[-1] == 'UNSUBSCRIBE user'
     await client.close()
     assert hasattr(dummy, 'closed')
+
+
+class SilentConn(DummyConn):
+    """A connection that never delivers a message."""
+
+    async def __anext__(self):
+        await asyncio.sleep(3600)
+
+
+class ScriptedKalshiClient(KalshiWSClient):
+    """Hands out the next scripted connection on every connect()."""
+
+    def __init__(self, conns):
+        super().__init__(api_key='testkey')
+        self.conns = list(conns)
+        self.connects = 0
+
+    async def connect(self):
+        self.connects += 1
+        self.conn = self.conns.pop(0)
+
+
+def ticker(sid, seq, market):
+    return json.dumps({'type': 'ticker', 'sid': sid, 'seq': seq, 'msg': {'market_ticker': market}})
+
+
+def test_kalshi_sequence_tracker_reports_gap_markets():
+    tracker = KalshiSequenceTracker()
+    assert tracker.observe(json.loads(ticker(1, 1, 'A'))) == set()
+    assert tracker.observe(json.loads(ticker(1, 2, 'B'))) == set()
+    assert tracker.observe(json.loads(ticker(2, 1, 'C'))) == set()
+    assert tracker.observe(json.loads(ticker(1, 4, 'A'))) == {'A', 'B'}
+    assert tracker.reset() == {'A', 'B', 'C'}
+    assert tracker.observe(json.loads(ticker(1, 9, 'A'))) == set()
+    assert PolymarketResyncTracker(['m1']).reset() == {'m1'}
+
+
+@pytest.mark.asyncio
+async def test_supervised_connection_reconnects_resubscribes_and_resyncs():
+    first = DummyConn([ticker(1, 1, 'A'), ticker(1, 3, 'A')])
+    second = DummyConn([ticker(7, 1, 'B')])
+    client = ScriptedKalshiClient([first, second])
+    await client.connect()
+    await client.subscribe('ticker', market_id='A')
+    recovered = []
+
+    async def recover(markets):
+        recovered.append(markets)
+
+    supervised = SupervisedConnection(
+        client, 'kalshi', tracker=KalshiSequenceTracker(), recover=recover, base_delay=0
+    )
+    received = []
+    async for message in supervised.listen():
+        received.append(message['sid'])
+        if len(received) == 3:
+            break
+    await asyncio.sleep(0)
+    assert received == [1, 1, 7]
+    assert client.connects == 2
+    # the subscription is replayed on the new connection
+    assert json.loads(second.sent[0])['params'] == {'channel': 'ticker', 'market_id': 'A'}
+    # one resync for the sequence gap, one for the reconnect
+    assert recovered == [{'A'}, {'A'}]
+    await supervised.close()
+
+
+@pytest.mark.asyncio
+async def test_supervised_connection_heartbeat_timeout_forces_reconnect():
+    client = ScriptedKalshiClient([SilentConn([]), DummyConn([ticker(1, 1, 'A')])])
+    await client.connect()
+    supervised = SupervisedConnection(client, 'kalshi', heartbeat_timeout=0.01, base_delay=0)
+    message = await supervised.listen().__anext__()
+    assert message['msg']['market_ticker'] == 'A'
+    assert client.connects == 2
+    await supervised.close()
+
+
+@pytest.mark.asyncio
+async def test_supervised_connection_skips_undecodable_frames():
+    from prometheus_client import REGISTRY
+
+    before = REGISTRY.get_sample_value('ws_parse_errors_total', {'venue': 'kalshi'}) or 0.0
+    client = ScriptedKalshiClient([DummyConn(['{not json', ticker(1, 1, 'A')])])
+    await client.connect()
+    supervised = SupervisedConnection(client, 'kalshi', base_delay=0)
+    message = await supervised.listen().__anext__()
+    # the garbage frame neither ends the stream nor forces a reconnect
+    assert message['msg']['market_ticker'] == 'A'
+    assert client.connects == 1
+    assert REGISTRY.get_sample_value('ws_parse_errors_total', {'venue': 'kalshi'}) == before + 1
+    await supervised.close()
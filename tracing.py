@@ -0,0 +1,113 @@
+"""
+Sampled tick-to-trade tracing. A sampled batch of venue updates is stamped
+with its receive time (MarketQuote.received_at), which travels with the
+quotes through the broker to the scoring workers and on to execution, so
+every process can attribute its stage times to the same tick. WebSocket
+updates are stamped the same way (QuoteDelta.received_at) and the QuoteBook
+copies the stamp onto the quote they update.
+
+Only one in every 1 / sample_rate batches is traced, and histogram children
+are resolved once up front, so tracing can stay on in production.
+"""
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Union
+
+from metrics import event_loop_lag_seconds, queue_depth, quote_staleness_seconds, tick_stage_seconds, tick_to_trade_seconds
+from models import MarketQuote, QuoteDelta
+
+STAGES = ("parse", "match", "score", "decision", "order_ack")
+_STAGE_HISTOGRAMS = {stage: tick_stage_seconds.labels(stage) for stage in STAGES}
+
+
+class TickTrace:
+    """Stage timings of one sampled tick; `received` is wall-clock epoch seconds."""
+
+    __slots__ = ("received", "last")
+
+    def __init__(self, received: float, started: Optional[float] = None):
+        self.received = received
+        # perf_counter() at which the first stage began
+        self.last = time.perf_counter() if started is None else started
+
+    def mark(self, stage: str) -> None:
+        """Observe the time since the previous mark (or the trace start) as `stage`."""
+        now = time.perf_counter()
+        _STAGE_HISTOGRAMS[stage].observe(now - self.last)
+        self.last = now
+
+    def finish(self) -> None:
+        """Observe the full tick-to-trade time."""
+        tick_to_trade_seconds.observe(time.time() - self.received)
+
+
+def received_at(quotes: Iterable[MarketQuote], latest: bool = False) -> Optional[float]:
+    """Earliest (or latest) receive stamp among `quotes`, None if none was sampled."""
+    stamps = [q.received_at for q in quotes if getattr(q, "received_at", None) is not None]
+    if not stamps:
+        return None
+    return (max(stamps) if latest else min(stamps)).timestamp()
+
+
+class Tracer:
+    def __init__(self, sample_rate: float = 0.01):
+        self.stride = max(1, round(1 / sample_rate)) if sample_rate > 0 else 0
+        self._count = 0
+
+    def sample(self) -> bool:
+        if not self.stride:
+            return False
+        self._count += 1
+        if self._count >= self.stride:
+            self._count = 0
+            return True
+        return False
+
+    def start(self, received: Optional[float] = None) -> Optional[TickTrace]:
+        """A trace for a batch received at `received` (default now), or None if it is not sampled."""
+        if not self.sample():
+            return None
+        return TickTrace(time.time() if received is None else received)
+
+    def stamp(self, trace: TickTrace, quotes: Iterable[Union[MarketQuote, QuoteDelta]]) -> None:
+        """Stamp a traced batch (quotes or deltas) with its receive time and observe each one's staleness."""
+        received = datetime.fromtimestamp(trace.received, tz=timezone.utc)
+        for q in quotes:
+            q.received_at = received
+            ts = q.timestamp if q.timestamp.tzinfo is not None else q.timestamp.replace(tzinfo=timezone.utc)
+            quote_staleness_seconds.labels(q.platform).observe((received - ts).total_seconds())
+
+    @staticmethod
+    def resume(
+        quotes: Iterable[MarketQuote], latest: bool = False, started: Optional[float] = None
+    ) -> Optional[TickTrace]:
+        """Continue the trace of quotes stamped upstream, or None if they were not sampled."""
+        received = received_at(quotes, latest)
+        return None if received is None else TickTrace(received, started)
+
+
+class LoopMonitor:
+    """Samples event-loop lag and the depth of the given queues every `interval` seconds."""
+
+    def __init__(self, interval: float = 0.1, queues: Optional[Dict[str, asyncio.Queue]] = None):
+        self.interval = interval
+        self.queues = {name: (queue, queue_depth.labels(name)) for name, queue in (queues or {}).items()}
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            t0 = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            event_loop_lag_seconds.observe(max(0.0, time.perf_counter() - t0 - self.interval))
+            for queue, gauge in self.queues.values():
+                gauge.set(queue.qsize())
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None